@@ -0,0 +1,34 @@
+"""
+Export `cpu_model_results`, joined with the name dimensions, to a local Parquet dataset
+partitioned by month and cpu_model_id, for analysis without querying PostgreSQL.
+
+Incremental: only partitions whose rows changed since the last export are streamed
+(through a server-side cursor) and rewritten. See `utils/geekbench_report/parquet_export.py`.
+
+Run locally:
+```bash
+GEEKBENCH_REPORT_POSTGRESDB_HOST="..." \
+GEEKBENCH_REPORT_POSTGRESDB_DATABASE="geekbench_report" \
+GEEKBENCH_REPORT_POSTGRESDB_PORT="..." \
+GEEKBENCH_REPORT_POSTGRESDB_USER="..." \
+GEEKBENCH_REPORT_POSTGRESDB_PASSWORD="..." \
+GEEKBENCH_REPORT_PARQUET_EXPORT_DIR="/data/geekbench_report/cpu_model_results" \
+PYTHONPATH=src \
+python src/app/geekbench_report/export_cpu_model_result_to_parquet.py
+```
+"""
+
+import time
+
+from utils.geekbench_report.parquet_export import (
+    GEEKBENCH_REPORT_PARQUET_EXPORT_DIR,
+    export_results_to_parquet,
+)
+
+if __name__ == "__main__":
+    if GEEKBENCH_REPORT_PARQUET_EXPORT_DIR is None:
+        raise ValueError("GEEKBENCH_REPORT_PARQUET_EXPORT_DIR is not set")
+
+    start_time = time.perf_counter()
+    export_results_to_parquet(GEEKBENCH_REPORT_PARQUET_EXPORT_DIR)
+    print(f"Finished in {time.perf_counter() - start_time:.1f} s")
@@ -0,0 +1,28 @@
+"""
+One-off migration of existing tables to the compact typed schema.
+
+- `cpu_model_results.frequency` text -> `frequency_mhz` int4
+- `cpu_model_results.platform` text -> `platform_id` int2, from the new `platform_names`
+- `cpu_model_benchmarks.frequency` text -> `frequency_mhz` int4
+- `cpu_model_details` views and scores -> int4
+
+Columns are added, filled and dropped in place, so the indexes, constraints and
+grants of the tables are kept.
+See `utils/geekbench_report/sql/migrate_compact_schema.py` for the SQL.
+
+Run locally before deploying the loaders writing the compact columns:
+```bash
+GEEKBENCH_REPORT_POSTGRESDB_HOST="..." \
+GEEKBENCH_REPORT_POSTGRESDB_DATABASE="geekbench_report" \
+GEEKBENCH_REPORT_POSTGRESDB_PORT="..." \
+GEEKBENCH_REPORT_POSTGRESDB_USER="..." \
+GEEKBENCH_REPORT_POSTGRESDB_PASSWORD="..." \
+PYTHONPATH=src \
+python src/app/geekbench_report/migrate_compact_schema_in_pg.py
+```
+"""
+
+from utils.geekbench_report.database_helper import migrate_to_compact_schema
+
+if __name__ == "__main__":
+    migrate_to_compact_schema()
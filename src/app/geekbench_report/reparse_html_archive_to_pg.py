@@ -0,0 +1,143 @@
+"""
+Rebuild CPU model results and details in PostgreSQL from the raw HTML archive.
+
+Used to backfill after a parser in `utils/geekbench_report/core` changes, without
+crawling Geekbench again. Archive segments are parsed by a process pool, and each
+segment's rows replace the stored rows of the same `cpu_result_id`
+(`cpu_model_results`, `cpu_model_details` and `cpu_model_detail_workload_scores`)
+in one transaction, so a failed load keeps the stored rows.
+Segments are loaded in writing order, so the latest fetch of a page wins.
+
+The archive is written by the sync scripts when `GEEKBENCH_REPORT_HTML_ARCHIVE_DIR` is set
+(see `utils/geekbench_report/html_archive.py`).
+
+Run locally:
+```bash
+GEEKBENCH_REPORT_POSTGRESDB_HOST="..." \
+GEEKBENCH_REPORT_POSTGRESDB_DATABASE="geekbench_report" \
+GEEKBENCH_REPORT_POSTGRESDB_PORT="..." \
+GEEKBENCH_REPORT_POSTGRESDB_USER="..." \
+GEEKBENCH_REPORT_POSTGRESDB_PASSWORD="..." \
+GEEKBENCH_REPORT_HTML_ARCHIVE_DIR="/data/geekbench_report/html_archive" \
+PYTHONPATH=src \
+python src/app/geekbench_report/reparse_html_archive_to_pg.py
+```
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from functools import partial
+from typing import Literal
+
+import pandas as pd
+
+from app.geekbench_report.sync_cpu_model_detail_to_pg import get_detail_df, get_workload_score_df
+from utils.geekbench_report.core.geekbench_processor_detail_scraper import (
+    GeekbenchProcessorDetailScraper,
+)
+from utils.geekbench_report.core.geekbench_processor_result_scraper import (
+    GeekbenchProcessorResultScraper,
+)
+from utils.geekbench_report.database_helper import (
+    get_cpu_model_id_map_of_result_ids,
+    replace_rows_of_cpu_result_ids,
+)
+from utils.geekbench_report.dtypes import SCRAPED_RESULT_DTYPES, apply_dtypes
+from utils.geekbench_report.html_archive import GEEKBENCH_REPORT_HTML_ARCHIVE_DIR, HtmlArchive
+from utils.geekbench_report.transform import get_dimension_maps, t_compact_result_df
+
+
+def parse_segment(
+    segment_path: str,
+    kind: Literal["search", "detail"] | None = None,
+) -> tuple[pd.DataFrame, list[dict]]:
+    """
+    Parse all pages of an archive segment, run in a worker process.
+
+    Returns the result rows and the detail dicts (before `dumps_columns()`),
+    each deduplicated by `cpu_result_id` keeping the latest fetch.
+    """
+    segment_df = HtmlArchive.read_segment(segment_path, kind=kind).sort_values(
+        "fetched_at", kind="stable"
+    )
+    result_scraper = GeekbenchProcessorResultScraper("")
+
+    result_list = []
+    detail_dict_map = {}
+    for url, fetched_at, page_kind, html in segment_df[
+        ["url", "fetched_at", "kind", "html"]
+    ].itertuples(index=False):
+        try:
+            if page_kind == "search":
+                result_list.extend(result_scraper.parse_page(html))
+            elif page_kind == "detail":
+                cpu_result_id = int(url.rsplit("/", 1)[-1])
+                detail_dict_map[cpu_result_id] = asdict(
+                    GeekbenchProcessorDetailScraper(cpu_result_id).parse_detail_page(html)
+                )
+        except Exception as e:
+            print(f"Failed to parse {url} fetched at {fetched_at}: {e}")
+
+    result_df = apply_dtypes(
+        pd.DataFrame([vars(result) for result in result_list]),
+        SCRAPED_RESULT_DTYPES,
+    )
+    if len(result_df) > 0:
+        result_df = result_df.dropna(subset=["cpu_result_id"]).drop_duplicates(
+            "cpu_result_id", keep="last"
+        )
+
+    return result_df, list(detail_dict_map.values())
+
+
+def reparse_html_archive_to_pg(
+    archive_dir: str | None = GEEKBENCH_REPORT_HTML_ARCHIVE_DIR,
+    kind: Literal["search", "detail"] | None = None,
+    max_workers: int | None = None,
+) -> None:
+    """
+    :param kind: Only rebuild results ("search") or details ("detail"), default both.
+    :param max_workers: Worker processes, default the number of CPUs.
+    """
+    if archive_dir is None:
+        raise ValueError("GEEKBENCH_REPORT_HTML_ARCHIVE_DIR is not set")
+
+    segment_path_list = [
+        str(segment_path) for segment_path in HtmlArchive(archive_dir).get_segment_path_list(kind)
+    ]
+    print(f"{len(segment_path_list)} archive segments to reparse")
+
+    dimension_maps = get_dimension_maps()
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for segment_path, (result_df, detail_dict_list) in zip(
+            segment_path_list,
+            executor.map(partial(parse_segment, kind=kind), segment_path_list),
+        ):
+            print(f"{segment_path}: {len(result_df)} results, {len(detail_dict_list)} details")
+
+            if len(result_df) > 0:
+                result_df = t_compact_result_df(result_df, dimension_maps)
+                replace_rows_of_cpu_result_ids(
+                    result_df["cpu_result_id"].to_list(),
+                    {"cpu_model_results": result_df},
+                )
+
+            if detail_dict_list:
+                cpu_result_id_list = [
+                    detail_dict["cpu_result_id"] for detail_dict in detail_dict_list
+                ]
+                cpu_model_id_map = get_cpu_model_id_map_of_result_ids(cpu_result_id_list)
+                for detail_dict in detail_dict_list:
+                    detail_dict["cpu_model_id"] = cpu_model_id_map.get(detail_dict["cpu_result_id"])
+                replace_rows_of_cpu_result_ids(
+                    cpu_result_id_list,
+                    {
+                        "cpu_model_details": get_detail_df(detail_dict_list),
+                        "cpu_model_detail_workload_scores": get_workload_score_df(detail_dict_list),
+                    },
+                )
+
+
+if __name__ == "__main__":
+    reparse_html_archive_to_pg()
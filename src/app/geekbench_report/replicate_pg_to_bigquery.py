@@ -0,0 +1,85 @@
+"""
+Replicate new rows of the geekbench tables from PostgreSQL to BigQuery.
+
+Incremental: only rows after the watermarks of the last run are streamed (through a
+server-side cursor) and appended. See `utils/geekbench_report/bigquery_replication.py`.
+
+Run in n8n container:
+```bash
+WORK_DIR="/tmp/test_git_clone"
+REPO_URL="https://github.com/uuboyscy/my_automation.git"
+REPO_NAME="my_automation"
+PROJECT_DIR="$WORK_DIR/$REPO_NAME"
+PYTHONPATH_SRC="$PROJECT_DIR/src"
+REQUIREMENTS="$PROJECT_DIR/requirements.txt"
+SCRIPT_PATH="$PYTHONPATH_SRC/app/geekbench_report/replicate_pg_to_bigquery.py"
+
+# === Clone or update Git repo ===
+mkdir -p "$WORK_DIR"
+cd "$WORK_DIR"
+
+if [ -d "$PROJECT_DIR/.git" ]; then
+  echo "[INFO] Repository already exists. Pulling latest changes..."
+  cd "$PROJECT_DIR" && git pull
+else
+  echo "[INFO] Cloning repository..."
+  git clone "$REPO_URL"
+fi
+
+# === Install Python packages ===
+echo "[INFO] Installing Python dependencies..."
+pip install --quiet --upgrade -r "$REQUIREMENTS" --break-system-packages
+
+# === Set environment variables and execute Python script ===
+echo "[INFO] Running replicate_pg_to_bigquery.py..."
+GEEKBENCH_REPORT_POSTGRESDB_SCHEMA="$DB_POSTGRESDB_SCHEMA" \
+GEEKBENCH_REPORT_POSTGRESDB_HOST="$DB_POSTGRESDB_HOST" \
+GEEKBENCH_REPORT_POSTGRESDB_DATABASE="geekbench_report" \
+GEEKBENCH_REPORT_POSTGRESDB_PORT="$DB_POSTGRESDB_PORT" \
+GEEKBENCH_REPORT_POSTGRESDB_USER="$DB_POSTGRESDB_USER" \
+GEEKBENCH_REPORT_POSTGRESDB_PASSWORD="$DB_POSTGRESDB_PASSWORD" \
+GEEKBENCH_REPORT_BIGQUERY_DATASET="geekbench_report" \
+PYTHONPATH="$PYTHONPATH_SRC" \
+python "$SCRIPT_PATH"
+```
+
+SQL for creating table `bigquery_replication_watermarks`
+```
+CREATE TABLE "public"."bigquery_replication_watermarks" (
+    "table_name" text,
+    "watermark_key" int4,  -- cpu_model_id (-1 for null) of `cpu_model_results`, 0 otherwise
+    "last_id" int8,
+    "updated_at" timestamp,
+    PRIMARY KEY ("table_name", "watermark_key")
+);
+```
+
+SQL for the index read by the replication of `cpu_model_results`
+```
+CREATE INDEX cpu_model_results_cpu_model_id_cpu_result_id_idx
+    ON cpu_model_results (cpu_model_id, cpu_result_id);
+```
+
+SQL for adding the watermark column of `cpu_model_details`
+(existing rows are numbered, new rows get the next id)
+```
+ALTER TABLE cpu_model_details
+    ADD COLUMN detail_id int8 GENERATED ALWAYS AS IDENTITY PRIMARY KEY;
+```
+"""
+
+import time
+
+from utils.common.bigquery_utility import get_bigquery_client
+from utils.geekbench_report.bigquery_replication import (
+    GEEKBENCH_REPORT_BIGQUERY_DATASET,
+    replicate_pg_to_bigquery,
+)
+
+if __name__ == "__main__":
+    if GEEKBENCH_REPORT_BIGQUERY_DATASET is None:
+        raise ValueError("GEEKBENCH_REPORT_BIGQUERY_DATASET is not set")
+
+    start_time = time.perf_counter()
+    row_count = replicate_pg_to_bigquery(get_bigquery_client(), GEEKBENCH_REPORT_BIGQUERY_DATASET)
+    print(f"Replicated {row_count} rows in {time.perf_counter() - start_time:.1f} s")
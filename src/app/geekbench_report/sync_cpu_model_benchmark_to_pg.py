@@ -11,12 +11,29 @@ Target:
             -- Table Definition
             CREATE TABLE "public"."cpu_model_benchmarks" (
                 "cpu_model" text,
-                "frequency" text,
+                "frequency_mhz" int4,
                 "cores" int8,
                 "single_core_score" int8,
-                "multi_core_score" int8
+                "multi_core_score" int8,
+                "cpu_model_id" int4  -- Resolved from `cpu_model_names` at load time
             );
+            CREATE UNIQUE INDEX cpu_model_benchmarks_cpu_model_key
+                ON cpu_model_benchmarks (cpu_model);
+            CREATE INDEX cpu_model_benchmarks_cpu_model_id_idx
+                ON cpu_model_benchmarks (cpu_model_id);
             ```
+            Migration from the table previously replaced on every run:
+            ```sql
+            ALTER TABLE cpu_model_benchmarks ADD COLUMN cpu_model_id int4;
+            UPDATE cpu_model_benchmarks b SET cpu_model_id = n.cpu_model_id
+            FROM cpu_model_names n WHERE n.cpu_model = b.cpu_model;
+            -- then create the indexes above
+            ```
+            `frequency` text is converted to `frequency_mhz` by `migrate_compact_schema_in_pg.py`.
+
+The snapshot is compared with the stored table by row content hashes.
+Unchanged snapshots are skipped; otherwise only changed rows are upserted and
+vanished rows deleted, in one transaction, so the table never disappears for readers.
 
 Run in n8n container:
 Not scheduled yet.
@@ -27,20 +44,73 @@ from dataclasses import asdict
 
 import pandas as pd
 
+from utils.common.rate_limiter import get_rate_limiter_metrics
 from utils.geekbench_report.core.geekbench_processor_benchmark_scraper import scrape_page
-from utils.geekbench_report.database_helper import load_df_to_pg
+from utils.geekbench_report.database_helper import (
+    get_cpu_model_benchmarks_df,
+    get_cpu_model_map_from_pg,
+    update_cpu_model_names,
+    upsert_cpu_model_benchmarks,
+)
+from utils.geekbench_report.transform import t_parse_frequency_mhz
+
+BENCHMARK_COLUMNS = [
+    "cpu_model",
+    "cpu_model_id",
+    "frequency_mhz",
+    "cores",
+    "single_core_score",
+    "multi_core_score",
+]
+
+
+def t_normalize_benchmark_df(df: pd.DataFrame) -> pd.DataFrame:
+    """Align dtypes of scraped and stored rows, so equal rows get equal hashes."""
+    return pd.DataFrame(
+        {
+            "cpu_model": df["cpu_model"].astype("string"),
+            "cpu_model_id": df["cpu_model_id"].astype("Int64"),
+            "frequency_mhz": df["frequency_mhz"].astype("Int64"),
+            "cores": df["cores"].astype("Int64"),
+            "single_core_score": df["single_core_score"].astype("Int64"),
+            "multi_core_score": df["multi_core_score"].astype("Int64"),
+        }
+    ).reset_index(drop=True)
+
+
+def get_row_hash(df: pd.DataFrame) -> pd.Series:
+    return pd.util.hash_pandas_object(df[BENCHMARK_COLUMNS], index=False)
 
 
 def sync_cpu_model_benchmarks_to_pg() -> None:
     """Sync CPU model benchmark data to PostgreSQL database."""
     benchmark_list = scrape_page()
     df = pd.DataFrame([asdict(b) for b in benchmark_list])
-    load_df_to_pg(
-        df,
-        table_name="cpu_model_benchmarks",
-        if_exists="replace",
-    )  # or "append" if you want to keep old data
+
+    # cpu_model -> cpu_model_id, registering CPU models seen for the first time
+    cpu_model_map = get_cpu_model_map_from_pg()
+    if df[~(df["cpu_model"].isin(cpu_model_map))].shape[0] > 0:
+        update_cpu_model_names(df["cpu_model"].to_list())
+        cpu_model_map = get_cpu_model_map_from_pg()
+    df["cpu_model_id"] = df["cpu_model"].map(cpu_model_map)
+    df["frequency_mhz"] = t_parse_frequency_mhz(df["frequency"])
+
+    df = t_normalize_benchmark_df(df)
+    stored_df = t_normalize_benchmark_df(get_cpu_model_benchmarks_df())
+
+    row_hash = get_row_hash(df)
+    stored_row_hash = get_row_hash(stored_df)
+    if set(row_hash) == set(stored_row_hash):
+        print("cpu_model_benchmarks unchanged, skipped")
+        return
+
+    upsert_df = df[~row_hash.isin(set(stored_row_hash))]
+    deleted_cpu_model_list = list(
+        set(stored_df["cpu_model"].dropna()) - set(df["cpu_model"].dropna())
+    )
+    upsert_cpu_model_benchmarks(upsert_df, deleted_cpu_model_list)
 
 
 if __name__ == "__main__":
     sync_cpu_model_benchmarks_to_pg()
+    print(get_rate_limiter_metrics())
@@ -57,6 +57,33 @@ CREATE TABLE "public"."cpu_model_details" (
     "multi_core_benchmarks" jsonb
 )
 ```
+
+SQL for creating table `cpu_model_detail_workload_scores`
+(one row per workload of `single_core_benchmarks` and `multi_core_benchmarks`)
+```
+CREATE TABLE "public"."cpu_model_detail_workload_scores" (
+    "cpu_result_id" int4,
+    "cpu_model_id" int4,
+    "mode" text,  -- 'single_core' or 'multi_core'
+    "workload" text,
+    "score" int4
+);
+CREATE INDEX cpu_model_detail_workload_scores_workload_idx
+    ON cpu_model_detail_workload_scores (workload, mode, cpu_model_id);
+```
+
+SQL for backfilling `cpu_model_detail_workload_scores` from existing `cpu_model_details`
+```
+INSERT INTO cpu_model_detail_workload_scores
+SELECT d.cpu_result_id, d.cpu_model_id, b.mode, b.workload,
+    NULLIF(regexp_replace(b.value->>'score', '[^0-9]', '', 'g'), '')::int4
+FROM cpu_model_details d
+CROSS JOIN LATERAL (
+    SELECT 'single_core', key, value FROM jsonb_each(d.single_core_benchmarks)
+    UNION ALL
+    SELECT 'multi_core', key, value FROM jsonb_each(d.multi_core_benchmarks)
+) AS b(mode, workload, value);
+```
 """
 
 import json
@@ -64,13 +91,24 @@ from dataclasses import asdict
 
 import pandas as pd
 
+from utils.common.rate_limiter import get_rate_limiter_metrics
 from utils.geekbench_report.core.geekbench_processor_detail_scraper import (
-    GeekbenchProcessorDetailScraper,
+    scrape_detail_pages_concurrently,
 )
 from utils.geekbench_report.database_helper import (
-    get_cpu_model_id_and_result_id_for_scraping_details_df,
-    load_df_to_pg,
+    get_new_cpu_model_result_ids_df,
+    get_stored_detail_result_ids_df,
+    replace_rows_of_cpu_result_ids,
 )
+from utils.geekbench_report.detail_sampler import (
+    DEFAULT_FETCH_BUDGET,
+    read_detail_reservoirs,
+    select_cpu_result_ids_to_fetch,
+    update_detail_reservoirs,
+    write_detail_reservoirs,
+)
+from utils.geekbench_report.dtypes import DETAIL_DTYPES, WORKLOAD_SCORE_DTYPES, apply_dtypes
+from utils.geekbench_report.transform import t_parse_int
 
 
 def dumps_columns(geekbench_processor_detail_dict: dict) -> dict:
@@ -91,36 +129,142 @@ def dumps_columns(geekbench_processor_detail_dict: dict) -> dict:
     return geekbench_processor_detail_dict
 
 
-def sync_cpu_model_detail_to_pg() -> None:
-    cpu_model_result_id_df = get_cpu_model_id_and_result_id_for_scraping_details_df()
-    # print(cpu_model_result_id_df)
+def get_workload_score_df(
+    geekbench_processor_detail_with_model_id_list: list[dict],
+) -> pd.DataFrame:
+    """
+    Flatten single/multi-core benchmarks into rows of
+    (cpu_result_id, cpu_model_id, mode, workload, score).
+    Expects the detail dicts before `dumps_columns()`.
+    """
+    rows = [
+        (
+            detail_dict["cpu_result_id"],
+            detail_dict["cpu_model_id"],
+            mode,
+            workload,
+            benchmark["score"],
+        )
+        for detail_dict in geekbench_processor_detail_with_model_id_list
+        for mode, field in [
+            ("single_core", "single_core_benchmarks"),
+            ("multi_core", "multi_core_benchmarks"),
+        ]
+        for workload, benchmark in detail_dict[field].items()
+    ]
+    df = pd.DataFrame(
+        rows,
+        columns=["cpu_result_id", "cpu_model_id", "mode", "workload", "score"],
+    )
+    df["score"] = t_parse_int(df["score"])
+    return apply_dtypes(df, WORKLOAD_SCORE_DTYPES)
+
+
+def get_detail_df(geekbench_processor_detail_with_model_id_list: list[dict]) -> pd.DataFrame:
+    """Rows of `cpu_model_details`, from the detail dicts before `dumps_columns()`."""
+    detail_df = pd.DataFrame(
+        [
+            dumps_columns(dict(detail_dict))
+            for detail_dict in geekbench_processor_detail_with_model_id_list
+        ]
+    )
+    for column in ["views", "single_core_score", "multi_core_score"]:
+        detail_df[column] = t_parse_int(detail_df[column])
+    return apply_dtypes(detail_df, DETAIL_DTYPES)
+
+
+def load_details_to_pg(geekbench_processor_detail_with_model_id_list: list[dict]) -> None:
+    """
+    Load details to `cpu_model_details` and their workload scores to the long table
+    in one transaction, so a detail is only stored (and no longer pending) with its scores.
+    """
+    replace_rows_of_cpu_result_ids(
+        [
+            detail_dict["cpu_result_id"]
+            for detail_dict in geekbench_processor_detail_with_model_id_list
+        ],
+        {
+            "cpu_model_details": get_detail_df(geekbench_processor_detail_with_model_id_list),
+            "cpu_model_detail_workload_scores": get_workload_score_df(
+                geekbench_processor_detail_with_model_id_list
+            ),
+        },
+    )
+
+
+def get_sampled_cpu_model_result_id_df(fetch_budget: int | None) -> pd.DataFrame:
+    """Update the detail reservoirs with new results, then pick sampled IDs to fetch."""
+    reservoir_map = read_detail_reservoirs()
+    new_result_id_df = get_new_cpu_model_result_ids_df(
+        {
+            cpu_model_id: reservoir.last_cpu_result_id
+            for cpu_model_id, reservoir in reservoir_map.items()
+        }
+    )
+    print(f"{len(new_result_id_df)} new results streamed into detail reservoirs")
+    update_detail_reservoirs(reservoir_map, new_result_id_df)
+    write_detail_reservoirs(reservoir_map)
+
+    return select_cpu_result_ids_to_fetch(
+        reservoir_map,
+        get_stored_detail_result_ids_df(),
+        fetch_budget=fetch_budget,
+    )
+
+
+def sync_cpu_model_detail_to_pg(
+    max_workers: int = 8,
+    batch_size: int = 100,
+    fetch_budget: int | None = DEFAULT_FETCH_BUDGET,
+) -> None:
+    """
+    Scrape sampled detail pages concurrently and load them to PostgreSQL in batches.
+
+    A failed page is retried, then skipped; it stays pending and is picked up by the next run.
+    """
+    cpu_model_result_id_df = get_sampled_cpu_model_result_id_df(fetch_budget)
     print(len(cpu_model_result_id_df))
     print("=====")
 
+    cpu_model_id_map = dict(
+        zip(cpu_model_result_id_df["cpu_result_id"], cpu_model_result_id_df["cpu_model_id"])
+    )
+
     geekbench_processor_detail_with_model_id_list = []
-    for idx, row in cpu_model_result_id_df.iterrows():
-        cpu_result_id = row["cpu_result_id"]
-        cpu_model_id = row["cpu_model_id"]
+    failed_cpu_result_id_list = []
+    for idx, (cpu_result_id, result, error) in enumerate(
+        scrape_detail_pages_concurrently(
+            cpu_model_id_map.keys(),
+            max_workers=max_workers,
+        )
+    ):
+        cpu_model_id = cpu_model_id_map[cpu_result_id]
+        if error is not None:
+            print(f"Failed to scrape {cpu_model_id}, {cpu_result_id}: {error}")
+            failed_cpu_result_id_list.append(cpu_result_id)
+            continue
+
         print(cpu_model_id, cpu_result_id, idx)
-        scraper = GeekbenchProcessorDetailScraper(cpu_result_id)
-        result = scraper.scrape_detail_page()
         geekbench_processor_detail_dict = asdict(result)
-
-        geekbench_processor_detail_dict = dumps_columns(geekbench_processor_detail_dict)
-
         geekbench_processor_detail_dict["cpu_model_id"] = cpu_model_id
 
         geekbench_processor_detail_with_model_id_list.append(
             geekbench_processor_detail_dict,
         )
 
+        # Flush
+        if len(geekbench_processor_detail_with_model_id_list) >= batch_size:
+            load_details_to_pg(geekbench_processor_detail_with_model_id_list)
+            geekbench_processor_detail_with_model_id_list = []
+
+    # Final flush
     if len(geekbench_processor_detail_with_model_id_list) > 0:
-        load_df_to_pg(
-            df=pd.DataFrame(geekbench_processor_detail_with_model_id_list),
-            table_name="cpu_model_details",
-            if_exists="append",
-        )
+        load_details_to_pg(geekbench_processor_detail_with_model_id_list)
+
+    if failed_cpu_result_id_list:
+        print(f"{len(failed_cpu_result_id_list)} detail pages failed: {failed_cpu_result_id_list}")
 
 
 if __name__ == "__main__":
     sync_cpu_model_detail_to_pg()
+    print(get_rate_limiter_metrics())
@@ -48,18 +48,79 @@ CREATE TABLE cpu_model_names (
 ```
 """
 
+import json
+import os
+from datetime import datetime, timedelta
+
+from utils.common.rate_limiter import get_rate_limiter_metrics
 from utils.geekbench_report.core.geekbench_processor_name_scraper import (
     GeekbenchProcessorNameScraper,
 )
 from utils.geekbench_report.database_helper import update_cpu_model_names
 
+NAME_SYNC_STATE_FILE_PATH = "/tmp/sync_cpu_model_name_state.json"
+
+# The benchmarks page changes rarely, so incremental runs refresh it at most this often
+BENCHMARKS_REFRESH_INTERVAL = timedelta(days=1)
+
+
+def read_name_sync_state() -> dict:
+    """
+    Read the state of the last run from the local file. If the file does not exist, return {}.
+    Keys: `newest_cpu_result_id` and `benchmarks_scraped_at`.
+    """
+    if not os.path.exists(NAME_SYNC_STATE_FILE_PATH):
+        return {}
+    with open(NAME_SYNC_STATE_FILE_PATH, "r") as f:
+        try:
+            return json.load(f)
+        except Exception:
+            return {}
+
+
+def write_name_sync_state(state: dict) -> None:
+    with open(NAME_SYNC_STATE_FILE_PATH, "w") as f:
+        json.dump(state, f)
 
-def sync_cpu_model_names_to_pg() -> None:
-    """Sync CPU model names to PostgreSQL database."""
+
+def sync_cpu_model_names_to_pg(incremental: bool = True) -> None:
+    """
+    Sync CPU model names to PostgreSQL database.
+
+    With `incremental`, the latest results pages are scraped only until the newest result
+    of the last run, and the benchmarks page only once per `BENCHMARKS_REFRESH_INTERVAL`.
+    """
     scraper = GeekbenchProcessorNameScraper()
-    all_cpu_model_list = scraper.scrape_all_cpu_models()
+    if not incremental:
+        all_cpu_model_list = scraper.scrape_all_cpu_models()
+        update_cpu_model_names(all_cpu_model_list)
+        return
+
+    state = read_name_sync_state()
+    all_cpu_model_list, newest_cpu_result_id = scraper.scrape_latest_results_until_result_id(
+        state.get("newest_cpu_result_id"),
+    )
+
+    now = datetime.now()
+    benchmarks_scraped_at = state.get("benchmarks_scraped_at")
+    if (
+        benchmarks_scraped_at is None
+        or now - datetime.fromisoformat(benchmarks_scraped_at) >= BENCHMARKS_REFRESH_INTERVAL
+    ):
+        all_cpu_model_list = list(set(all_cpu_model_list + scraper.scrape_benchmarks_page()))
+        benchmarks_scraped_at = now.isoformat()
+
     update_cpu_model_names(all_cpu_model_list)
 
+    # Written after the names are stored, so a failed run scrapes the same pages again
+    write_name_sync_state(
+        {
+            "newest_cpu_result_id": newest_cpu_result_id,
+            "benchmarks_scraped_at": benchmarks_scraped_at,
+        }
+    )
+
 
 if __name__ == "__main__":
     sync_cpu_model_names_to_pg()
+    print(get_rate_limiter_metrics())
@@ -39,145 +39,155 @@ PYTHONPATH="$PYTHONPATH_SRC" \
 python "$SCRIPT_PATH"
 ```
 
-SQL for creating table `cpu_model_names`
+SQL for creating table `cpu_model_results`
 ```
 -- Table Definition
 CREATE TABLE "public"."cpu_model_results" (
     "cpu_result_id" int4,
-    "frequency" text,
+    "frequency_mhz" int4,
     "cores" int2,
     "uploaded" timestamp,
-    "platform" text,
+    "platform_id" int2,  -- From `geekbench_report.platform_names`
     "single_core_score" int4,
     "multi_core_score" int4,
     "cpu_model_id" int4,
     "system_id" int4
 );
 ```
+
+SQL for creating table `platform_names`
+```
+CREATE TABLE "public"."platform_names" (
+    "platform_id" int2 GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    "platform" text UNIQUE
+);
+```
+
+Existing tables are migrated with `migrate_compact_schema_in_pg.py`.
 """
 
-import os
+from datetime import datetime
 
 import pandas as pd
 
+from utils.common.rate_limiter import get_rate_limiter_metrics
 from utils.geekbench_report.core.geekbench_processor_result_scraper import (
     GeekbenchProcessorResultScraper,
 )
+from utils.geekbench_report.crawl_scheduler import (
+    RATE_WINDOW_DAYS,
+    plan_cpu_model_crawl,
+    read_crawl_state,
+    write_crawl_state,
+)
 from utils.geekbench_report.database_helper import (
     delete_duplicated_cpu_model_result_from_pg,
-    get_cpu_model_map_from_pg,
-    get_last_updated_dates_of_cpu_model_df,
-    get_system_map_from_pg,
+    get_cpu_model_upload_stats_df,
     load_df_to_pg,
-    update_cpu_model_names,
-    update_system_names,
 )
+from utils.geekbench_report.query_coverage_planner import (
+    plan_cpu_model_queries,
+    read_query_coverage,
+    record_query_coverage,
+    write_query_coverage,
+)
+from utils.geekbench_report.transform import get_dimension_maps, t_compact_result_df
 
-OFFSET_FILE_PATH = "/tmp/sync_cpu_model_result_offset.txt"
+FLUSH_EVERY_N_CPU_MODELS = 250
 
 
-def write_offset(offset_idx: int) -> None:
+def flush_cpu_model_results(
+    df_list: list[pd.DataFrame],
+    crawled_cpu_model_list: list[str],
+    crawl_state: dict[str, datetime],
+    crawled_at: datetime,
+    query_coverage: dict[str, set[str]],
+) -> None:
     """
-    Write the current offset index to a local file.
-    """
-    with open(OFFSET_FILE_PATH, "w") as f:
-        f.write(str(offset_idx))
-
+    Load scraped results to PostgreSQL, then mark the CPU models as crawled.
 
-def get_offset() -> int:
-    """
-    Read the offset index from the local file. If the file does not exist, return 0.
+    The crawl state is written only after the load, so an interrupted run
+    crawls the unloaded CPU models again in the next run.
     """
-    if not os.path.exists(OFFSET_FILE_PATH):
-        return 0
-    with open(OFFSET_FILE_PATH, "r") as f:
-        try:
-            return int(f.read().strip())
-        except Exception:
-            return 0
-
+    if df_list:
+        load_df_to_pg(
+            df=pd.concat(df_list, ignore_index=True).drop_duplicates(),
+            table_name="cpu_model_results",
+            if_exists="append",
+        )
+        delete_duplicated_cpu_model_result_from_pg()
 
-def delete_offset_file() -> None:
-    """
-    Delete the offset file if it exists.
-    """
-    if os.path.exists(OFFSET_FILE_PATH):
-        os.remove(OFFSET_FILE_PATH)
+    for cpu_model in crawled_cpu_model_list:
+        crawl_state[cpu_model] = crawled_at
+    write_crawl_state(crawl_state)
+    write_query_coverage(query_coverage)
 
 
-def sync_cpu_model_result_to_pg() -> None:
+def sync_cpu_model_result_to_pg(request_budget: int | None = None) -> None:
+    """
+    Sync results of the CPU models scheduled by the crawl scheduler.
 
-    offset_idx = get_offset()
+    :param request_budget: Optional number of requests this run may send to Geekbench.
+    """
+    crawled_at = datetime.now()
+    crawl_state = read_crawl_state()
+    query_coverage = read_query_coverage()
+
+    upload_stats_df = get_cpu_model_upload_stats_df(rate_window_days=RATE_WINDOW_DAYS)
+    crawl_plan_list = plan_cpu_model_crawl(
+        upload_stats_df,
+        crawl_state,
+        now=crawled_at,
+        request_budget=request_budget,
+    )
+    print(
+        f"{len(crawl_plan_list)} of {len(upload_stats_df)} CPU models scheduled, "
+        f"about {sum(plan.estimated_requests for plan in crawl_plan_list)} requests."
+    )
+    cpu_model_query_list = plan_cpu_model_queries(crawl_plan_list, query_coverage)
+    print(
+        f"{len(crawl_plan_list) - len(cpu_model_query_list)} CPU models skipped, "
+        "covered by broader queries."
+    )
 
-    last_updated_dates_of_cpu_model_df = get_last_updated_dates_of_cpu_model_df()
-    system_map = get_system_map_from_pg()
-    cpu_model_map = get_cpu_model_map_from_pg()
+    dimension_maps = get_dimension_maps()
 
     all_df_list = []
-    for idx, row in last_updated_dates_of_cpu_model_df.loc[offset_idx:].iterrows():
-        cpu_model_name = row["cpu_model"]
-        last_updated_date = row["last_uploaded"]
+    crawled_cpu_model_list = []
+    for idx, cpu_model_query in enumerate(cpu_model_query_list):
+        cpu_model_name = cpu_model_query.query
+        last_updated_date = cpu_model_query.offset_date
 
         # print(f"[{idx}] Processing {cpu_model_name}, from {last_updated_date}")
         with open("/tmp/sync_cpu_model_result_to_pg.log", "w") as f:
             f.write(f"[{idx}] Processing {cpu_model_name}, from {last_updated_date}")
 
-        # start_time = time.time()
-
         scraper = GeekbenchProcessorResultScraper(
             cpu_model_name,
             offset_date=last_updated_date,
         )
-        # total_pages = scraper.get_total_pages()
-
-        # print(f"Total pages available: {total_pages}")
 
         df = scraper.scrape_multiple_pages_until_offset_date()
-        if len(df) == 0:
-            continue
-
-        # update system_names and cpu_model_names if new one detected
-        if df[~(df["system"].isin(system_map))].shape[0] > 0:
-            update_system_names(df["system"].to_list())
-            system_map = get_system_map_from_pg()
-        if df[~(df["cpu_model"].isin(cpu_model_map))].shape[0] > 0:
-            update_cpu_model_names(df["cpu_model"].to_list())
-            cpu_model_map = get_cpu_model_map_from_pg()
-
-        # system -> system_id , cpu_model -> cpu_model_id
-        df["system_id"] = df["system"].map(system_map)
-        df["cpu_model_id"] = df["cpu_model"].map(cpu_model_map)
+        crawled_cpu_model_list.extend(cpu_model_query.covered_cpu_model_list)
+        if len(df) > 0:
+            record_query_coverage(query_coverage, cpu_model_name, df["cpu_model"].dropna().unique())
 
-        df_required_columns = df.drop(["system", "cpu_model"], axis=1)
-        # print(df_required_columns)
-
-        all_df_list.append(df_required_columns)
-
-        # print(f"Total results found: {len(df_required_columns)}")
-        # print(f"{time.time() - start_time} seconds took.")
-        # print("==========")
+            all_df_list.append(t_compact_result_df(df, dimension_maps))
 
         # Flush
-        if (idx + 1) % 250 == 0:
-            load_df_to_pg(
-                df=pd.concat(all_df_list).drop_duplicates(),
-                table_name="cpu_model_results",
-                if_exists="append",
+        if (idx + 1) % FLUSH_EVERY_N_CPU_MODELS == 0:
+            flush_cpu_model_results(
+                all_df_list, crawled_cpu_model_list, crawl_state, crawled_at, query_coverage
             )
-            delete_duplicated_cpu_model_result_from_pg()
             all_df_list = []
-            write_offset(idx)
+            crawled_cpu_model_list = []
 
     # Final flush
-    load_df_to_pg(
-        df=pd.concat(all_df_list).drop_duplicates(),
-        table_name="cpu_model_results",
-        if_exists="append",
+    flush_cpu_model_results(
+        all_df_list, crawled_cpu_model_list, crawl_state, crawled_at, query_coverage
     )
-    delete_duplicated_cpu_model_result_from_pg()
-
-    delete_offset_file()
 
 
 if __name__ == "__main__":
     sync_cpu_model_result_to_pg()
+    print(get_rate_limiter_metrics())
@@ -44,7 +44,7 @@ from datetime import datetime, timedelta, timezone
 
 import pandas as pd
 
-from utils.common.googlesheets_utility import load_dataframe_to_google_sheets_worksheet
+from utils.common.googlesheets_utility import WorksheetTarget, publish_dataframes_to_google_sheets
 from utils.geekbench_report.database_helper import get_score_report_from_df
 
 
@@ -54,7 +54,8 @@ def get_update_time_df() -> pd.DataFrame:
 
 
 def t_convert_type_to_str(df: pd.DataFrame) -> pd.DataFrame:
-    return df.fillna("").astype(str)
+    # object first, so NA of nullable integer and category columns can be filled with ""
+    return df.astype(object).fillna("").astype(str)
 
 
 def sync_pg_to_googlesheets() -> None:
@@ -63,20 +64,23 @@ def sync_pg_to_googlesheets() -> None:
 
     score_report_df = t_convert_type_to_str(score_report_df)
 
-    load_dataframe_to_google_sheets_worksheet(
-        df=score_report_df,
+    # One batched write of only the changed cells for both worksheets
+    publish_dataframes_to_google_sheets(
         spreadsheet_url="https://docs.google.com/spreadsheets/d/1z9YaGs9yyJadfDJIoXaODJjOqwwMsHkJaEsLQx3J3Zo",
-        worksheet_title="Score (new)",
-        start_address=(2, 1),
-        copy_head=False,
-    )
-
-    load_dataframe_to_google_sheets_worksheet(
-        df=update_time_df,
-        spreadsheet_url="https://docs.google.com/spreadsheets/d/1z9YaGs9yyJadfDJIoXaODJjOqwwMsHkJaEsLQx3J3Zo",
-        worksheet_title="Data date (new)",
-        start_address=(2, 1),
-        copy_head=False,
+        target_list=[
+            WorksheetTarget(
+                worksheet_title="Score (new)",
+                df=score_report_df,
+                start_address=(2, 1),
+                copy_head=False,
+            ),
+            WorksheetTarget(
+                worksheet_title="Data date (new)",
+                df=update_time_df,
+                start_address=(2, 1),
+                copy_head=False,
+            ),
+        ],
     )
 
 
@@ -1,10 +1,13 @@
+import asyncio
 import json
 import os
 import re
 import smtplib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from functools import partial
 
 import requests
 from bs4 import BeautifulSoup
@@ -17,25 +20,51 @@ RECEIVER_EMAIL = os.environ.get("STOCK_NEWS_RECEIVER_EMAIL")
 EMAIL_PASSWORD = os.environ.get("STOCK_NEWS_EMAIL_PASSWORD")
 SLACK_NOTIFY_WEBHOOK = os.environ.get("STOCK_NEWS_SLACK_NOTIFY_WEBHOOK")
 
+# Timeout of a request to Yahoo, to connect and between bytes received
+REQUEST_TIMEOUT_SECONDS = 10
+# Timeout of a tinyurl request, after which the link is kept as is
+SHORTEN_URL_TIMEOUT_SECONDS = 5
+# Timeout of a source (an index or a news page with its link shortenings), after which
+# its fallback text is used
+SOURCE_TIMEOUT_SECONDS = REQUEST_TIMEOUT_SECONDS + SHORTEN_URL_TIMEOUT_SECONDS
+# Worker threads of the requests, enough for all of a run (2 indexes, 2 pages, 10 links);
+# the default executor has only `cpu_count() + 4`
+MAX_CONCURRENT_REQUESTS = 16
+
+# Not the default executor of the loop, which `asyncio.run()` waits for: a request still
+# receiving bytes after its source timed out does not hold up the run
+REQUEST_EXECUTOR = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="stock_news_request"
+)
+
+
+async def fetch(url: str, timeout: float = REQUEST_TIMEOUT_SECONDS, **kwargs) -> requests.Response:
+    """`requests.get()` in a worker thread, so that requests of all sources run at once."""
+    return await asyncio.get_running_loop().run_in_executor(
+        REQUEST_EXECUTOR, partial(requests.get, url, timeout=timeout, **kwargs)
+    )
+
 
-def shorten_url(url: str) -> str:
+async def shorten_url(url: str) -> str:
     try:
-        res = requests.get(f"http://tinyurl.com/api-create.php?url={url}")
+        res = await fetch(
+            f"http://tinyurl.com/api-create.php?url={url}", timeout=SHORTEN_URL_TIMEOUT_SECONDS
+        )
         res.raise_for_status()
-    except requests.HTTPError:
+    except requests.RequestException:
         return url
 
     return res.text
 
 
-def get_tw_stock_info() -> str:
+async def get_tw_stock_info() -> str:
     url = "https://query1.finance.yahoo.com/v8/finance/chart/%5ETWII"
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
     try:
-        response = requests.get(url, headers=headers)
+        response = await fetch(url, headers=headers)
         response.raise_for_status()
         data = response.json()
 
@@ -55,14 +84,14 @@ def get_tw_stock_info() -> str:
         return "<strong>TAIEX (Taiwan Weighted Index)</strong>: Unable to retrieve data"
 
 
-def get_us_stock_info():
+async def get_us_stock_info():
     url = "https://query1.finance.yahoo.com/v8/finance/chart/%5EGSPC"
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
     }
 
     try:
-        response = requests.get(url, headers=headers)
+        response = await fetch(url, headers=headers)
         response.raise_for_status()
         data = json.loads(response.text)
 
@@ -82,40 +111,38 @@ def get_us_stock_info():
         return "<strong>S&P 500</strong>: Unable to retrieve data"
 
 
-def get_tw_news() -> str:
+async def get_tw_news() -> str:
     url = "https://tw.stock.yahoo.com/tw-market/"
-    response = requests.get(url)
+    response = await fetch(url)
     soup = BeautifulSoup(response.text, "html.parser")
 
     # Fetch the first 5 news
     news_items = soup.find_all("div", {"class": "Py(14px)"})[:5]
 
-    news = []
-    for item in news_items:
-        title = item.find("h3").text.strip()
-        link = item.find("a")["href"]
-        short_link = shorten_url(link)
-        news.append(f"{title}\n{short_link}\n")
+    title_list = [item.find("h3").text.strip() for item in news_items]
+    link_list = [item.find("a")["href"] for item in news_items]
+    short_link_list = await asyncio.gather(*map(shorten_url, link_list))
+    news = [f"{title}\n{short_link}\n" for title, short_link in zip(title_list, short_link_list)]
 
     return "\n".join(news) if news else "Unable to fetch TW stock news"
 
 
-def get_us_news() -> str:
+async def get_us_news() -> str:
     url = "https://finance.yahoo.com/topic/stock-market-news/"
-    response = requests.get(url)
+    response = await fetch(url)
     soup = BeautifulSoup(response.text, "html.parser")
 
     # Fetch the first 5 news
     news_items = soup.find_all("div", {"class": "Py(14px)"})[:5]
 
-    news = []
-    for item in news_items:
-        title = item.find("h3").text.strip()
-        link = item.find("a")["href"]
-        if not link.startswith("http"):
-            link = "https://finance.yahoo.com" + link
-        short_link = shorten_url(link)
-        news.append(f"{title}\n{short_link}\n")
+    title_list = [item.find("h3").text.strip() for item in news_items]
+    link_list = [item.find("a")["href"] for item in news_items]
+    link_list = [
+        link if link.startswith("http") else "https://finance.yahoo.com" + link
+        for link in link_list
+    ]
+    short_link_list = await asyncio.gather(*map(shorten_url, link_list))
+    news = [f"{title}\n{short_link}\n" for title, short_link in zip(title_list, short_link_list)]
 
     return "\n".join(news) if news else "Unable to fetch US stock news"
 
@@ -164,38 +191,54 @@ def send_email(content):
         print(f"Error sending email: {e}")
 
 
+async def gather_sources() -> list[str | BaseException]:
+    """
+    Result of every source, fetched at once, or its exception (TimeoutError after
+    SOURCE_TIMEOUT_SECONDS).
+    """
+    return await asyncio.gather(
+        *[
+            asyncio.wait_for(source, SOURCE_TIMEOUT_SECONDS)
+            for source in [get_tw_stock_info(), get_us_stock_info(), get_tw_news(), get_us_news()]
+        ],
+        return_exceptions=True,
+    )
+
+
 def generate_notification_content() -> str:
+    source_list = asyncio.run(gather_sources())
+    for source in source_list:
+        # Only errors of a source fall back, not an interruption of the run
+        if isinstance(source, BaseException) and not isinstance(source, Exception):
+            raise source
+    tw_info, us_info, tw_news, us_news = source_list
     content = "<h2>Today's Stock Information and News:</h2>"
 
-    try:
-        tw_info = get_tw_stock_info()
-        content += f"<p>{tw_info}</p>"
-    except Exception as e:
-        print(f"Error fetching Taiwan stock information: {e}")
+    if isinstance(tw_info, Exception):
+        print(f"Error fetching Taiwan stock information: {tw_info!r}")
         content += "<p><strong>TAIEX Index</strong>: Information retrieval failed</p>"
+    else:
+        content += f"<p>{tw_info}</p>"
 
-    try:
-        us_info = get_us_stock_info()
-        content += f"<p>{us_info}</p>"
-    except Exception as e:
-        print(f"Error fetching US stock information: {e}")
+    if isinstance(us_info, Exception):
+        print(f"Error fetching US stock information: {us_info!r}")
         content += "<p><strong>S&P 500 Index</strong>: Information retrieval failed</p>"
+    else:
+        content += f"<p>{us_info}</p>"
 
     content += "<h3>Taiwan Stock Market Hot News:</h3>"
-    try:
-        tw_news = get_tw_news()
-        content += f"<p>{tw_news.replace('\n', '<br>')}</p>"
-    except Exception as e:
-        print(f"Error fetching Taiwan stock news: {e}")
+    if isinstance(tw_news, Exception):
+        print(f"Error fetching Taiwan stock news: {tw_news!r}")
         content += "<p>Failed to retrieve Taiwan stock news</p>"
+    else:
+        content += f"<p>{tw_news.replace('\n', '<br>')}</p>"
 
     content += "<h3>US Stock Market Hot News:</h3>"
-    try:
-        us_news = get_us_news()
-        content += f"<p>{us_news.replace('\n', '<br>')}</p>"
-    except Exception as e:
-        print(f"Error fetching US stock news: {e}")
+    if isinstance(us_news, Exception):
+        print(f"Error fetching US stock news: {us_news!r}")
         content += "<p>Failed to retrieve US stock news</p>"
+    else:
+        content += f"<p>{us_news.replace('\n', '<br>')}</p>"
 
     return content
 
@@ -1,9 +1,23 @@
 import os
 
+import pandas as pd
 import requests
-import yfinance as yf
 from dotenv import load_dotenv
 
+from utils.stock_news.price_cache import (
+    STOCK_NEWS_PRICE_CACHE_DIR,
+    read_close_prices,
+    update_price_cache,
+)
+from utils.stock_news.watchlist import (
+    STOCK_NEWS_WATCHLIST_FILE_PATH,
+    WINDOW_MONTH_MAP,
+    AlertRule,
+    get_alert_df,
+    get_watchlist_stats_df,
+    read_watchlist,
+)
+
 load_dotenv()
 
 STOCK_NEWS_SLACK_NOTIFY_WEBHOOK = os.environ["STOCK_NEWS_SLACK_NOTIFY_WEBHOOK"]
@@ -17,6 +31,18 @@ STOCK_LIST = [
     "00675L.TW",
 ]
 
+# A symbol is notified when it crosses any of them
+ALERT_RULE_LIST = [
+    # At a new 1-year high
+    AlertRule("relative_high_percentage_1yr", ">=", 0.0),
+    # 10% or more below the 3-month high
+    AlertRule("relative_high_percentage_3mo", "<=", -10.0),
+    # 5% or more below the 6-month mean
+    AlertRule("relative_mean_percentage_6mo", "<=", -5.0),
+]
+# Symbols listed in a notification at most, the others are counted
+MAX_NOTIFIED_SYMBOLS = 50
+
 
 def send_slack_notify(msg):
     slack_notify_webhook = STOCK_NEWS_SLACK_NOTIFY_WEBHOOK
@@ -30,67 +56,60 @@ def send_slack_notify(msg):
     print("Slack Notify sent.")
 
 
+def get_stock_info_df(symbol_list: list[str]) -> pd.DataFrame:
+    """
+    Stock info of every symbol, one row per symbol, from the local price cache updated
+    with the bars since the last run.
+    """
+    fetched_count_map = update_price_cache(STOCK_NEWS_PRICE_CACHE_DIR, symbol_list)
+    close_df = read_close_prices(STOCK_NEWS_PRICE_CACHE_DIR, symbol_list)
+    # A symbol whose download failed is reported as such, not with stale cached prices
+    failed_symbol_list = [symbol for symbol in symbol_list if fetched_count_map[symbol] == 0]
+    close_df[failed_symbol_list] = float("nan")
+    return get_watchlist_stats_df(close_df)
+
+
+def get_stock_info_map(symbol_list: list[str]) -> dict[str, dict[str, float]]:
+    """Return a dict with key as symbol and value as its stock info."""
+    return get_stock_info_df(symbol_list).to_dict("index")
+
+
 def get_stock_info(symbol):
-    stock = yf.Ticker(symbol)
-
-    # Fetch latest stock price
-    hist = stock.history(period="1d")
-    current_price = hist["Close"].iloc[-1]
-
-    # Fetch stock price in the past 3 months
-    hist_3mo = stock.history(period="3mo")
-    high_price_3mo = hist_3mo["Close"].max()
-    mean_price_3mo = hist_3mo["Close"].mean()
-
-    # Fetch stock price in the past 6 months
-    hist_6mo = stock.history(period="6mo")
-    high_price_6mo = hist_6mo["Close"].max()
-    mean_price_6mo = hist_6mo["Close"].mean()
-
-    # Fetch stock price in the past 1 year
-    hist_1yr = stock.history(period="1y")
-    high_price_1yr = hist_1yr["Close"].max()
-    mean_price_1yr = hist_1yr["Close"].mean()
-
-    relative_high_percentage_3mo = (current_price / high_price_3mo - 1) * 100
-    relative_high_percentage_6mo = (current_price / high_price_6mo - 1) * 100
-    relative_high_percentage_1yr = (current_price / high_price_1yr - 1) * 100
-    relative_mean_percentage_3mo = (current_price / mean_price_3mo - 1) * 100
-    relative_mean_percentage_6mo = (current_price / mean_price_6mo - 1) * 100
-    relative_mean_percentage_1yr = (current_price / mean_price_1yr - 1) * 100
-
-    return {
-        "current_price": current_price,
-        "relative_high_percentage_3mo": relative_high_percentage_3mo,
-        "relative_high_percentage_6mo": relative_high_percentage_6mo,
-        "relative_high_percentage_1yr": relative_high_percentage_1yr,
-        "relative_mean_percentage_3mo": relative_mean_percentage_3mo,
-        "relative_mean_percentage_6mo": relative_mean_percentage_6mo,
-        "relative_mean_percentage_1yr": relative_mean_percentage_1yr,
-    }
+    return get_stock_info_map([symbol])[symbol]
 
 
 def generate_notification_content(stock, stock_info) -> str:
-    msg = ""
-    try:
-        stock_info = get_stock_info(stock)
-        msg += f"{stock}: Now {stock_info['current_price']:.2f}\n"
-        msg += f"  [3mo] high {stock_info.get('relative_high_percentage_3mo', 'NaN'):.1f}%, mean {stock_info.get('relative_mean_percentage_3mo', 'NaN'):.1f}%\n"
-        msg += f"  [6mo] high {stock_info.get('relative_high_percentage_6mo', 'NaN'):.1f}%, mean {stock_info.get('relative_mean_percentage_6mo', 'NaN'):.1f}%\n"
-        msg += f"  [1yr] high {stock_info.get('relative_high_percentage_1yr', 'NaN'):.1f}%, mean {stock_info.get('relative_mean_percentage_1yr', 'NaN'):.1f}%\n"
-    except Exception as e:
-        print(f"Fetching stock {stock} error: {e}")
-        msg += f"{stock}: Unable to fetch data\n"
-
+    if pd.isna(stock_info["current_price"]):
+        print(f"Fetching stock {stock} error: no price data")
+        return f"{stock}: Unable to fetch data\n"
+
+    msg = f"{stock}: Now {stock_info['current_price']:.2f}\n"
+    for window in WINDOW_MONTH_MAP:
+        msg += (
+            f"  [{window}] high {stock_info[f'relative_high_percentage_{window}']:.1f}%, "
+            f"mean {stock_info[f'relative_mean_percentage_{window}']:.1f}%\n"
+        )
     return msg
 
 
 def main() -> None:
-    stock_info_map = {stock: get_stock_info(stock) for stock in STOCK_LIST}
-
-    msg = "\nToday stock relative price:\n\n"
-    for stock, stock_info in stock_info_map.items():
-        msg += generate_notification_content(stock, stock_info)
+    if STOCK_NEWS_WATCHLIST_FILE_PATH:
+        symbol_list = read_watchlist(STOCK_NEWS_WATCHLIST_FILE_PATH)
+    else:
+        symbol_list = STOCK_LIST
+    stock_info_df = get_stock_info_df(symbol_list)
+    alert_df = get_alert_df(stock_info_df, ALERT_RULE_LIST)
+
+    msg = f"\nToday stock relative price, {len(alert_df)}/{len(symbol_list)} symbols alerted:\n\n"
+    for stock, is_crossed in alert_df.head(MAX_NOTIFIED_SYMBOLS).iterrows():
+        msg += generate_notification_content(stock, stock_info_df.loc[stock])
+        msg += f"  crossed: {', '.join(is_crossed.index[is_crossed])}\n"
+    if len(alert_df) > MAX_NOTIFIED_SYMBOLS:
+        msg += f"... and {len(alert_df) - MAX_NOTIFIED_SYMBOLS} more symbols\n"
+    failed_symbol_list = stock_info_df.index[stock_info_df["current_price"].isna()].tolist()
+    if failed_symbol_list:
+        msg += f"Unable to fetch data of {len(failed_symbol_list)} symbols: "
+        msg += f"{', '.join(failed_symbol_list[:MAX_NOTIFIED_SYMBOLS])}\n"
 
     # Send notification
     print(msg)
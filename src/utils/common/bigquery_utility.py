@@ -1,10 +1,51 @@
 """Tasks for BigQuery."""
 
+import functools
+import io
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from typing import Literal
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from google.cloud.bigquery import Client as BigQueryClient
-from google.cloud.bigquery import LoadJobConfig
+from google.cloud.bigquery import LoadJob, LoadJobConfig, SourceFormat
+
+BIGQUERY_CREDENTIALS_FILE_PATH = "n8n-user.json"
+
+# Bound of the in-memory (Arrow) size of a chunk, its Parquet file is smaller
+MAX_LOAD_CHUNK_BYTES = 256 * 1024 * 1024
+MAX_CONCURRENT_LOAD_JOBS = 4
+LOAD_TIMEOUT_SECONDS = 1800
+
+# `pd.api.types.infer_dtype()` results of object columns with no value to convert to str
+SINGLE_TYPE_INFERRED_TYPES = {"string", "empty"}
+
+_to_str = np.frompyfunc(str, 1, 1)
+
+
+@functools.cache
+def get_bigquery_client() -> BigQueryClient:
+    """Get BigQuery client of the service account's project, created once per process."""
+    return BigQueryClient.from_service_account_json(BIGQUERY_CREDENTIALS_FILE_PATH)
+
+
+def _get_str_values(values: np.ndarray, inferred_type: str) -> np.ndarray:
+    """`str(x)` of every non-null value, as an object array."""
+    if inferred_type == "integer":
+        # Arrow cast kernel, same text as str() for integers within int64
+        try:
+            return pc.cast(pa.array(values, type=pa.int64()), pa.string()).to_numpy(
+                zero_copy_only=False
+            )
+        except (OverflowError, pa.ArrowInvalid):
+            pass
+    return _to_str(values)
 
 
 def _guarantee_single_type(df: pd.DataFrame) -> pd.DataFrame:
@@ -16,22 +57,201 @@ def _guarantee_single_type(df: pd.DataFrame) -> pd.DataFrame:
     # If a column have only numeric data, it will be stored as detype "int" or "float"
     # Reference:
     #     https://stackoverflow.com/questions/21018654/strings-in-a-dataframe-but-dtype-is-object
+    # Non-null values become `str(x)`, with one type inference pass per column and no
+    # Python call per cell for str or integer values.
     for column in df.columns:
-        if df[column].dtype == "object":
-            df[column] = df[column].apply(lambda x: str(x) if pd.notna(x) else x)
+        if df[column].dtype != "object":
+            continue
+        inferred_type = pd.api.types.infer_dtype(df[column], skipna=True)
+        values = df[column].to_numpy(dtype=object, copy=True)
+        if inferred_type not in SINGLE_TYPE_INFERRED_TYPES:
+            is_not_null = df[column].notna().to_numpy()
+            values[is_not_null] = _get_str_values(values[is_not_null], inferred_type)
+        # Dtype inferred from the values, as for the result of `apply()`:
+        # str (nulls as NaN) unless pd.NA or NaT are kept
+        df[column] = pd.Series(values, index=df.index)
 
     return df
 
 
+def get_arrow_schema(df: pd.DataFrame) -> pa.Schema:
+    """
+    Arrow schema of a frame after `_guarantee_single_type()`: string for object columns
+    (str or null values), the type of the dtype otherwise, so that no column is inferred
+    value by value.
+    >>> pa.Table.from_pandas(df, schema=get_arrow_schema(df), preserve_index=False)
+    """
+    typed_schema = pa.Schema.from_pandas(df.loc[:, df.dtypes != "object"], preserve_index=False)
+    return pa.schema(
+        [
+            (
+                pa.field(column, pa.string())
+                if df[column].dtype == "object"
+                else typed_schema.field(column)
+            )
+            for column in df.columns
+        ]
+    )
+
+
+@dataclass
+class LoadJobResult:
+    job_id: str
+    row_count: int
+    byte_count: int
+    # From the start of the upload to the end of the job
+    latency_seconds: float
+
+
+def iter_arrow_chunks(
+    source: pa.Table | Iterable[pa.RecordBatch],
+    max_chunk_bytes: int = MAX_LOAD_CHUNK_BYTES,
+) -> Iterator[pa.Table]:
+    """
+    Split a table, or a stream of record batches, into tables of at most `max_chunk_bytes`
+    (Arrow size, from the average row size of each batch; a chunk has at least one row).
+    A stream is read only as far as the chunk being built.
+    """
+    batches = source.to_batches() if isinstance(source, pa.Table) else source
+    pending_batch_list: list[pa.RecordBatch] = []
+    pending_bytes = 0
+    for batch in batches:
+        if batch.num_rows == 0:
+            continue
+        row_bytes = max(1, batch.nbytes // batch.num_rows)
+        offset = 0
+        while offset < batch.num_rows:
+            row_count = (max_chunk_bytes - pending_bytes) // row_bytes
+            if row_count <= 0 and pending_batch_list:
+                yield pa.Table.from_batches(pending_batch_list)
+                pending_batch_list, pending_bytes = [], 0
+                continue
+            part = batch.slice(offset, max(1, row_count))
+            pending_batch_list.append(part)
+            pending_bytes += part.num_rows * row_bytes
+            offset += part.num_rows
+    if pending_batch_list:
+        yield pa.Table.from_batches(pending_batch_list)
+
+
+def _submit_load_job(
+    bigquery_client: BigQueryClient,
+    table: pa.Table,
+    destination: str,
+    write_disposition: str,
+) -> tuple[LoadJob, int, float]:
+    """Stage a chunk as Parquet in memory and upload it. Return the job, bytes and upload time."""
+    start_time = time.monotonic()
+    parquet_file = io.BytesIO()
+    # BigQuery stores microseconds
+    pq.write_table(table, parquet_file, coerce_timestamps="us", allow_truncated_timestamps=True)
+    byte_count = parquet_file.tell()
+    job = bigquery_client.load_table_from_file(
+        parquet_file,
+        destination,
+        rewind=True,
+        job_config=LoadJobConfig(
+            source_format=SourceFormat.PARQUET,
+            write_disposition=write_disposition,
+        ),
+    )
+    return job, byte_count, time.monotonic() - start_time
+
+
+def _get_load_job_result(
+    job: LoadJob, byte_count: int, upload_seconds: float, deadline: float
+) -> LoadJobResult:
+    """Wait for a job until the deadline; a failed job raises its error."""
+    job.result(timeout=max(0.0, deadline - time.monotonic()))
+    return LoadJobResult(
+        job_id=job.job_id,
+        row_count=job.output_rows,
+        byte_count=byte_count,
+        latency_seconds=upload_seconds + (job.ended - job.created).total_seconds(),
+    )
+
+
+def load_arrow_chunks_to_bigquery(
+    bigquery_client: BigQueryClient,
+    chunks: Iterable[pa.Table],
+    destination: str,
+    write_disposition: Literal["WRITE_APPEND", "WRITE_TRUNCATE", "WRITE_EMPTY"],
+    max_workers: int = MAX_CONCURRENT_LOAD_JOBS,
+    timeout: float = LOAD_TIMEOUT_SECONDS,
+    schema: pa.Schema | None = None,
+) -> list[LoadJobResult]:
+    """
+    Load every chunk with its own Parquet load job, up to `max_workers` chunks staged and
+    uploaded at once, then wait for all jobs. Return the result of every job, in order.
+
+    With WRITE_TRUNCATE or WRITE_EMPTY, the first job runs alone with that disposition and
+    the others append after it; with no chunk, an empty table of `schema` is loaded with
+    that disposition, so that WRITE_TRUNCATE still empties the table. The load is not
+    atomic: jobs done before a failure stay loaded, the unfinished ones are cancelled.
+
+    Raises the first upload or job error, or `concurrent.futures.TimeoutError` when the
+    jobs are not all done within `timeout` seconds.
+    """
+    deadline = time.monotonic() + timeout
+    chunk_iter = iter(chunks)
+    # (job, bytes, upload seconds) in chunk order
+    submitted_list: list[tuple[LoadJob, int, float]] = []
+    future_list: list[Future] = []
+    result_list: list[LoadJobResult] = []
+    try:
+        if write_disposition != "WRITE_APPEND":
+            first_chunk = next(chunk_iter, None)
+            if first_chunk is None and schema is not None:
+                first_chunk = schema.empty_table()
+            if first_chunk is not None:
+                submitted_list.append(
+                    _submit_load_job(bigquery_client, first_chunk, destination, write_disposition)
+                )
+                result_list.append(_get_load_job_result(*submitted_list[0], deadline))
+
+        # Chunks are read only when a worker is free, so at most `max_workers` are staged
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running_set: set[Future] = set()
+            for chunk in chunk_iter:
+                if len(running_set) >= max_workers:
+                    done_set, running_set = wait(running_set, return_when=FIRST_COMPLETED)
+                    for future in done_set:
+                        future.result()
+                future = executor.submit(
+                    _submit_load_job, bigquery_client, chunk, destination, "WRITE_APPEND"
+                )
+                future_list.append(future)
+                running_set.add(future)
+        submitted_list.extend(future.result() for future in future_list)
+
+        for submitted in submitted_list[len(result_list) :]:
+            result_list.append(_get_load_job_result(*submitted, deadline))
+    except BaseException:
+        job_list = [job for job, _, _ in submitted_list] + [
+            future.result()[0]
+            for future in future_list
+            if future.done() and future.exception() is None
+        ]
+        for job in dict.fromkeys(job_list):
+            if not job.done(reload=False):
+                job.cancel()
+        raise
+    return result_list
+
+
 def load_dataframe_to_bigquery(
     bigquery_client: BigQueryClient,
     dataframe: pd.DataFrame,
     destination: str,
     write_disposition: Literal["WRITE_APPEND", "WRITE_TRUNCATE", "WRITE_EMPTY"],
     trans_to_singe_type: bool = True,
-) -> None:
+    max_chunk_bytes: int = MAX_LOAD_CHUNK_BYTES,
+    max_workers: int = MAX_CONCURRENT_LOAD_JOBS,
+    timeout: float = LOAD_TIMEOUT_SECONDS,
+) -> list[LoadJobResult]:
     """
-    Load DataFrame to BigQuery.
+    Load DataFrame to BigQuery, staged as Parquet chunks of at most `max_chunk_bytes`
+    loaded by concurrent jobs, and wait for them. See `load_arrow_chunks_to_bigquery()`.
 
     For argument `write_disposition`:
         If table does not exist:
@@ -43,9 +263,18 @@ def load_dataframe_to_bigquery(
     """
     if trans_to_singe_type:
         dataframe = _guarantee_single_type(dataframe)
+        table = pa.Table.from_pandas(
+            dataframe, schema=get_arrow_schema(dataframe), preserve_index=False
+        )
+    else:
+        table = pa.Table.from_pandas(dataframe, preserve_index=False)
 
-    bigquery_client.load_table_from_dataframe(
-        dataframe=dataframe,
-        destination=destination,
-        job_config=LoadJobConfig(write_disposition=write_disposition),
+    return load_arrow_chunks_to_bigquery(
+        bigquery_client,
+        iter_arrow_chunks(table, max_chunk_bytes),
+        destination,
+        write_disposition,
+        max_workers=max_workers,
+        timeout=timeout,
+        schema=table.schema,
     )
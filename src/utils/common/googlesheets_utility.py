@@ -3,17 +3,71 @@ Credential for Google Sheets.
 
 GoogleSheets API usage limits:
     https://developers.google.com/sheets/api/limits
+    - Read requests and write requests: 300 per minute per project,
+      60 per minute per user per project (quota exceeded: 429)
+    - Request payload: 2 MB recommended, processing time up to 180 seconds
+    - Cells: 10 million per spreadsheet
+
+Writes of this module are split into batchUpdate requests within the payload budget,
+throttled by a token bucket below the per-minute write quota and retried on 429/503.
 """
 
+import functools
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import httplib2
 import pandas as pd
 import pygsheets
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.errors import HttpError
 from pygsheets.client import Client
+from pygsheets.spreadsheet import Spreadsheet
+from pygsheets.worksheet import Worksheet
+
+from utils.common.rate_limiter import (
+    BACKOFF_BASE_SECONDS,
+    BACKOFF_MAX_SECONDS,
+    DEFAULT_MAX_RETRIES,
+    THROTTLE_STATUS_CODES,
+    TokenBucket,
+)
 
 BIGQUERY_CREDENTIALS_FILE_PATH = "n8n-user.json"
 
+WRITE_REQUESTS_PER_MINUTE = 60
+# Requests sent at once at most; the refill rate is lowered by it, so no 60-second
+# window holds more than WRITE_REQUESTS_PER_MINUTE requests
+WRITE_REQUEST_BURST = 10
+MAX_REQUEST_BYTES = 2_000_000
+MAX_REQUEST_CELLS = pygsheets.sheet.GOOGLE_SHEET_CELL_UPDATES_LIMIT
+MAX_CONCURRENT_WRITES = 4
+REQUEST_TIMEOUT_SECONDS = 180
+# Requests which leave the same cells when applied twice, so that a batch of them is
+# resent after a 503, which may come after the batch was applied
+IDEMPOTENT_REQUEST_TYPES = {"updateCells", "repeatCell", "updateDeveloperMetadata"}
+# Developer metadata of a worksheet holding the extent "<rows>x<columns>" last written
+# from a start address, e.g. key "written_extent:A2", so that only those cells are cleared
+WRITTEN_EXTENT_METADATA_KEY_PREFIX = "written_extent:"
+
+# Shared by all writes of the process, which use the quota of one service account
+sheets_write_token_bucket = TokenBucket(
+    rate=(WRITE_REQUESTS_PER_MINUTE - WRITE_REQUEST_BURST) / 60,
+    capacity=WRITE_REQUEST_BURST,
+)
+_thread_local = threading.local()
+
 
+@functools.cache
 def get_google_sheet_client() -> Client:
-    """Get Google Sheets client."""
+    """
+    Get Google Sheets client, authorized once per process.
+    The service account token is refreshed by the client when it expires.
+    """
     with open(BIGQUERY_CREDENTIALS_FILE_PATH, "r") as f:
         service_account_json_str = f.read()
     return pygsheets.authorize(
@@ -21,15 +75,670 @@ def get_google_sheet_client() -> Client:
     )
 
 
-def load_dataframe_to_google_sheets_worksheet(
-    df: pd.DataFrame,
-    spreadsheet_url: str,
-    worksheet_title: str,
+@functools.cache
+def get_spreadsheet(spreadsheet_url: str) -> Spreadsheet:
+    """
+    Open a spreadsheet once per process with the cached client.
+    Call `get_spreadsheet.cache_clear()` to see worksheets added or resized by others.
+    """
+    return get_google_sheet_client().open_by_url(spreadsheet_url)
+
+
+def quote_worksheet_title(title: str) -> str:
+    return "'{}'".format(title.replace("'", "''"))
+
+
+def _is_text_column(column_type) -> bool:
+    """Object columns (str or mixed types containing str) and string columns."""
+    return column_type == "object" or isinstance(column_type, pd.StringDtype)
+
+
+def _get_new_extended_value(value: str, is_text: bool) -> dict:
+    """
+    Return the ExtendedValue of a cell written as `set_dataframe()` (USER_ENTERED) did:
+    TEXT cells keep the string, other cells parse numbers and booleans.
+    """
+    if value == "":
+        return {}
+    if is_text:
+        return {"stringValue": value}
+    if value.upper() in ("TRUE", "FALSE"):
+        return {"boolValue": value.upper() == "TRUE"}
+    try:
+        number = float(value.replace(",", ""))
+    except ValueError:
+        return {"stringValue": value}
+    if math.isfinite(number):
+        return {"numberValue": number}
+    return {"stringValue": value}
+
+
+def _get_current_extended_value(value: str | float | int | bool | None) -> dict:
+    """Return the ExtendedValue of a cell read with UNFORMATTED_VALUE."""
+    if value is None or value == "":
+        return {}
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, (int, float)):
+        return {"numberValue": float(value)}
+    return {"stringValue": value}
+
+
+def _get_grid_range(
+    sheet_id: int,
     start_address: tuple[int, int],
-    copy_head: bool = True,
+    row_start: int,
+    row_end: int,
+    column_start: int,
+    column_end: int,
+) -> dict:
+    """GridRange of cells [row_start, row_end) x [column_start, column_end) from `start_address`."""
+    return {
+        "sheetId": sheet_id,
+        "startRowIndex": start_address[0] - 1 + row_start,
+        "endRowIndex": start_address[0] - 1 + row_end,
+        "startColumnIndex": start_address[1] - 1 + column_start,
+        "endColumnIndex": start_address[1] - 1 + column_end,
+    }
+
+
+def get_update_cells_requests(
+    current_values: list[list],
+    new_values: list[list[str]],
+    text_column_list: list[bool],
+    data_row_start: int,
+    sheet_id: int,
+    start_address: tuple[int, int],
+) -> list[dict]:
+    """
+    Return `updateCells` requests covering the cells which differ, each preceded by a
+    `repeatCell` request setting TEXT format on the data cells of its text columns.
+
+    Changed cells are grouped into blocks greedily: the changed span of a row joins the
+    block of the previous row while at least half of the merged block's cells changed.
+    Current cells below or right of the new values are cleared.
+
+    :param current_values:   Values read with UNFORMATTED_VALUE from `start_address`,
+                             rows may be ragged.
+    :param text_column_list: True for the columns formatted as TEXT.
+    :param data_row_start:   Rows of `new_values` before it are header rows.
+    """
+    row_count = max(len(new_values), len(current_values))
+    column_count = max([len(row) for row in current_values] + [len(text_column_list)])
+
+    # [row_start, row_end, column_start, column_end, changed cell count]
+    block_list: list[list[int]] = []
+    new_value_grid = []
+    for row_index in range(row_count):
+        new_row = new_values[row_index] if row_index < len(new_values) else []
+        current_row = current_values[row_index] if row_index < len(current_values) else []
+        new_value_row = []
+        changed_column_list = []
+        for column_index in range(column_count):
+            new_value = (
+                _get_new_extended_value(
+                    new_row[column_index],
+                    row_index >= data_row_start and text_column_list[column_index],
+                )
+                if column_index < len(new_row)
+                else {}
+            )
+            current_value = _get_current_extended_value(
+                current_row[column_index] if column_index < len(current_row) else None
+            )
+            new_value_row.append(new_value)
+            if new_value != current_value:
+                changed_column_list.append(column_index)
+        new_value_grid.append(new_value_row)
+        if not changed_column_list:
+            continue
+
+        column_start, column_end = changed_column_list[0], changed_column_list[-1] + 1
+        if block_list and block_list[-1][1] == row_index:
+            block = block_list[-1]
+            merged_column_start = min(block[2], column_start)
+            merged_column_end = max(block[3], column_end)
+            merged_changed_count = block[4] + len(changed_column_list)
+            merged_area = (row_index + 1 - block[0]) * (merged_column_end - merged_column_start)
+            if merged_changed_count * 2 >= merged_area:
+                block[1:] = [
+                    row_index + 1,
+                    merged_column_start,
+                    merged_column_end,
+                    merged_changed_count,
+                ]
+                continue
+        block_list.append(
+            [row_index, row_index + 1, column_start, column_end, len(changed_column_list)]
+        )
+
+    request_list = []
+    for row_start, row_end, column_start, column_end, _ in block_list:
+        # TEXT format on data cells of text columns, one request per run of text columns
+        text_row_start = max(row_start, data_row_start)
+        text_row_end = min(row_end, len(new_values))
+        column_index = column_start
+        while text_row_start < text_row_end and column_index < min(
+            column_end, len(text_column_list)
+        ):
+            if not text_column_list[column_index]:
+                column_index += 1
+                continue
+            text_column_start = column_index
+            while column_index < min(column_end, len(text_column_list)) and (
+                text_column_list[column_index]
+            ):
+                column_index += 1
+            request_list.append(
+                {
+                    "repeatCell": {
+                        "range": _get_grid_range(
+                            sheet_id,
+                            start_address,
+                            text_row_start,
+                            text_row_end,
+                            text_column_start,
+                            column_index,
+                        ),
+                        "cell": {
+                            "userEnteredFormat": {
+                                "numberFormat": {"type": pygsheets.FormatType.TEXT.value}
+                            }
+                        },
+                        "fields": "userEnteredFormat.numberFormat",
+                    }
+                }
+            )
+
+        request_list.append(
+            {
+                "updateCells": {
+                    "range": _get_grid_range(
+                        sheet_id, start_address, row_start, row_end, column_start, column_end
+                    ),
+                    "rows": [
+                        {
+                            "values": [
+                                {"userEnteredValue": value}
+                                for value in new_value_grid[row_index][column_start:column_end]
+                            ]
+                        }
+                        for row_index in range(row_start, row_end)
+                    ],
+                    "fields": "userEnteredValue",
+                }
+            }
+        )
+    return request_list
+
+
+def _get_update_cells_part(update_cells: dict, row_start: int, row_end: int) -> dict:
+    """`updateCells` request of the rows [row_start, row_end) of another one."""
+    grid_range = update_cells["range"]
+    return {
+        "updateCells": {
+            **update_cells,
+            "range": {
+                **grid_range,
+                "startRowIndex": grid_range["startRowIndex"] + row_start,
+                "endRowIndex": grid_range["startRowIndex"] + row_end,
+            },
+            "rows": update_cells["rows"][row_start:row_end],
+        }
+    }
+
+
+def _iter_request_parts(request: dict, max_request_bytes: int, max_request_cells: int):
+    """
+    Yield (request, bytes, cells) of a request; `updateCells` requests are split by rows
+    into parts within the budgets (a single row is never split).
+    """
+    if "updateCells" not in request:
+        yield request, len(json.dumps(request)), 0
+        return
+
+    update_cells = request["updateCells"]
+    grid_range = update_cells["range"]
+    column_count = grid_range["endColumnIndex"] - grid_range["startColumnIndex"]
+    overhead_bytes = len(json.dumps({"updateCells": {**update_cells, "rows": []}}))
+    part_start = 0
+    part_bytes = overhead_bytes
+    for row_index, row in enumerate(update_cells["rows"]):
+        row_bytes = len(json.dumps(row)) + 2
+        if row_index > part_start and (
+            part_bytes + row_bytes > max_request_bytes
+            or (row_index + 1 - part_start) * column_count > max_request_cells
+        ):
+            yield (
+                _get_update_cells_part(update_cells, part_start, row_index),
+                part_bytes,
+                (row_index - part_start) * column_count,
+            )
+            part_start, part_bytes = row_index, overhead_bytes
+        part_bytes += row_bytes
+    yield (
+        _get_update_cells_part(update_cells, part_start, len(update_cells["rows"])),
+        part_bytes,
+        (len(update_cells["rows"]) - part_start) * column_count,
+    )
+
+
+def split_batch_update_requests(
+    request_list: list[dict],
+    max_request_bytes: int = MAX_REQUEST_BYTES,
+    max_request_cells: int = MAX_REQUEST_CELLS,
+) -> list[list[dict]]:
+    """
+    Split requests into the bodies of several batchUpdate requests, keeping their order,
+    each within `max_request_bytes` of JSON and `max_request_cells` updated cells.
+    """
+    chunk_list: list[list[dict]] = []
+    chunk_bytes = chunk_cells = 0
+    for request in request_list:
+        for part, part_bytes, part_cells in _iter_request_parts(
+            request, max_request_bytes, max_request_cells
+        ):
+            if not chunk_list or (
+                chunk_list[-1]
+                and (
+                    chunk_bytes + part_bytes > max_request_bytes
+                    or chunk_cells + part_cells > max_request_cells
+                )
+            ):
+                chunk_list.append([])
+                chunk_bytes = chunk_cells = 0
+            chunk_list[-1].append(part)
+            chunk_bytes += part_bytes
+            chunk_cells += part_cells
+    return chunk_list
+
+
+def _get_thread_http(credentials) -> AuthorizedHttp:
+    """Authorized HTTP object of the current thread, since httplib2 is not thread-safe."""
+    http = getattr(_thread_local, "http", None)
+    if http is None or http.credentials is not credentials:
+        http = _thread_local.http = AuthorizedHttp(
+            credentials, http=httplib2.Http(timeout=REQUEST_TIMEOUT_SECONDS)
+        )
+    return http
+
+
+def _get_backoff_seconds(attempt: int, error: HttpError) -> float:
+    retry_after = error.resp.get("retry-after", "")
+    if retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX_SECONDS)
+    return min(BACKOFF_BASE_SECONDS * 2**attempt, BACKOFF_MAX_SECONDS)
+
+
+def execute_batch_update(
+    spreadsheet: Spreadsheet,
+    request_list: list[dict],
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> dict:
+    """
+    Send one batchUpdate request, throttled by `sheets_write_token_bucket`.
+    Retries with exponential backoff (or `Retry-After`) on 429/503 if every request is of
+    `IDEMPOTENT_REQUEST_TYPES`, otherwise raises.
+    """
+    is_idempotent = all(request.keys() <= IDEMPOTENT_REQUEST_TYPES for request in request_list)
+    request = spreadsheet.client.sheet.service.spreadsheets().batchUpdate(
+        spreadsheetId=spreadsheet.id, body={"requests": request_list}, fields="replies"
+    )
+    http = _get_thread_http(spreadsheet.client.oauth)
+    for attempt in range(max_retries + 1):
+        sheets_write_token_bucket.acquire()
+        try:
+            return request.execute(http=http)
+        except HttpError as error:
+            if (
+                error.resp.status not in THROTTLE_STATUS_CODES
+                or not is_idempotent
+                or attempt == max_retries
+            ):
+                raise
+            time.sleep(_get_backoff_seconds(attempt, error))
+
+
+def _get_grow_requests(grid_size_map: dict[int, list]) -> list[dict]:
+    """`appendDimension` requests of the rows and columns missing from the cached grids."""
+    grow_request_list = []
+    for worksheet, row_count, column_count in grid_size_map.values():
+        for dimension, length in [
+            ("ROWS", row_count - worksheet.rows),
+            ("COLUMNS", column_count - worksheet.cols),
+        ]:
+            if length > 0:
+                grow_request_list.append(
+                    {
+                        "appendDimension": {
+                            "sheetId": worksheet.id,
+                            "dimension": dimension,
+                            "length": length,
+                        }
+                    }
+                )
+    return grow_request_list
+
+
+def grow_worksheet_grids(
+    spreadsheet: Spreadsheet,
+    grid_size_map: dict[int, list],
+    max_retries: int = DEFAULT_MAX_RETRIES,
+) -> None:
+    """
+    Grow worksheets to the rows and columns they need ([worksheet, rows, columns] by
+    worksheet id) in one batchUpdate. `appendDimension` adds to the size, so after a
+    429/503 the grid sizes are read again and only what is still missing is resent.
+    """
+    for attempt in range(max_retries + 1):
+        grow_request_list = _get_grow_requests(grid_size_map)
+        if not grow_request_list:
+            return
+        try:
+            execute_batch_update(spreadsheet, grow_request_list)
+            return
+        except HttpError as error:
+            if error.resp.status not in THROTTLE_STATUS_CODES or attempt == max_retries:
+                raise
+            time.sleep(_get_backoff_seconds(attempt, error))
+            for worksheet, _, _ in grid_size_map.values():
+                worksheet.refresh()
+
+
+def execute_batch_updates(
+    spreadsheet: Spreadsheet,
+    chunk_list: list[list[dict]],
+    max_workers: int = MAX_CONCURRENT_WRITES,
+) -> None:
+    """
+    Send batchUpdate requests in parallel, up to `max_workers` in flight.
+    Requests are independent, so they may be applied in any order.
+    """
+    if len(chunk_list) <= 1 or max_workers <= 1:
+        for request_list in chunk_list:
+            execute_batch_update(spreadsheet, request_list)
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunk_list))) as executor:
+        # Consume the results, so the first failure is raised
+        list(
+            executor.map(
+                lambda request_list: execute_batch_update(spreadsheet, request_list),
+                chunk_list,
+            )
+        )
+
+
+@dataclass
+class WorksheetTarget:
+    """A DataFrame to write to a worksheet, from `start_address`, e.g. (2, 1) for A2."""
+
+    worksheet_title: str
+    df: pd.DataFrame
+    start_address: tuple[int, int]
+    copy_head: bool = True
+
+
+def _get_target_values(target: WorksheetTarget) -> list[list[str]]:
+    # Same conversion as `set_dataframe(nan="NaN")`
+    values = target.df.astype(object).fillna("NaN").astype(str).values.tolist()
+    if target.copy_head:
+        values.insert(0, [str(column) for column in target.df.columns])
+    return values
+
+
+def _get_written_extent_lookup(worksheet: Worksheet, target: WorksheetTarget) -> dict:
+    """DeveloperMetadataLookup of the written extent of the target."""
+    return {
+        "metadataKey": WRITTEN_EXTENT_METADATA_KEY_PREFIX
+        + pygsheets.Address(target.start_address).label,
+        "metadataLocation": {"sheetId": worksheet.id},
+    }
+
+
+def get_written_extent_list(
+    spreadsheet: Spreadsheet,
+    worksheet_list: list[Worksheet],
+    target_list: list[WorksheetTarget],
+) -> list[tuple[int, int] | None]:
+    """
+    Extents (rows, columns) last written to the targets, read from the developer metadata
+    of their worksheets in one search request. None where no extent was recorded.
+    """
+    lookup_list = [
+        _get_written_extent_lookup(worksheet, target)
+        for worksheet, target in zip(worksheet_list, target_list)
+    ]
+    response = (
+        spreadsheet.client.sheet.service.spreadsheets()
+        .developerMetadata()
+        .search(
+            spreadsheetId=spreadsheet.id,
+            body={"dataFilters": [{"developerMetadataLookup": lookup} for lookup in lookup_list]},
+        )
+        .execute(http=_get_thread_http(spreadsheet.client.oauth))
+    )
+    # (sheet id, metadata key) -> extent
+    written_extent_map: dict[tuple[int, str], tuple[int, int]] = {}
+    for matched_metadata in response.get("matchedDeveloperMetadata", []):
+        metadata = matched_metadata["developerMetadata"]
+        key = (metadata["location"]["sheetId"], metadata["metadataKey"])
+        row_count, column_count = map(int, metadata["metadataValue"].split("x"))
+        # A create answered with a 503 may have been applied, then sent again by a later run
+        previous_row_count, previous_column_count = written_extent_map.get(key, (0, 0))
+        written_extent_map[key] = (
+            max(previous_row_count, row_count),
+            max(previous_column_count, column_count),
+        )
+    return [
+        written_extent_map.get((lookup["metadataLocation"]["sheetId"], lookup["metadataKey"]))
+        for lookup in lookup_list
+    ]
+
+
+def _get_written_extent_requests(
+    worksheet: Worksheet,
+    target: WorksheetTarget,
+    written_extent: tuple[int, int] | None,
+    extent: tuple[int, int],
+) -> list[dict]:
+    """Request recording `extent` as the written extent of the target, if it changed."""
+    if written_extent == extent:
+        return []
+    lookup = _get_written_extent_lookup(worksheet, target)
+    metadata_value = "{}x{}".format(*extent)
+    if written_extent is None:
+        return [
+            {
+                "createDeveloperMetadata": {
+                    "developerMetadata": {
+                        "metadataKey": lookup["metadataKey"],
+                        "metadataValue": metadata_value,
+                        "location": lookup["metadataLocation"],
+                        "visibility": "DOCUMENT",
+                    }
+                }
+            }
+        ]
+    return [
+        {
+            "updateDeveloperMetadata": {
+                "dataFilters": [{"developerMetadataLookup": lookup}],
+                "developerMetadata": {"metadataValue": metadata_value},
+                "fields": "metadataValue",
+            }
+        }
+    ]
+
+
+def record_written_extents(
+    spreadsheet: Spreadsheet,
+    worksheet_list: list[Worksheet],
+    target_list: list[WorksheetTarget],
+    written_extent_list: list[tuple[int, int] | None],
+    extent_list: list[tuple[int, int]],
 ) -> None:
+    """Record the extents of the targets which changed, in one batchUpdate."""
+    request_list = [
+        request
+        for worksheet, target, written_extent, extent in zip(
+            worksheet_list, target_list, written_extent_list, extent_list
+        )
+        for request in _get_written_extent_requests(worksheet, target, written_extent, extent)
+    ]
+    if request_list:
+        execute_batch_update(spreadsheet, request_list)
+
+
+def _get_target_value_range(
+    worksheet: Worksheet,
+    target: WorksheetTarget,
+    row_count: int,
+    column_count: int,
+) -> str | None:
+    """A1 range of the current cells under the target, `row_count` x `column_count` at most."""
+    start_row, start_column = target.start_address
+    if worksheet.rows < start_row or worksheet.cols < start_column:
+        return None
+    return "{}!{}:{}".format(
+        quote_worksheet_title(worksheet.title),
+        pygsheets.Address((start_row, start_column)).label,
+        pygsheets.Address(
+            (
+                min(start_row + row_count - 1, worksheet.rows),
+                min(start_column + column_count - 1, worksheet.cols),
+            )
+        ).label,
+    )
+
+
+def write_dataframes_diff_to_spreadsheet(
+    spreadsheet: Spreadsheet,
+    target_list: list[WorksheetTarget],
+    max_request_bytes: int = MAX_REQUEST_BYTES,
+    max_request_cells: int = MAX_REQUEST_CELLS,
+    max_workers: int = MAX_CONCURRENT_WRITES,
+) -> int:
     """
-    Load DataFrame to GoogleSheets.
+    Write DataFrames to worksheets of a spreadsheet with one developer metadata search,
+    one values batchGet and as few batchUpdate requests as the payload budget allows,
+    usually one.
+
+    The current values under every target are read in one batchGet and compared cell by
+    cell with the new values. Only changed cells are sent, and cells left over from a larger
+    previous frame are cleared. Cells outside the frames are kept, e.g. notes beside them:
+    the extent written to each target is recorded in the developer metadata of its worksheet
+    (see `get_written_extent_list()`), and only cells within it are read and cleared. Without
+    a recorded extent, the rows below a frame are cleared within its columns.
+    Worksheets grow first, in a batchUpdate of their own, if a frame does not fit.
+    Nothing is sent if nothing changed.
+
+    Values are written as `set_dataframe()` (nan="NaN") wrote them: cells of object-type
+    columns as TEXT, other cells parsed as numbers or booleans where possible.
+
+    Changes over `max_request_bytes` or `max_request_cells` are split by rows into batchUpdate
+    requests (see `split_batch_update_requests()`), sent with up to `max_workers` in
+    parallel within the write quota.
+
+    :return: Number of changed cell ranges sent.
+    """
+    worksheet_list = [
+        spreadsheet.worksheet_by_title(target.worksheet_title) for target in target_list
+    ]
+    new_values_list = [_get_target_values(target) for target in target_list]
+    extent_list = [
+        (len(new_values), target.df.shape[1])
+        for new_values, target in zip(new_values_list, target_list)
+    ]
+    written_extent_list = get_written_extent_list(spreadsheet, worksheet_list, target_list)
+    # Extent covering both the previous and the new frame, recorded while cells are written
+    merged_extent_list = [
+        (
+            extent
+            if written_extent is None
+            else (max(extent[0], written_extent[0]), max(extent[1], written_extent[1]))
+        )
+        for extent, written_extent in zip(extent_list, written_extent_list)
+    ]
+    value_range_list = [
+        _get_target_value_range(
+            worksheet,
+            target,
+            merged_extent[0] if written_extent else worksheet.rows,
+            merged_extent[1],
+        )
+        for worksheet, target, merged_extent, written_extent in zip(
+            worksheet_list, target_list, merged_extent_list, written_extent_list
+        )
+    ]
+    readable_value_range_list = [value_range for value_range in value_range_list if value_range]
+    current_values_list = []
+    if readable_value_range_list:
+        current_values_list = [
+            value_range.get("values", [])
+            for value_range in spreadsheet.client.sheet.values_batch_get(
+                spreadsheet.id,
+                readable_value_range_list,
+                value_render_option=pygsheets.ValueRenderOption.UNFORMATTED_VALUE,
+            )
+        ]
+    current_values_iter = iter(current_values_list)
+
+    cell_request_list = []
+    # worksheet id -> [worksheet, rows needed, columns needed]
+    grid_size_map: dict[int, list] = {}
+    for worksheet, target, new_values, value_range in zip(
+        worksheet_list, target_list, new_values_list, value_range_list
+    ):
+        cell_request_list.extend(
+            get_update_cells_requests(
+                next(current_values_iter) if value_range else [],
+                new_values,
+                text_column_list=[_is_text_column(column_type) for column_type in target.df.dtypes],
+                data_row_start=1 if target.copy_head else 0,
+                sheet_id=worksheet.id,
+                start_address=target.start_address,
+            )
+        )
+        grid_size = grid_size_map.setdefault(worksheet.id, [worksheet, 0, 0])
+        grid_size[1] = max(grid_size[1], target.start_address[0] + len(new_values) - 1)
+        grid_size[2] = max(grid_size[2], target.start_address[1] + target.df.shape[1] - 1)
+    if not cell_request_list:
+        record_written_extents(
+            spreadsheet, worksheet_list, target_list, written_extent_list, extent_list
+        )
+        return 0
+
+    # Cells outside the current grids are only written once they have grown
+    grow_worksheet_grids(spreadsheet, grid_size_map)
+    # A frame growing is recorded before its cells are written and a frame shrinking after,
+    # so that a failed write leaves no cells outside the recorded extents
+    record_written_extents(
+        spreadsheet, worksheet_list, target_list, written_extent_list, merged_extent_list
+    )
+    chunk_list = split_batch_update_requests(
+        cell_request_list, max_request_bytes, max_request_cells
+    )
+    execute_batch_updates(spreadsheet, chunk_list, max_workers=max_workers)
+    record_written_extents(
+        spreadsheet, worksheet_list, target_list, merged_extent_list, extent_list
+    )
+
+    # Keep the cached worksheet properties in line with the grown grids
+    for worksheet, row_count, column_count in grid_size_map.values():
+        grid_properties = worksheet.jsonSheet["properties"]["gridProperties"]
+        grid_properties["rowCount"] = max(worksheet.rows, row_count)
+        grid_properties["columnCount"] = max(worksheet.cols, column_count)
+
+    return len([request for request in cell_request_list if "updateCells" in request])
+
+
+def publish_dataframes_to_google_sheets(
+    spreadsheet_url: str,
+    target_list: list[WorksheetTarget],
+) -> None:
+    """
+    Publish several DataFrames to worksheets of one spreadsheet, sending only the cells
+    which changed in batched requests. See `write_dataframes_diff_to_spreadsheet()`.
 
     The object-type-columns on GoogleSheets will be forced configured to TEXT.
     (object-type-columns: str and mixed-type contains str are considered "object")
@@ -44,54 +753,42 @@ def load_dataframe_to_google_sheets_worksheet(
     >>> print(df["int_col"].dtype == "object")  # False
     >>> print(df["object_col"].dtype == "object")  # True
     >>> print(df["float_col"].dtype == "object")  # False
-
-    :param start_address:   (2, 1) denote writing data from 2nd row and column A on Worksheet
+    >>> publish_dataframes_to_google_sheets(
+            spreadsheet_url,
+            [
+                WorksheetTarget("Score", df, start_address=(2, 1), copy_head=False),
+                WorksheetTarget("Data date", update_time_df, start_address=(2, 1)),
+            ],
+        )
     """
-    client = get_google_sheet_client()
-    spreadsheet = client.open_by_url(spreadsheet_url)
-    worksheet = spreadsheet.worksheet_by_title(worksheet_title)
-
-    # Used to generate a list of object-type-column range
-    # e.g. ["A2:A524", "B2:B524", "D2:D524"]
-    # worksheet.apply_format() effect only on row 2 to row 524 of column label A, etc.
-    # Column index start from 1, e.g. pygsheets.Address((0, 1)).label -> A
-    object_type_column_range_list = []
-    for column_number, column_type in enumerate(df.dtypes):
-        if column_type != "object":
-            continue
+    spreadsheet = get_spreadsheet(spreadsheet_url)
+    range_count = write_dataframes_diff_to_spreadsheet(spreadsheet, target_list)
+    worksheet_titles = ", ".join(target.worksheet_title for target in target_list)
+    print(f"{worksheet_titles}: {range_count} changed ranges written")
 
-        column_start_row_label = pygsheets.Address(
-            (start_address[0], column_number + 1),
-        ).label
-        column_end_row_label = pygsheets.Address(
-            (df.shape[0] + start_address[0] - 1, column_number + 1),
-        ).label
-        object_type_column_range_list.append(
-            f"{column_start_row_label}:{column_end_row_label}",
-        )
 
-    # Upload Dataframe to let GoogleSheets generate new cells
-    worksheet.set_dataframe(df=df, start=start_address, copy_head=copy_head)
-
-    # Type of columns can be configured only if cells exist
-    if object_type_column_range_list:
-        worksheet.apply_format(
-            object_type_column_range_list,
-            format_info={
-                "numberFormat": {
-                    "type": pygsheets.FormatType.TEXT.value,
-                },
-            },
-        )
+def load_dataframe_to_google_sheets_worksheet(
+    df: pd.DataFrame,
+    spreadsheet_url: str,
+    worksheet_title: str,
+    start_address: tuple[int, int],
+    copy_head: bool = True,
+) -> None:
+    """
+    Load DataFrame to GoogleSheets, sending only the cells which changed.
+    Same as `publish_dataframes_to_google_sheets()` with a single target.
 
-        # Upload DataFrame again, then cells will follow the types configured in the last step
-        worksheet.set_dataframe(df=df, start=start_address, copy_head=copy_head)
+    :param start_address:   (2, 1) denote writing data from 2nd row and column A on Worksheet
+    """
+    publish_dataframes_to_google_sheets(
+        spreadsheet_url,
+        [WorksheetTarget(worksheet_title, df, start_address, copy_head)],
+    )
 
 
 def e_gsheet_to_df(gsheet_url: str, worksheet_title: str | None = None) -> pd.DataFrame:
     """Return DataFrame from a specified Google Sheets worksheet."""
-    gc = get_google_sheet_client()
-    sheet = gc.open_by_url(gsheet_url)
+    sheet = get_spreadsheet(gsheet_url)
     if worksheet_title:
         return sheet.worksheet_by_title(worksheet_title).get_as_df(numerize=False)
     return sheet.sheet1.get_as_df(numerize=False)
@@ -0,0 +1,244 @@
+"""
+Per-host rate limiting for HTTP crawlers.
+
+Each host gets a token bucket (requests per second) and an AIMD concurrency limit:
+    - Healthy responses increase the rate and the concurrency additively.
+    - 429/503 responses, connection errors or rising latency cut both multiplicatively.
+
+All threads in the process share the limiter of a host, so concurrent crawlers
+running against the same host are throttled together.
+
+>>> response = rate_limited_get("https://browser.geekbench.com/v6/cpu/12479005")
+>>> print(get_rate_limiter_metrics())
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+THROTTLE_STATUS_CODES = {429, 503}
+
+DEFAULT_TIMEOUT_SECONDS = 30
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+# A response is considered slow if its latency exceeds the baseline by this factor
+LATENCY_TOLERANCE = 2.0
+# Weight of the latest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+    def set_rate(self, rate: float) -> None:
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+
+class AimdConcurrencyLimiter:
+    def __init__(
+        self,
+        initial_limit: float = 2,
+        min_limit: float = 1,
+        max_limit: float = 16,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        self.limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, healthy: bool) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            if healthy:
+                # Additive increase: about +1 per `limit` healthy responses
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            else:
+                self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            self._condition.notify_all()
+
+
+class HostRateLimiter:
+    def __init__(
+        self,
+        host: str,
+        initial_rate: float = 2,
+        min_rate: float = 0.2,
+        max_rate: float = 10,
+        rate_increase: float = 0.1,
+        initial_concurrency: float = 2,
+        max_concurrency: float = 16,
+    ) -> None:
+        self.host = host
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_increase = rate_increase
+        self.token_bucket = TokenBucket(rate=initial_rate, capacity=max(1, initial_rate))
+        self.concurrency = AimdConcurrencyLimiter(
+            initial_limit=initial_concurrency,
+            max_limit=max_concurrency,
+        )
+        self._lock = threading.Lock()
+        self._latency_ewma: float | None = None
+        self._latency_baseline: float | None = None
+        self._request_count = 0
+        self._throttled_count = 0
+        self._slow_count = 0
+        self._error_count = 0
+
+    def acquire(self) -> None:
+        self.concurrency.acquire()
+        self.token_bucket.acquire()
+
+    def _is_slow(self, latency: float) -> bool:
+        if self._latency_ewma is None:
+            self._latency_ewma = latency
+        else:
+            self._latency_ewma += LATENCY_EWMA_ALPHA * (latency - self._latency_ewma)
+
+        if self._latency_baseline is None or self._latency_ewma < self._latency_baseline:
+            self._latency_baseline = self._latency_ewma
+            return False
+        return self._latency_ewma > self._latency_baseline * LATENCY_TOLERANCE
+
+    def release(self, latency: float, status_code: int | None) -> None:
+        """Release the slot taken by `acquire()` and adapt to the response."""
+        with self._lock:
+            self._request_count += 1
+            throttled = status_code in THROTTLE_STATUS_CODES
+            if status_code is None:
+                self._error_count += 1
+            elif throttled:
+                self._throttled_count += 1
+            slow = self._is_slow(latency)
+            if slow:
+                self._slow_count += 1
+            healthy = status_code is not None and not throttled and not slow
+
+            rate = self.token_bucket.rate
+            if healthy:
+                rate = min(self.max_rate, rate + self.rate_increase)
+            else:
+                rate = max(self.min_rate, rate * self.concurrency.decrease_factor)
+                # Drop the baseline, so the sustained latency after backing off becomes healthy
+                self._latency_baseline = None
+            self.token_bucket.set_rate(rate)
+
+        self.concurrency.release(healthy)
+
+    def metrics(self) -> dict[str, float | int | str | None]:
+        with self._lock:
+            return {
+                "host": self.host,
+                "rate_per_second": round(self.token_bucket.rate, 3),
+                "tokens": round(self.token_bucket.tokens, 3),
+                "concurrency_limit": round(self.concurrency.limit, 3),
+                "in_flight": self.concurrency.in_flight,
+                "latency_ewma_seconds": self._latency_ewma,
+                "latency_baseline_seconds": self._latency_baseline,
+                "request_count": self._request_count,
+                "throttled_count": self._throttled_count,
+                "slow_count": self._slow_count,
+                "error_count": self._error_count,
+            }
+
+
+_host_rate_limiter_map: dict[str, HostRateLimiter] = {}
+_host_rate_limiter_map_lock = threading.Lock()
+
+
+def get_host_rate_limiter(host: str) -> HostRateLimiter:
+    with _host_rate_limiter_map_lock:
+        if host not in _host_rate_limiter_map:
+            _host_rate_limiter_map[host] = HostRateLimiter(host)
+        return _host_rate_limiter_map[host]
+
+
+def get_rate_limiter_metrics() -> list[dict[str, float | int | str | None]]:
+    with _host_rate_limiter_map_lock:
+        host_rate_limiter_list = list(_host_rate_limiter_map.values())
+    return [host_rate_limiter.metrics() for host_rate_limiter in host_rate_limiter_list]
+
+
+def _get_backoff_seconds(attempt: int, response: requests.Response | None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX_SECONDS)
+    return min(BACKOFF_BASE_SECONDS * 2**attempt, BACKOFF_MAX_SECONDS)
+
+
+def rate_limited_get(
+    url: str,
+    max_retries: int = DEFAULT_MAX_RETRIES,
+    **kwargs,
+) -> requests.Response:
+    """
+    Same as `requests.get`, but throttled by the limiter of the URL's host.
+
+    Retries with exponential backoff (or `Retry-After`) on 429/503 and connection errors.
+    Raises `requests.HTTPError` if the last retry is still answered with 429/503, so a
+    throttled page is never parsed as an empty one. Other responses are returned as-is.
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT_SECONDS)
+    host_rate_limiter = get_host_rate_limiter(urlparse(url).netloc)
+
+    for attempt in range(max_retries + 1):
+        host_rate_limiter.acquire()
+        start_time = time.monotonic()
+        try:
+            response = requests.get(url, **kwargs)
+        except requests.RequestException:
+            host_rate_limiter.release(time.monotonic() - start_time, None)
+            if attempt == max_retries:
+                raise
+            time.sleep(_get_backoff_seconds(attempt, None))
+            continue
+
+        host_rate_limiter.release(time.monotonic() - start_time, response.status_code)
+        if response.status_code not in THROTTLE_STATUS_CODES:
+            return response
+        if attempt == max_retries:
+            response.raise_for_status()
+        time.sleep(_get_backoff_seconds(attempt, response))
@@ -0,0 +1,215 @@
+"""
+Incremental replication of the geekbench tables from PostgreSQL to BigQuery.
+
+Every run streams the rows after the watermarks of each table through a server-side
+cursor, as Arrow record batches, into WRITE_APPEND Parquet load jobs. The watermarks
+move in `bigquery_replication_watermarks` (PostgreSQL) only after all load jobs of the
+table are done, so the cost of a run is in the new rows, not the table size.
+
+Watermarks:
+- `cpu_model_results`: the largest `cpu_result_id` per `cpu_model_id`. Results of a
+  CPU model are crawled in upload order, but the CPU models are not crawled together,
+  so new rows of one model can have ids below those of another.
+- `cpu_model_details`: the identity column `detail_id`, as details are sampled in any
+  `cpu_result_id` order.
+- `cpu_model_names`, `system_names`, `platform_names`: their identity id.
+
+Identity values are taken when rows are inserted but become visible when the transaction
+commits, so with two writers a row can commit after a row with a larger id has been read
+and the watermark moved past it. The rows of these tables are therefore read only up to
+`get_committed_max_id()`, taken under a SHARE lock which waits for the transactions
+writing the table: every row inserted after it has a larger id. The lock is held only for
+the read of the maximum, and delays writers by at most that long.
+
+The replication is append-only and at-least-once:
+- Updates and deletes in PostgreSQL (e.g. the cleanup of duplicated results) are not
+  replicated. Details deleted and inserted again by a reparse get a new `detail_id`
+  and are appended again, so keep the largest `detail_id` per `cpu_result_id`.
+- A run that fails after some load jobs are done appends their rows again next run.
+"""
+
+import os
+import time
+from collections.abc import Iterable, Iterator
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from dotenv import load_dotenv
+from google.cloud.bigquery import Client as BigQueryClient
+
+from utils.common.bigquery_utility import iter_arrow_chunks, load_arrow_chunks_to_bigquery
+from utils.geekbench_report.database_helper import (
+    get_committed_max_id,
+    get_replication_watermark_map,
+    iter_new_result_record_batches,
+    iter_record_batches_after_id,
+    upsert_replication_watermarks,
+)
+from utils.geekbench_report.dtypes import (
+    DETAIL_JSON_COLUMN_LIST,
+    NAME_DTYPES,
+    REPLICATED_DETAIL_DTYPES,
+)
+
+load_dotenv()
+
+# e.g. "my-project.geekbench_report", or a dataset of the client's project
+GEEKBENCH_REPORT_BIGQUERY_DATASET = os.getenv("GEEKBENCH_REPORT_BIGQUERY_DATASET")
+
+# watermark_key of tables with a single watermark
+TABLE_WATERMARK_KEY = 0
+# watermark_key of `cpu_model_results` rows without cpu_model_id
+NULL_CPU_MODEL_WATERMARK_KEY = -1
+
+# (table_name, id_column) of the name dimensions
+NAME_TABLE_LIST = [
+    ("cpu_model_names", "cpu_model_id"),
+    ("system_names", "system_id"),
+    ("platform_names", "platform_id"),
+]
+
+DETAIL_COLUMN_LIST = [
+    "detail_id",
+    "cpu_result_id",
+    "title",
+    "upload_date",
+    "views",
+    "cpu_model_id",
+    "cpu_codename",
+    "single_core_score",
+    "multi_core_score",
+    *[f"{column}::text as {column}" for column in DETAIL_JSON_COLUMN_LIST],
+]
+
+
+def _iter_tracking_watermarks(
+    batches: Iterable[pa.RecordBatch],
+    id_column: str,
+    key_column: str | None,
+    watermark_map: dict[int, int],
+) -> Iterator[pa.RecordBatch]:
+    """
+    Yield the batches, raising `watermark_map` to the largest `id_column` per value of
+    `key_column` (or to TABLE_WATERMARK_KEY without one) of every batch read.
+    """
+    for batch in batches:
+        if batch.num_rows == 0:
+            continue
+        if key_column is None:
+            last_id_map = {TABLE_WATERMARK_KEY: pc.max(batch[id_column]).as_py()}
+        else:
+            last_id_table = (
+                pa.Table.from_batches([batch]).group_by(key_column).aggregate([(id_column, "max")])
+            )
+            last_id_map = {
+                NULL_CPU_MODEL_WATERMARK_KEY if key is None else key: last_id
+                for key, last_id in zip(
+                    last_id_table[key_column].to_pylist(),
+                    last_id_table[f"{id_column}_max"].to_pylist(),
+                )
+            }
+        for key, last_id in last_id_map.items():
+            if last_id is not None and last_id > watermark_map.get(key, 0):
+                watermark_map[key] = last_id
+        yield batch
+
+
+def _replicate_batches(
+    bigquery_client: BigQueryClient,
+    batches: Iterable[pa.RecordBatch],
+    table_name: str,
+    id_column: str,
+    key_column: str | None,
+    watermark_map: dict[int, int],
+    dataset: str,
+) -> int:
+    """
+    Append the batches to `{dataset}.{table_name}`, then save the watermarks they moved.
+    Return the number of rows appended.
+    """
+    start_time = time.perf_counter()
+    new_watermark_map = dict(watermark_map)
+    result_list = load_arrow_chunks_to_bigquery(
+        bigquery_client,
+        iter_arrow_chunks(
+            _iter_tracking_watermarks(batches, id_column, key_column, new_watermark_map)
+        ),
+        f"{dataset}.{table_name}",
+        "WRITE_APPEND",
+    )
+    upsert_replication_watermarks(
+        table_name,
+        {
+            key: last_id
+            for key, last_id in new_watermark_map.items()
+            if watermark_map.get(key) != last_id
+        },
+    )
+    row_count = sum(result.row_count for result in result_list)
+    print(
+        f"Appended {row_count} rows of {table_name} with {len(result_list)} load jobs "
+        f"in {time.perf_counter() - start_time:.1f} s"
+    )
+    return row_count
+
+
+def replicate_name_tables(bigquery_client: BigQueryClient, dataset: str) -> int:
+    """Replicate new rows of the name dimensions. Return the number of rows appended."""
+    row_count = 0
+    for table_name, id_column in NAME_TABLE_LIST:
+        watermark_map = get_replication_watermark_map(table_name)
+        column_list = [id_column, id_column.removesuffix("_id")]
+        batches = iter_record_batches_after_id(
+            table_name,
+            column_list,
+            id_column,
+            watermark_map.get(TABLE_WATERMARK_KEY, 0),
+            dtypes={column: NAME_DTYPES[column] for column in column_list},
+            until_id=get_committed_max_id(table_name, id_column),
+        )
+        row_count += _replicate_batches(
+            bigquery_client, batches, table_name, id_column, None, watermark_map, dataset
+        )
+    return row_count
+
+
+def replicate_cpu_model_results(bigquery_client: BigQueryClient, dataset: str) -> int:
+    """Replicate new rows of `cpu_model_results`. Return the number of rows appended."""
+    watermark_map = get_replication_watermark_map("cpu_model_results")
+    return _replicate_batches(
+        bigquery_client,
+        iter_new_result_record_batches(watermark_map),
+        "cpu_model_results",
+        "cpu_result_id",
+        "cpu_model_id",
+        watermark_map,
+        dataset,
+    )
+
+
+def replicate_cpu_model_details(bigquery_client: BigQueryClient, dataset: str) -> int:
+    """Replicate new rows of `cpu_model_details`. Return the number of rows appended."""
+    watermark_map = get_replication_watermark_map("cpu_model_details")
+    batches = iter_record_batches_after_id(
+        "cpu_model_details",
+        DETAIL_COLUMN_LIST,
+        "detail_id",
+        watermark_map.get(TABLE_WATERMARK_KEY, 0),
+        dtypes=REPLICATED_DETAIL_DTYPES,
+        until_id=get_committed_max_id("cpu_model_details", "detail_id"),
+    )
+    return _replicate_batches(
+        bigquery_client, batches, "cpu_model_details", "detail_id", None, watermark_map, dataset
+    )
+
+
+def replicate_pg_to_bigquery(bigquery_client: BigQueryClient, dataset: str) -> int:
+    """
+    Replicate new rows of every table, dimensions first so that new facts find their
+    names. Return the number of rows appended.
+    """
+    return (
+        replicate_name_tables(bigquery_client, dataset)
+        + replicate_cpu_model_results(bigquery_client, dataset)
+        + replicate_cpu_model_details(bigquery_client, dataset)
+    )
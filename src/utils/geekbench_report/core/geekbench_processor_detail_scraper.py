@@ -1,13 +1,27 @@
+import re
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
+from html import unescape
 
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+from utils.common.rate_limiter import rate_limited_get
+from utils.geekbench_report.html_archive import archive_html
 
 BASE_URL = "https://browser.geekbench.com/v6/cpu/{cpu_result_id}"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
 }
 
+# Only these elements of a detail page are built into the parse tree
+# (the class attribute is still an unsplit string while parsing)
+DETAIL_PAGE_STRAINER = SoupStrainer(
+    attrs={"class": re.compile(r"(?:^|\s)(?:score-container|system-table|benchmark-table)(?:\s|$)")}
+)
+TITLE_PATTERN = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
 
 @dataclass
 class GeekbenchProcessorDetail:
@@ -38,18 +52,6 @@ class GeekbenchProcessorDetailScraper:
     def _get_detail_url(self) -> str:
         return BASE_URL.format(cpu_result_id=self.cpu_result_id)
 
-    def _parse_table(self, soup, index: int) -> dict[str, str]:
-        """Extract a key-value table based on class 'system-table' by index."""
-        data = {}
-        rows = soup.select("table.system-table")[index].select("tbody tr")
-        for row in rows:
-            cells = row.find_all("td")
-            if len(cells) == 2:
-                key = cells[0].get_text(strip=True)
-                value = cells[1].get_text(strip=True)
-                data[key] = value
-        return data
-
     def _parse_benchmark_table(self, table) -> dict[str, dict[str, str]]:
         benchmarks = {}
         for row in table.select("tbody tr"):
@@ -63,62 +65,119 @@ class GeekbenchProcessorDetailScraper:
                 benchmarks[name] = {"score": score, "description": description}
         return benchmarks
 
-    def scrape_detail_page(self) -> GeekbenchProcessorDetail:
-        response = requests.get(self._get_detail_url(), headers=HEADERS)
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        # Extract title
-        title = soup.title.string.strip() if soup.title else None
-
-        # Extract scores
-        score_tags = soup.select(".score-container .score")
-        single_core_score = score_tags[0].text.strip() if len(score_tags) > 0 else None
-        multi_core_score = score_tags[1].text.strip() if len(score_tags) > 1 else None
-
-        # Upload date and views
-        def get_value(label: str) -> str | None:
-            td = soup.find("td", class_="system-name", string=label)
-            return td.find_next_sibling("td").get_text(strip=True) if td else None
-
-        upload_date = get_value("Upload Date")
-        views = get_value("Views")
+    def parse_detail_page(self, html: str) -> GeekbenchProcessorDetail:
+        """
+        Parse a detail page in a single pass.
+
+        Only the title, score containers, system tables and benchmark tables are
+        built into the parse tree, then each of them is walked once.
+        """
+        title_match = TITLE_PATTERN.search(html)
+        title = unescape(title_match.group(1)).strip() if title_match else None
+
+        soup = BeautifulSoup(html, "html.parser", parse_only=DETAIL_PAGE_STRAINER)
+
+        score_list = []
+        system_table_list = []
+        benchmark_table_list = []
+        upload_date = None
+        views = None
+        for element in soup.find_all(recursive=False):
+            element_class_list = element.get("class", [])
+            if "score-container" in element_class_list:
+                score_list.extend(
+                    score_tag.text.strip() for score_tag in element.find_all(class_="score")
+                )
+            elif "benchmark-table" in element_class_list:
+                benchmark_table_list.append(self._parse_benchmark_table(element))
+            elif "system-table" in element_class_list:
+                # Key-value rows, e.g. "Upload Date" and "Views" in the first table
+                data = {}
+                for row in element.select("tbody tr"):
+                    cells = row.find_all("td")
+                    if len(cells) != 2:
+                        continue
+                    key = cells[0].get_text(strip=True)
+                    value = cells[1].get_text(strip=True)
+                    data[key] = value
+                    if "system-name" in cells[0].get("class", []):
+                        if key == "Upload Date" and upload_date is None:
+                            upload_date = value
+                        elif key == "Views" and views is None:
+                            views = value
+                system_table_list.append(data)
 
         # System / CPU / Memory tables (by known indexes)
-        system_info = self._parse_table(soup, 1)
-        cpu_info = self._parse_table(soup, 2)
-        memory_info = self._parse_table(soup, 3)
-
-        cpu_codename = cpu_info.get("Codename")
-        # cpu_model = cpu_info.get("Name")
-
-        # Benchmarks
-        benchmark_tables = soup.select("table.benchmark-table")
-        single_core_benchmarks = (
-            self._parse_benchmark_table(benchmark_tables[0])
-            if len(benchmark_tables) > 0
-            else {}
-        )
-        multi_core_benchmarks = (
-            self._parse_benchmark_table(benchmark_tables[1])
-            if len(benchmark_tables) > 1
-            else {}
-        )
+        system_info = system_table_list[1]
+        cpu_info = system_table_list[2]
+        memory_info = system_table_list[3]
 
         return GeekbenchProcessorDetail(
             cpu_result_id=self.cpu_result_id,
             title=title,
             upload_date=upload_date,
             views=views,
-            cpu_codename=cpu_codename,
-            single_core_score=single_core_score,
-            multi_core_score=multi_core_score,
+            cpu_codename=cpu_info.get("Codename"),
+            single_core_score=score_list[0] if len(score_list) > 0 else None,
+            multi_core_score=score_list[1] if len(score_list) > 1 else None,
             system_info=system_info,
             cpu_info=cpu_info,
             memory_info=memory_info,
-            single_core_benchmarks=single_core_benchmarks,
-            multi_core_benchmarks=multi_core_benchmarks,
+            single_core_benchmarks=(
+                benchmark_table_list[0] if len(benchmark_table_list) > 0 else {}
+            ),
+            multi_core_benchmarks=(
+                benchmark_table_list[1] if len(benchmark_table_list) > 1 else {}
+            ),
         )
 
+    def scrape_detail_page(self) -> GeekbenchProcessorDetail:
+        response = rate_limited_get(self._get_detail_url(), headers=HEADERS)
+        response.raise_for_status()
+        archive_html(self._get_detail_url(), response.text)
+        return self.parse_detail_page(response.text)
+
+
+def scrape_detail_page_with_retry(
+    cpu_result_id: str | int,
+    max_retries: int = 2,
+) -> GeekbenchProcessorDetail:
+    """Scrape one detail page, retrying on any error (HTTP or parsing)."""
+    for attempt in range(max_retries + 1):
+        try:
+            return GeekbenchProcessorDetailScraper(cpu_result_id).scrape_detail_page()
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(2**attempt)
+
+
+def scrape_detail_pages_concurrently(
+    cpu_result_id_list: Iterable[str | int],
+    max_workers: int = 8,
+    max_retries: int = 2,
+) -> Iterator[tuple[str | int, GeekbenchProcessorDetail | None, Exception | None]]:
+    """
+    Scrape detail pages with at most `max_workers` pages in flight.
+
+    Yields `(cpu_result_id, detail, None)` or `(cpu_result_id, None, error)`
+    as soon as each page finishes, so one failed page does not affect the others.
+    The request rate is still bounded by the shared host rate limiter.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        future_map = {
+            executor.submit(scrape_detail_page_with_retry, cpu_result_id, max_retries): (
+                cpu_result_id
+            )
+            for cpu_result_id in cpu_result_id_list
+        }
+        for future in as_completed(future_map):
+            cpu_result_id = future_map[future]
+            try:
+                yield cpu_result_id, future.result(), None
+            except Exception as e:
+                yield cpu_result_id, None, e
+
 
 # Example usage:
 if __name__ == "__main__":
@@ -5,9 +5,12 @@ The latest results page is the page that contains the latest 100 pages of CPUs.
 The benchmarks page is the page that contains the benchmarks of common used CPUs.
 """
 
-import requests
+from concurrent.futures import ThreadPoolExecutor
+
 from bs4 import BeautifulSoup
 
+from utils.common.rate_limiter import rate_limited_get
+
 # For latest 100 pages of results of CPUs. Parameters: page
 LATEST_RESULTS_URL = "https://browser.geekbench.com/v6/cpu?page={page}"
 
@@ -32,23 +35,41 @@ class GeekbenchProcessorNameScraper:
         """Get the total number of pages available for the CPU."""
         return self._total_pages
 
-    def scrape_latest_results_page(self, page: int) -> list[str]:
-        response = requests.get(
-            self._get_latest_results_url(page),
-            headers=HEADERS,
-        )
-        soup = BeautifulSoup(response.text, "html.parser")
+    def _parse_latest_results_page(self, html: str) -> tuple[list[str], list[int]]:
+        """Return CPU models and result IDs found on a latest results page."""
+        soup = BeautifulSoup(html, "html.parser")
         cpu_model_set = set()
+        cpu_result_id_list = []
         for entry in soup.select("div.list-col-inner"):
             cpu_info = entry.select_one("span.list-col-model")
             cpu_lines = cpu_info.text.strip().split("\n") if cpu_info else []
             cpu_model = cpu_lines[0].strip() if len(cpu_lines) > 0 else None
             cpu_model_set.add(cpu_model)
 
-        return list(cpu_model_set)
+            result_a = entry.select_one("a[href^='/v6/cpu/']")
+            cpu_result_id = result_a["href"].split("/")[-1] if result_a else ""
+            if cpu_result_id.isdigit():
+                cpu_result_id_list.append(int(cpu_result_id))
+
+        return list(cpu_model_set), cpu_result_id_list
+
+    def _scrape_latest_results_page_with_result_ids(self, page: int) -> tuple[list[str], list[int]]:
+        response = rate_limited_get(
+            self._get_latest_results_url(page),
+            headers=HEADERS,
+        )
+        response.raise_for_status()
+        return self._parse_latest_results_page(response.text)
+
+    def scrape_latest_results_page(self, page: int) -> list[str]:
+        cpu_model_list, _ = self._scrape_latest_results_page_with_result_ids(page)
+        return cpu_model_list
 
     def scrape_latest_results_multiple_pages(
-        self, start_page: int = 1, end_page: int | None = None
+        self,
+        start_page: int = 1,
+        end_page: int | None = None,
+        max_workers: int = 8,
     ) -> list[str]:
         if end_page is None:
             end_page = TOTAL_PAGES_OF_LATEST_RESULTS
@@ -59,14 +80,63 @@ class GeekbenchProcessorNameScraper:
             end_page = TOTAL_PAGES_OF_LATEST_RESULTS
 
         all_results = []
-        for page in range(start_page, end_page + 1):
-            results = self.scrape_latest_results_page(page)
-            all_results.extend(results)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for results in executor.map(
+                self.scrape_latest_results_page,
+                range(start_page, end_page + 1),
+            ):
+                all_results.extend(results)
 
         return list(set(all_results))
 
+    def scrape_latest_results_until_result_id(
+        self,
+        last_cpu_result_id: int | None,
+        max_workers: int = 8,
+    ) -> tuple[list[str], int | None]:
+        """
+        Scrape latest results pages until reaching a result seen in the last run.
+
+        Pages are fetched in waves of 1, 2, 4, ... up to `max_workers` pages, so a run
+        with few new results costs few requests.
+        Without `last_cpu_result_id`, all pages are scraped.
+
+        Returns:
+            CPU models found, and the newest result ID to pass to the next run
+        """
+        all_results = []
+        newest_cpu_result_id = last_cpu_result_id
+        page = 1
+        wave_size = 1
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while page <= TOTAL_PAGES_OF_LATEST_RESULTS:
+                page_list = list(
+                    range(page, min(page + wave_size, TOTAL_PAGES_OF_LATEST_RESULTS + 1))
+                )
+                reached_seen_result = False
+                for cpu_model_list, cpu_result_id_list in executor.map(
+                    self._scrape_latest_results_page_with_result_ids,
+                    page_list,
+                ):
+                    all_results.extend(cpu_model_list)
+                    if not cpu_result_id_list:
+                        continue
+                    newest_cpu_result_id = max(newest_cpu_result_id or 0, max(cpu_result_id_list))
+                    if last_cpu_result_id is not None and (
+                        min(cpu_result_id_list) <= last_cpu_result_id
+                    ):
+                        reached_seen_result = True
+
+                if reached_seen_result:
+                    break
+                page += len(page_list)
+                wave_size = min(wave_size * 2, max_workers)
+
+        return list(set(all_results)), newest_cpu_result_id
+
     def scrape_benchmarks_page(self) -> list[str]:
-        response = requests.get(BENCHMARKS_URL, headers=HEADERS)
+        response = rate_limited_get(BENCHMARKS_URL, headers=HEADERS)
+        response.raise_for_status()
         soup = BeautifulSoup(response.text, "html.parser")
         cpu_model_set = set()
         for entry in soup.select("tbody tr td.name"):
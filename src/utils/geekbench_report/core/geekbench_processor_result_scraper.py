@@ -2,9 +2,12 @@ from dataclasses import dataclass
 from datetime import datetime
 
 import pandas as pd
-import requests
 from bs4 import BeautifulSoup
 
+from utils.common.rate_limiter import rate_limited_get
+from utils.geekbench_report.dtypes import SCRAPED_RESULT_DTYPES, apply_dtypes
+from utils.geekbench_report.html_archive import archive_html
+
 BASE_URL = "https://browser.geekbench.com/search"
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
@@ -146,9 +149,10 @@ class GeekbenchProcessorResultScraper:
         if self._total_pages is not None:
             return self._total_pages
 
-        response = requests.get(
+        response = rate_limited_get(
             self._get_base_url(), headers=HEADERS, params=self._get_params(1)
         )
+        response.raise_for_status()
         soup = BeautifulSoup(response.text, "html.parser")
 
         # Find pagination info
@@ -181,18 +185,24 @@ class GeekbenchProcessorResultScraper:
             )
             return min(self.get_total_pages(), self.max_pages)
 
+    def parse_page(self, html: str) -> list[GeekbenchProcessorResult]:
+        """Parse a single page of results."""
+        soup = BeautifulSoup(html, "html.parser")
+        result_div = soup.select('div[class="row"] div[class="col-12 col-lg-9"] div')[1]
+        entries = result_div.select('div[class="col-12 list-col"]')
+
+        return [self._parse_entry(entry) for entry in entries]
+
     def scrape_page(self, page: int) -> list[GeekbenchProcessorResult]:
         """Scrape a single page of results."""
-        response = requests.get(
+        response = rate_limited_get(
             self._get_base_url(),
             headers=HEADERS,
             params=self._get_params(page),
         )
-        soup = BeautifulSoup(response.text, "html.parser")
-        result_div = soup.select('div[class="row"] div[class="col-12 col-lg-9"] div')[1]
-        entries = result_div.select('div[class="col-12 list-col"]')
-
-        return [self._parse_entry(entry) for entry in entries]
+        response.raise_for_status()
+        archive_html(response.url, response.text)
+        return self.parse_page(response.text)
 
     def scrape_multiple_pages(
         self,
@@ -222,7 +232,10 @@ class GeekbenchProcessorResultScraper:
             results = self.scrape_page(page)
             all_results.extend(results)
 
-        return pd.DataFrame([vars(result) for result in all_results])
+        return apply_dtypes(
+            pd.DataFrame([vars(result) for result in all_results]),
+            SCRAPED_RESULT_DTYPES,
+        )
 
     def scrape_multiple_pages_until_max_page(self) -> pd.DataFrame:
         if self.max_pages is None:
@@ -257,7 +270,10 @@ class GeekbenchProcessorResultScraper:
 
             all_results.extend(filtered_results)
 
-        return pd.DataFrame([vars(result) for result in all_results])
+        return apply_dtypes(
+            pd.DataFrame([vars(result) for result in all_results]),
+            SCRAPED_RESULT_DTYPES,
+        )
 
 
 # Example usage
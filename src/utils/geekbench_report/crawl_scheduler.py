@@ -0,0 +1,146 @@
+"""
+Adaptive crawl scheduler for CPU model results.
+
+Every CPU model gets an upload rate estimated from its history in `cpu_model_results`.
+The rate decides how often the model is revisited and how it is prioritized,
+so the request volume goes to models that actually have new results.
+
+Crawl state (when each model was crawled last time) is kept in a local JSON file.
+If the file is lost, every model is considered due and the next run is a full crawl.
+"""
+
+import json
+import math
+import os
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+CRAWL_STATE_FILE_PATH = "/tmp/sync_cpu_model_result_crawl_state.json"
+
+# Number of results shown on one page of https://browser.geekbench.com/search
+RESULTS_PER_PAGE = 25
+
+# Uploads in the latest `RATE_WINDOW_DAYS` days are used to estimate the upload rate
+RATE_WINDOW_DAYS = 90
+
+# Pseudo count of uploads in the window, so a model without recent uploads
+# still gets a small rate and is revisited eventually.
+PRIOR_UPLOAD_COUNT = 1
+
+MIN_REVISIT_INTERVAL = timedelta(hours=6)
+MAX_REVISIT_INTERVAL = timedelta(days=30)
+
+
+@dataclass
+class CpuModelCrawlPlan:
+    cpu_model: str
+    last_uploaded: datetime
+    last_crawled: datetime | None
+    upload_rate_per_day: float
+    revisit_interval: timedelta
+    expected_new_results: float
+    estimated_requests: int
+
+
+def read_crawl_state() -> dict[str, datetime]:
+    """Return a dict with key as cpu_model and value as the last crawled time."""
+    if not os.path.exists(CRAWL_STATE_FILE_PATH):
+        return {}
+    with open(CRAWL_STATE_FILE_PATH, "r") as f:
+        try:
+            return {
+                cpu_model: datetime.fromisoformat(last_crawled)
+                for cpu_model, last_crawled in json.load(f).items()
+            }
+        except Exception:
+            return {}
+
+
+def write_crawl_state(crawl_state: dict[str, datetime]) -> None:
+    with open(CRAWL_STATE_FILE_PATH, "w") as f:
+        json.dump(
+            {
+                cpu_model: last_crawled.isoformat()
+                for cpu_model, last_crawled in crawl_state.items()
+            },
+            f,
+        )
+
+
+def estimate_upload_rate_per_day(recent_upload_count: int) -> float:
+    return (recent_upload_count + PRIOR_UPLOAD_COUNT) / RATE_WINDOW_DAYS
+
+
+def get_revisit_interval(upload_rate_per_day: float) -> timedelta:
+    """Revisit a model when about one page of new results is expected."""
+    revisit_interval = timedelta(days=RESULTS_PER_PAGE / upload_rate_per_day)
+    return min(max(revisit_interval, MIN_REVISIT_INTERVAL), MAX_REVISIT_INTERVAL)
+
+
+def estimate_requests(expected_new_results: float) -> int:
+    # One request for detecting total pages, then the result pages themselves.
+    return 1 + max(1, math.ceil(expected_new_results / RESULTS_PER_PAGE))
+
+
+def plan_cpu_model_crawl(
+    upload_stats_df: pd.DataFrame,
+    crawl_state: dict[str, datetime],
+    now: datetime | None = None,
+    request_budget: int | None = None,
+) -> list[CpuModelCrawlPlan]:
+    """
+    Return the CPU models due for crawling, the most promising first.
+
+    :param upload_stats_df: Columns `cpu_model`, `last_uploaded` and `recent_upload_count`.
+                            See `get_cpu_model_upload_stats_df()`.
+    :param crawl_state:     Last crawled time of each cpu_model. See `read_crawl_state()`.
+    :param request_budget:  Stop planning when the estimated requests exceed this number.
+                            Models skipped by the budget stay due for the next run.
+    """
+    if now is None:
+        now = datetime.now()
+
+    crawl_plan_list = []
+    for row in upload_stats_df.itertuples(index=False):
+        last_uploaded = pd.to_datetime(row.last_uploaded).to_pydatetime()
+        last_crawled = crawl_state.get(row.cpu_model)
+        upload_rate_per_day = estimate_upload_rate_per_day(row.recent_upload_count)
+        revisit_interval = get_revisit_interval(upload_rate_per_day)
+
+        if last_crawled is not None and now - last_crawled < revisit_interval:
+            continue
+
+        elapsed = now - (last_crawled or last_uploaded)
+        expected_new_results = upload_rate_per_day * max(elapsed / timedelta(days=1), 0)
+
+        crawl_plan_list.append(
+            CpuModelCrawlPlan(
+                cpu_model=row.cpu_model,
+                last_uploaded=last_uploaded,
+                last_crawled=last_crawled,
+                upload_rate_per_day=upload_rate_per_day,
+                revisit_interval=revisit_interval,
+                expected_new_results=expected_new_results,
+                estimated_requests=estimate_requests(expected_new_results),
+            )
+        )
+
+    # Never crawled models first, then by the number of expected new results
+    crawl_plan_list.sort(
+        key=lambda plan: (plan.last_crawled is not None, -plan.expected_new_results)
+    )
+
+    if request_budget is None:
+        return crawl_plan_list
+
+    budgeted_crawl_plan_list = []
+    used_requests = 0
+    for plan in crawl_plan_list:
+        if used_requests + plan.estimated_requests > request_budget:
+            continue
+        budgeted_crawl_plan_list.append(plan)
+        used_requests += plan.estimated_requests
+
+    return budgeted_crawl_plan_list
@@ -1,15 +1,26 @@
+import io
+import json
 import os
+from collections.abc import Iterator
 from datetime import datetime
 from typing import Literal
 
 import pandas as pd
+import pyarrow as pa
 from dotenv import load_dotenv
 from sqlalchemy import text
 
 from utils.common.database_utility import get_postgresql_conn
+from utils.geekbench_report.dtypes import (
+    EXPORT_RESULT_DTYPES,
+    RESULT_DTYPES,
+    SCORE_REPORT_DTYPES,
+    apply_dtypes,
+)
 from utils.geekbench_report.sql.mart_average_score_and_benchmark_score import (
     sql as score_report_sql,
 )
+from utils.geekbench_report.sql.migrate_compact_schema import sql as migrate_compact_schema_sql
 
 load_dotenv()
 
@@ -20,6 +31,9 @@ GEEKBENCH_REPORT_POSTGRESDB_PORT = os.getenv("GEEKBENCH_REPORT_POSTGRESDB_PORT")
 GEEKBENCH_REPORT_POSTGRESDB_USER = os.getenv("GEEKBENCH_REPORT_POSTGRESDB_USER")
 GEEKBENCH_REPORT_POSTGRESDB_PASSWORD = os.getenv("GEEKBENCH_REPORT_POSTGRESDB_PASSWORD")
 
+# Rows fetched per round trip of the server-side cursor of the read helpers
+READ_CHUNKSIZE = 100_000
+
 
 def load_df_to_pg(
     df: pd.DataFrame,
@@ -41,7 +55,11 @@ def load_df_to_pg(
         )
 
 
-def get_cpu_model_name_list_from_pg() -> list[str]:
+def copy_df_to_pg(df: pd.DataFrame, table_name: str) -> None:
+    """
+    Bulk load DataFrame to an existing table with `COPY ... FROM STDIN`.
+    Much faster than `load_df_to_pg` for long tables, but the table must exist.
+    """
     with get_postgresql_conn(
         database=GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
         user=GEEKBENCH_REPORT_POSTGRESDB_USER,
@@ -49,14 +67,37 @@ def get_cpu_model_name_list_from_pg() -> list[str]:
         host=GEEKBENCH_REPORT_POSTGRESDB_HOST,
         port=GEEKBENCH_REPORT_POSTGRESDB_PORT,
     ) as conn:
-        sql = "select cpu_model FROM cpu_model_names"
-        return pd.read_sql(
-            sql,
-            conn,
-        )["cpu_model"].to_list()
+        with conn.begin():
+            _copy_df(conn, df, table_name)
 
 
-def get_system_name_list_from_pg() -> list[str]:
+def _copy_df(conn, df: pd.DataFrame, table_name: str) -> None:
+    """
+    `COPY ... FROM STDIN` on the DBAPI connection, in the transaction of `conn`.
+    Missing values are written as `\\N`, so empty strings stay empty strings.
+    """
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep="\\N")
+    buffer.seek(0)
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table_name} ({', '.join(df.columns)}) FROM STDIN "
+            "WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+
+
+def iter_read_sql_chunks(
+    sql: str,
+    params: dict | None = None,
+    dtypes: dict[str, str] | None = None,
+    chunksize: int = READ_CHUNKSIZE,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a query through a server-side (named) cursor, yielding DataFrame chunks
+    of at most `chunksize` rows with `dtypes` applied per chunk.
+    At least one chunk is yielded, empty with the query's columns if there are no rows.
+    """
     with get_postgresql_conn(
         database=GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
         user=GEEKBENCH_REPORT_POSTGRESDB_USER,
@@ -64,43 +105,91 @@ def get_system_name_list_from_pg() -> list[str]:
         host=GEEKBENCH_REPORT_POSTGRESDB_HOST,
         port=GEEKBENCH_REPORT_POSTGRESDB_PORT,
     ) as conn:
-        sql = "select system FROM system_names"
-        return pd.read_sql(
-            sql,
-            conn,
-        )["system"].to_list()
+        for chunk in pd.read_sql(
+            text(sql),
+            conn.execution_options(stream_results=True, max_row_buffer=chunksize),
+            params=params,
+            chunksize=chunksize,
+        ):
+            yield apply_dtypes(chunk, dtypes) if dtypes else chunk
+
+
+def iter_read_sql_record_batches(
+    sql: str,
+    params: dict | None = None,
+    dtypes: dict[str, str] | None = None,
+    chunksize: int = READ_CHUNKSIZE,
+) -> Iterator[pa.RecordBatch]:
+    """Same as `iter_read_sql_chunks`, yielding Arrow record batches."""
+    for chunk in iter_read_sql_chunks(sql, params=params, dtypes=dtypes, chunksize=chunksize):
+        yield pa.RecordBatch.from_pandas(chunk, preserve_index=False)
+
+
+def read_sql_chunked(
+    sql: str,
+    params: dict | None = None,
+    dtypes: dict[str, str] | None = None,
+    chunksize: int = READ_CHUNKSIZE,
+) -> pd.DataFrame:
+    """
+    Read a whole query through `iter_read_sql_chunks`, so at most one chunk is held
+    in default dtypes at a time.
+    """
+    df = pd.concat(
+        iter_read_sql_chunks(sql, params=params, dtypes=dtypes, chunksize=chunksize),
+        ignore_index=True,
+    )
+    # Categories of different chunks are unioned to object by concat
+    return apply_dtypes(df, dtypes) if dtypes else df
+
+
+def get_cpu_model_name_list_from_pg() -> list[str]:
+    sql = "select cpu_model FROM cpu_model_names"
+    cpu_model_list = []
+    for chunk in iter_read_sql_chunks(sql):
+        cpu_model_list.extend(chunk["cpu_model"].to_list())
+    return cpu_model_list
+
+
+def get_system_name_list_from_pg() -> list[str]:
+    sql = "select system FROM system_names"
+    system_list = []
+    for chunk in iter_read_sql_chunks(sql):
+        system_list.extend(chunk["system"].to_list())
+    return system_list
 
 
 def get_cpu_model_map_from_pg() -> dict[str, int]:
     """
     Return a dict with key as cpu_model and value as cpu_model_id.
     """
-    with get_postgresql_conn(
-        database=GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
-        user=GEEKBENCH_REPORT_POSTGRESDB_USER,
-        password=GEEKBENCH_REPORT_POSTGRESDB_PASSWORD,
-        host=GEEKBENCH_REPORT_POSTGRESDB_HOST,
-        port=GEEKBENCH_REPORT_POSTGRESDB_PORT,
-    ) as conn:
-        sql = "select cpu_model, cpu_model_id FROM cpu_model_names"
-        df = pd.read_sql(sql, conn)
-        return dict(zip(df["cpu_model"], df["cpu_model_id"]))
+    sql = "select cpu_model, cpu_model_id FROM cpu_model_names"
+    cpu_model_map = {}
+    for chunk in iter_read_sql_chunks(sql):
+        cpu_model_map.update(zip(chunk["cpu_model"], chunk["cpu_model_id"]))
+    return cpu_model_map
 
 
 def get_system_map_from_pg() -> dict[str, int]:
     """
     Return a dict with key as system and value as system_id.
     """
-    with get_postgresql_conn(
-        database=GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
-        user=GEEKBENCH_REPORT_POSTGRESDB_USER,
-        password=GEEKBENCH_REPORT_POSTGRESDB_PASSWORD,
-        host=GEEKBENCH_REPORT_POSTGRESDB_HOST,
-        port=GEEKBENCH_REPORT_POSTGRESDB_PORT,
-    ) as conn:
-        sql = "select system, system_id FROM system_names"
-        df = pd.read_sql(sql, conn)
-        return dict(zip(df["system"], df["system_id"]))
+    sql = "select system, system_id FROM system_names"
+    system_map = {}
+    for chunk in iter_read_sql_chunks(sql):
+        system_map.update(zip(chunk["system"], chunk["system_id"]))
+    return system_map
+
+
+def get_platform_map_from_pg() -> dict[str, int]:
+    """
+    Return a dict with key as platform and value as platform_id.
+    """
+    sql = "select platform, platform_id FROM platform_names"
+    platform_map = {}
+    for chunk in iter_read_sql_chunks(sql):
+        platform_map.update(zip(chunk["platform"], chunk["platform_id"]))
+    return platform_map
 
 
 def update_cpu_model_names(check_update_list: list[str]) -> None:
@@ -149,6 +238,26 @@ def update_system_names(check_update_list: list[str]) -> None:
         print("No new systems to add")
 
 
+def update_platform_names(check_update_list: list[str]) -> None:
+    """Sync platform names to PostgreSQL database."""
+    existing_platform_set = set(get_platform_map_from_pg())
+
+    # Find new platforms that need to be added
+    new_platforms = {platform for platform in check_update_list if pd.notna(platform)}
+    new_platforms -= existing_platform_set
+    if new_platforms:
+        new_df = pd.DataFrame(list(new_platforms), columns=["platform"])
+        load_df_to_pg(
+            df=new_df,
+            table_name="platform_names",
+            if_exists="append",
+        )
+        print(f"Added {len(new_platforms)} new platforms to database")
+        print(new_platforms)
+    else:
+        print("No new platforms to add")
+
+
 def get_last_updated_dates_of_cpu_model_df() -> pd.DataFrame:
     sql = """
         with last_uploaded_record as (
@@ -167,6 +276,264 @@ def get_last_updated_dates_of_cpu_model_df() -> pd.DataFrame:
         where d.cpu_model <> 'ARM'
         order by d.cpu_model_id
     """
+    return read_sql_chunked(sql)
+
+
+def get_cpu_model_upload_stats_df(rate_window_days: int = 90) -> pd.DataFrame:
+    """
+    Return last uploaded date and number of uploads in the latest `rate_window_days` days
+    of every CPU model. Used by the crawl scheduler to estimate upload rates.
+    """
+    sql = f"""
+        with upload_stats as (
+            select
+                cpu_model_id
+                , max(uploaded) as last_uploaded
+                , count(*) filter (
+                    where uploaded >= CURRENT_DATE - INTERVAL '{int(rate_window_days)} days'
+                ) as recent_upload_count
+            from cpu_model_results
+            group by cpu_model_id
+        )
+        select
+            d.cpu_model
+            , COALESCE(f.last_uploaded, CURRENT_DATE - INTERVAL '30 days') AS last_uploaded
+            , COALESCE(f.recent_upload_count, 0) AS recent_upload_count
+        from cpu_model_names d
+        left join upload_stats f
+        on d.cpu_model_id = f.cpu_model_id
+        where d.cpu_model <> 'ARM'
+        order by d.cpu_model_id
+    """
+    return read_sql_chunked(sql)
+
+
+def get_score_report_from_df() -> pd.DataFrame:
+    return read_sql_chunked(score_report_sql, dtypes=SCORE_REPORT_DTYPES)
+
+
+def get_new_cpu_model_result_ids_df(last_cpu_result_id_map: dict[int, int]) -> pd.DataFrame:
+    """
+    Return distinct (cpu_model_id, cpu_result_id) streamed in after the given watermarks.
+
+    :param last_cpu_result_id_map: Key as cpu_model_id and value as the largest
+                                   cpu_result_id seen of the CPU model.
+                                   CPU models not in the dict return all their results.
+    """
+    sql = """
+        with watermark as (
+            select
+                key::int as cpu_model_id
+                , value::bigint as last_cpu_result_id
+            from json_each_text(cast(:last_cpu_result_id_map as json))
+        )
+        select distinct
+            r.cpu_model_id,
+            r.cpu_result_id
+        from cpu_model_results r
+        left join watermark w
+        on r.cpu_model_id = w.cpu_model_id
+        where r.cpu_result_id > COALESCE(w.last_cpu_result_id, 0)
+        and r.cpu_model_id is not null
+        order by r.cpu_model_id, r.cpu_result_id
+    """
+    return read_sql_chunked(
+        sql,
+        params={
+            "last_cpu_result_id_map": json.dumps(
+                {str(k): int(v) for k, v in last_cpu_result_id_map.items()}
+            )
+        },
+        dtypes=RESULT_DTYPES,
+    )
+
+
+def get_stored_detail_result_ids_df() -> pd.DataFrame:
+    """Return (cpu_model_id, cpu_result_id) already stored in `cpu_model_details`."""
+    sql = "select cpu_model_id, cpu_result_id from cpu_model_details"
+    return read_sql_chunked(sql, dtypes=RESULT_DTYPES)
+
+
+def get_cpu_model_id_map_of_result_ids(cpu_result_id_list: list[int]) -> dict[int, int]:
+    """Return a dict with key as cpu_result_id and value as its cpu_model_id."""
+    sql = """
+        select distinct cpu_result_id, cpu_model_id
+        from cpu_model_results
+        where cpu_result_id = any(:cpu_result_id_list)
+        and cpu_model_id is not null
+    """
+    cpu_model_id_map = {}
+    for chunk in iter_read_sql_chunks(
+        sql, params={"cpu_result_id_list": [int(i) for i in cpu_result_id_list]}
+    ):
+        cpu_model_id_map.update(zip(chunk["cpu_result_id"], chunk["cpu_model_id"]))
+    return cpu_model_id_map
+
+
+def get_cpu_model_benchmarks_df() -> pd.DataFrame:
+    sql = """
+        select
+            cpu_model, cpu_model_id, frequency_mhz, cores, single_core_score, multi_core_score
+        from cpu_model_benchmarks
+    """
+    return read_sql_chunked(sql)
+
+
+def get_cpu_model_names_df() -> pd.DataFrame:
+    sql = "select cpu_model_id, cpu_model from cpu_model_names"
+    return read_sql_chunked(sql, dtypes=RESULT_DTYPES)
+
+
+def get_cpu_codename_df() -> pd.DataFrame:
+    """Return one codename per CPU model, as `cpu_codename_dim` of the score report."""
+    sql = """
+        select cpu_model_id, max(cpu_codename) as cpu_codename
+        from cpu_model_details
+        group by cpu_model_id
+    """
+    return read_sql_chunked(sql, dtypes=RESULT_DTYPES)
+
+
+def get_mart_result_df_from_pg(column_list: list[str], chunksize: int = 500_000) -> pd.DataFrame:
+    """Stream the given columns of `cpu_model_results` in compact dtypes."""
+    sql = f"select {', '.join(column_list)} from cpu_model_results"
+    return read_sql_chunked(sql, dtypes=RESULT_DTYPES, chunksize=chunksize)
+
+
+def get_result_partition_stats_df() -> pd.DataFrame:
+    """
+    Return the row count and a content checksum of `cpu_model_results` per
+    (month, cpu_model_id) partition, computed in PostgreSQL without transferring rows.
+    """
+    sql = """
+        select
+            to_char(uploaded, 'YYYY-MM') as month,
+            cpu_model_id,
+            count(*) as row_count,
+            sum(hashtextextended(cpu_model_results::text, 0))::text as checksum
+        from cpu_model_results
+        group by 1, 2
+    """
+    return read_sql_chunked(sql, dtypes=RESULT_DTYPES)
+
+
+def iter_result_partition_chunks_from_pg(
+    month_list: list[str | None],
+    cpu_model_id_list: list[int | None],
+    chunksize: int = 500_000,
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream the rows of the given (month, cpu_model_id) partitions of `cpu_model_results`,
+    joined with the name dimensions, through a server-side cursor.
+
+    Rows are ordered by cpu_model_id and uploaded, so each partition arrives contiguously.
+    """
+    sql = """
+        select
+            to_char(r.uploaded, 'YYYY-MM') as month,
+            r.cpu_model_id,
+            r.cpu_result_id,
+            r.uploaded,
+            c.cpu_model,
+            r.system_id,
+            s.system,
+            r.platform_id,
+            p.platform,
+            r.frequency_mhz,
+            r.cores,
+            r.single_core_score,
+            r.multi_core_score
+        from cpu_model_results r
+        join unnest(cast(:month_list as text[]), cast(:cpu_model_id_list as int[]))
+            as partitions(month, cpu_model_id)
+            -- Coalesced equality instead of `is not distinct from`, so it can be hash joined
+            on coalesce(partitions.month, '') = coalesce(to_char(r.uploaded, 'YYYY-MM'), '')
+            and coalesce(partitions.cpu_model_id, -1) = coalesce(r.cpu_model_id, -1)
+        left join cpu_model_names c on c.cpu_model_id = r.cpu_model_id
+        left join system_names s on s.system_id = r.system_id
+        left join platform_names p on p.platform_id = r.platform_id
+        order by r.cpu_model_id nulls last, r.uploaded
+    """
+    return iter_read_sql_chunks(
+        sql,
+        params={"month_list": month_list, "cpu_model_id_list": cpu_model_id_list},
+        dtypes=EXPORT_RESULT_DTYPES,
+        chunksize=chunksize,
+    )
+
+
+def iter_new_result_record_batches(
+    last_cpu_result_id_map: dict[int, int],
+    chunksize: int = READ_CHUNKSIZE,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream the rows of `cpu_model_results` after the watermark of their CPU model
+    as Arrow record batches, through a server-side cursor.
+
+    The CPU models are listed by skipping through the index on
+    `(cpu_model_id, cpu_result_id)`, then every CPU model is read as one range of it,
+    so the cost is in the number of CPU models and new rows, not the table size.
+
+    :param last_cpu_result_id_map: Key as cpu_model_id (-1 for rows without one) and value
+                                   as the largest cpu_result_id already read of it.
+                                   CPU models not in the dict return all their results.
+    """
+    sql = """
+        with recursive cpu_model as (
+            select min(cpu_model_id) as cpu_model_id from cpu_model_results
+            union all
+            select (
+                select min(cpu_model_id)
+                from cpu_model_results
+                where cpu_model_id > c.cpu_model_id
+            )
+            from cpu_model c
+            where c.cpu_model_id is not null
+        ), watermark as (
+            select
+                key::int as cpu_model_id
+                , value::bigint as last_cpu_result_id
+            from json_each_text(cast(:last_cpu_result_id_map as json))
+        )
+        select r.*
+        from cpu_model c
+        left join watermark w
+        on c.cpu_model_id = w.cpu_model_id
+        cross join lateral (
+            select *
+            from cpu_model_results
+            where cpu_model_id = c.cpu_model_id
+            and cpu_result_id > coalesce(w.last_cpu_result_id, 0)
+            -- Not pulled up into a hash join, which scans the whole table
+            offset 0
+        ) r
+        union all
+        select *
+        from cpu_model_results
+        where cpu_model_id is null
+        and cpu_result_id > coalesce(
+            (select last_cpu_result_id from watermark where cpu_model_id = -1), 0
+        )
+    """
+    return iter_read_sql_record_batches(
+        sql,
+        params={
+            "last_cpu_result_id_map": json.dumps(
+                {str(k): int(v) for k, v in last_cpu_result_id_map.items()}
+            )
+        },
+        dtypes=RESULT_DTYPES,
+        chunksize=chunksize,
+    )
+
+
+def get_committed_max_id(table_name: str, id_column: str) -> int:
+    """
+    Return the largest identity `id_column` of `table_name` (0 without rows) under which
+    no transaction is still inserting. The SHARE lock waits for the transactions writing
+    the table and is released right after the read, and rows inserted later get larger
+    ids from the identity sequence.
+    """
     with get_postgresql_conn(
         database=GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
         user=GEEKBENCH_REPORT_POSTGRESDB_USER,
@@ -174,10 +541,70 @@ def get_last_updated_dates_of_cpu_model_df() -> pd.DataFrame:
         host=GEEKBENCH_REPORT_POSTGRESDB_HOST,
         port=GEEKBENCH_REPORT_POSTGRESDB_PORT,
     ) as conn:
-        return pd.read_sql(sql, conn)
+        with conn.begin():
+            conn.execute(text(f"lock table {table_name} in share mode"))
+            return conn.execute(
+                text(f"select coalesce(max({id_column}), 0) from {table_name}")
+            ).scalar_one()
 
 
-def get_score_report_from_df() -> pd.DataFrame:
+def iter_record_batches_after_id(
+    table_name: str,
+    column_list: list[str],
+    id_column: str,
+    last_id: int,
+    dtypes: dict[str, str],
+    until_id: int | None = None,
+    chunksize: int = READ_CHUNKSIZE,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream the rows of `table_name` with `id_column` greater than `last_id`, and at most
+    `until_id` if given, as Arrow record batches, through a server-side cursor.
+
+    :param column_list: Columns or SQL expressions with alias to select.
+    """
+    sql = f"""
+        select {", ".join(column_list)}
+        from {table_name}
+        where {id_column} > :last_id
+    """
+    params = {"last_id": int(last_id)}
+    if until_id is not None:
+        sql += f"and {id_column} <= :until_id"
+        params["until_id"] = int(until_id)
+    return iter_read_sql_record_batches(sql, params=params, dtypes=dtypes, chunksize=chunksize)
+
+
+def get_replication_watermark_map(table_name: str) -> dict[int, int]:
+    """
+    Return a dict with key as watermark_key and value as last_id of `table_name`
+    in `bigquery_replication_watermarks`.
+    """
+    sql = """
+        select watermark_key, last_id
+        from bigquery_replication_watermarks
+        where table_name = :table_name
+    """
+    watermark_map = {}
+    for chunk in iter_read_sql_chunks(sql, params={"table_name": table_name}):
+        watermark_map.update(zip(chunk["watermark_key"], chunk["last_id"]))
+    return {int(k): int(v) for k, v in watermark_map.items()}
+
+
+def upsert_replication_watermarks(table_name: str, watermark_map: dict[int, int]) -> None:
+    """Upsert the given watermarks of `table_name` in one transaction."""
+    sql = """
+        insert into bigquery_replication_watermarks (
+            table_name, watermark_key, last_id, updated_at
+        )
+        select :table_name, key::int, value::bigint, now()
+        from json_each_text(cast(:watermark_map as json))
+        on conflict (table_name, watermark_key) do update set
+            last_id = excluded.last_id,
+            updated_at = excluded.updated_at
+    """
+    if not watermark_map:
+        return
     with get_postgresql_conn(
         database=GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
         user=GEEKBENCH_REPORT_POSTGRESDB_USER,
@@ -185,34 +612,40 @@ def get_score_report_from_df() -> pd.DataFrame:
         host=GEEKBENCH_REPORT_POSTGRESDB_HOST,
         port=GEEKBENCH_REPORT_POSTGRESDB_PORT,
     ) as conn:
-        return pd.read_sql(
-            score_report_sql,
-            conn,
-        )
-
-
-def get_cpu_model_id_and_result_id_for_scraping_details_df() -> pd.DataFrame:
+        with conn.begin():
+            conn.execute(
+                text(sql),
+                {
+                    "table_name": table_name,
+                    "watermark_map": json.dumps({str(k): int(v) for k, v in watermark_map.items()}),
+                },
+            )
+
+
+def upsert_cpu_model_benchmarks(
+    upsert_df: pd.DataFrame,
+    deleted_cpu_model_list: list[str],
+) -> None:
     """
-    This function used only for getting cpu_codename as dimension from detail URL.
-    So it will not scrape for all result_id.
-    Only one random result_id of a cpu_model_id will be scraped.
+    Upsert changed rows and delete vanished rows of `cpu_model_benchmarks` in one transaction.
+    Relies on the unique index on `cpu_model_benchmarks.cpu_model`.
     """
-    sql = """
-        with cpu_model_id_with_result_id as (
-            select
-                cpu_model_id,
-                max(cpu_result_id) as cpu_result_id
-            from cpu_model_results
-            group by cpu_model_id
+    upsert_sql = """
+        insert into cpu_model_benchmarks (
+            cpu_model, cpu_model_id, frequency_mhz, cores, single_core_score, multi_core_score
         )
-        select
-            cpu_model_id,
-            cpu_result_id
-        from cpu_model_id_with_result_id
-        where cpu_model_id not in (
-            select cpu_model_id from cpu_model_details
+        values (
+            :cpu_model, :cpu_model_id, :frequency_mhz, :cores, :single_core_score, :multi_core_score
         )
+        on conflict (cpu_model) do update set
+            cpu_model_id = excluded.cpu_model_id,
+            frequency_mhz = excluded.frequency_mhz,
+            cores = excluded.cores,
+            single_core_score = excluded.single_core_score,
+            multi_core_score = excluded.multi_core_score
     """
+    delete_sql = "delete from cpu_model_benchmarks where cpu_model = any(:cpu_model_list)"
+    upsert_record_list = upsert_df.astype(object).where(upsert_df.notna(), None).to_dict("records")
     with get_postgresql_conn(
         database=GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
         user=GEEKBENCH_REPORT_POSTGRESDB_USER,
@@ -220,7 +653,43 @@ def get_cpu_model_id_and_result_id_for_scraping_details_df() -> pd.DataFrame:
         host=GEEKBENCH_REPORT_POSTGRESDB_HOST,
         port=GEEKBENCH_REPORT_POSTGRESDB_PORT,
     ) as conn:
-        return pd.read_sql(sql, conn)
+        with conn.begin():
+            if upsert_record_list:
+                conn.execute(text(upsert_sql), upsert_record_list)
+            if deleted_cpu_model_list:
+                conn.execute(text(delete_sql), {"cpu_model_list": deleted_cpu_model_list})
+        print(
+            f"Upserted {len(upsert_record_list)} and deleted {len(deleted_cpu_model_list)} "
+            "rows of cpu_model_benchmarks"
+        )
+
+
+def replace_rows_of_cpu_result_ids(
+    cpu_result_id_list: list[int],
+    df_map: dict[str, pd.DataFrame],
+) -> None:
+    """
+    Replace the rows of the given cpu_result_id of each table (key of `df_map`) with
+    its DataFrame in one transaction, so a failed load keeps the stored rows.
+    """
+    with get_postgresql_conn(
+        database=GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
+        user=GEEKBENCH_REPORT_POSTGRESDB_USER,
+        password=GEEKBENCH_REPORT_POSTGRESDB_PASSWORD,
+        host=GEEKBENCH_REPORT_POSTGRESDB_HOST,
+        port=GEEKBENCH_REPORT_POSTGRESDB_PORT,
+    ) as conn:
+        with conn.begin():
+            for table_name, df in df_map.items():
+                result = conn.execute(
+                    text(
+                        f"delete from {table_name} where cpu_result_id = any(:cpu_result_id_list)"
+                    ),
+                    {"cpu_result_id_list": [int(i) for i in cpu_result_id_list]},
+                )
+                if len(df) > 0:
+                    _copy_df(conn, df, table_name)
+                print(f"Replaced {result.rowcount} rows of {table_name} with {len(df)} rows")
 
 
 def delete_cpu_model_result_record_from_date_to_now(
@@ -252,8 +721,8 @@ def delete_duplicated_cpu_model_result_from_pg() -> None:
         with ranked as (
         select ctid,
                 ROW_NUMBER() OVER (
-                partition by cpu_result_id, system_id, cpu_model_id, frequency, cores,
-                                uploaded, platform, single_core_score, multi_core_score
+                partition by cpu_result_id, system_id, cpu_model_id, frequency_mhz, cores,
+                                uploaded, platform_id, single_core_score, multi_core_score
                 order by ctid
                 ) as rn
         from cpu_model_results
@@ -275,3 +744,32 @@ def delete_duplicated_cpu_model_result_from_pg() -> None:
         print("Deleting duplicated data from cpu_model_results...")
         print(conn.execute(text(delete_sql)), "affected.")
         conn.commit()
+
+
+def migrate_to_compact_schema() -> None:
+    """
+    Migrate existing rows in place into the compact typed schema, in one transaction
+    with the check: `frequency` text -> `frequency_mhz`, `platform` text -> `platform_id`,
+    and text views/scores of `cpu_model_details` -> int4.
+    Skipped if `cpu_model_results` is already migrated.
+    """
+    check_sql = """
+        select count(*)
+        from information_schema.columns
+        where table_schema = current_schema()
+            and table_name = 'cpu_model_results'
+            and column_name = 'frequency'
+    """
+    with get_postgresql_conn(
+        database=GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
+        user=GEEKBENCH_REPORT_POSTGRESDB_USER,
+        password=GEEKBENCH_REPORT_POSTGRESDB_PASSWORD,
+        host=GEEKBENCH_REPORT_POSTGRESDB_HOST,
+        port=GEEKBENCH_REPORT_POSTGRESDB_PORT,
+    ) as conn:
+        with conn.begin():
+            if conn.execute(text(check_sql)).scalar() == 0:
+                print("cpu_model_results already migrated, skipped")
+                return
+            conn.execute(text(migrate_compact_schema_sql))
+        print("Migrated to compact schema")
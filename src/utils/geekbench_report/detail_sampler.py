@@ -0,0 +1,124 @@
+"""
+Budgeted reservoir sampling of detail pages per CPU model.
+
+Every CPU model keeps a fixed-size, uniformly random reservoir of its `cpu_result_id`s
+(Algorithm R), updated with the results streamed in since the last run.
+Only sampled IDs whose details are not stored yet are fetched, within a per-run budget,
+so the detail crawl cost stays bounded as `cpu_model_results` grows.
+
+Sampler state is kept in a local JSON file. If the file is lost, the reservoirs are
+rebuilt from the whole `cpu_model_results` table on the next run.
+"""
+
+import json
+import os
+import random
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+DETAIL_SAMPLER_STATE_FILE_PATH = "/tmp/sync_cpu_model_detail_sampler_state.json"
+
+RESERVOIR_SIZE = 5
+DEFAULT_FETCH_BUDGET = 500
+
+
+@dataclass
+class DetailReservoir:
+    # Number of results of the CPU model streamed into the reservoir so far
+    seen_count: int = 0
+    # Largest cpu_result_id streamed so far, new results of the CPU model come after it
+    last_cpu_result_id: int = 0
+    cpu_result_id_list: list[int] = field(default_factory=list)
+
+
+def read_detail_reservoirs() -> dict[int, DetailReservoir]:
+    """Return a dict with key as cpu_model_id and value as its reservoir."""
+    if not os.path.exists(DETAIL_SAMPLER_STATE_FILE_PATH):
+        return {}
+    with open(DETAIL_SAMPLER_STATE_FILE_PATH, "r") as f:
+        try:
+            return {
+                int(cpu_model_id): DetailReservoir(**reservoir)
+                for cpu_model_id, reservoir in json.load(f).items()
+            }
+        except Exception:
+            return {}
+
+
+def write_detail_reservoirs(reservoir_map: dict[int, DetailReservoir]) -> None:
+    with open(DETAIL_SAMPLER_STATE_FILE_PATH, "w") as f:
+        json.dump(
+            {
+                str(cpu_model_id): vars(reservoir)
+                for cpu_model_id, reservoir in reservoir_map.items()
+            },
+            f,
+        )
+
+
+def update_detail_reservoirs(
+    reservoir_map: dict[int, DetailReservoir],
+    new_result_id_df: pd.DataFrame,
+    reservoir_size: int = RESERVOIR_SIZE,
+    rng: random.Random | None = None,
+) -> None:
+    """
+    Stream new results into the reservoirs in place.
+
+    :param new_result_id_df: Columns `cpu_model_id` and `cpu_result_id`, each result once.
+    """
+    if rng is None:
+        rng = random.Random()
+
+    for cpu_model_id, cpu_result_id in zip(
+        new_result_id_df["cpu_model_id"].to_list(),
+        new_result_id_df["cpu_result_id"].to_list(),
+    ):
+        reservoir = reservoir_map.setdefault(int(cpu_model_id), DetailReservoir())
+        reservoir.seen_count += 1
+        reservoir.last_cpu_result_id = max(reservoir.last_cpu_result_id, int(cpu_result_id))
+
+        # Algorithm R: the n-th result replaces a random slot with probability k/n
+        if len(reservoir.cpu_result_id_list) < reservoir_size:
+            reservoir.cpu_result_id_list.append(int(cpu_result_id))
+            continue
+        slot = rng.randrange(reservoir.seen_count)
+        if slot < reservoir_size:
+            reservoir.cpu_result_id_list[slot] = int(cpu_result_id)
+
+
+def select_cpu_result_ids_to_fetch(
+    reservoir_map: dict[int, DetailReservoir],
+    stored_detail_df: pd.DataFrame,
+    fetch_budget: int | None = DEFAULT_FETCH_BUDGET,
+) -> pd.DataFrame:
+    """
+    Return sampled (cpu_model_id, cpu_result_id) whose details are not stored yet.
+
+    CPU models with fewer stored details go first, so models without any detail
+    (and so without `cpu_codename` in the report) are served before the others.
+
+    :param stored_detail_df: Columns `cpu_model_id` and `cpu_result_id` of `cpu_model_details`.
+    """
+    stored_cpu_result_id_set = set(stored_detail_df["cpu_result_id"].to_list())
+    stored_count_map = stored_detail_df["cpu_model_id"].value_counts().to_dict()
+
+    rows = []
+    for cpu_model_id, reservoir in reservoir_map.items():
+        pending_cpu_result_id_list = [
+            cpu_result_id
+            for cpu_result_id in reservoir.cpu_result_id_list
+            if cpu_result_id not in stored_cpu_result_id_set
+        ]
+        for rank, cpu_result_id in enumerate(pending_cpu_result_id_list):
+            rows.append((stored_count_map.get(cpu_model_id, 0) + rank, cpu_model_id, cpu_result_id))
+
+    rows.sort()
+    if fetch_budget is not None:
+        rows = rows[:fetch_budget]
+
+    return pd.DataFrame(
+        [(cpu_model_id, cpu_result_id) for _, cpu_model_id, cpu_result_id in rows],
+        columns=["cpu_model_id", "cpu_result_id"],
+    )
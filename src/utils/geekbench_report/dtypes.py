@@ -0,0 +1,120 @@
+"""
+Dtype policy of the DataFrames in the geekbench pipeline.
+
+- Strings repeated on many rows (system, cpu_model, platform, ...) -> category
+- Scores and IDs -> Int32, cores and small dimension IDs -> Int16
+- Timestamps -> datetime64[us], the precision of PostgreSQL `timestamp`
+- Nullable integer dtypes, so a missing value does not upcast a column to float64
+
+>>> df = apply_dtypes(df, SCRAPED_RESULT_DTYPES)
+"""
+
+import pandas as pd
+
+# Rows of `GeekbenchProcessorResult` as scraped
+SCRAPED_RESULT_DTYPES = {
+    "cpu_result_id": "Int32",
+    "system": "category",
+    "cpu_model": "category",
+    "frequency": "category",
+    "cores": "Int16",
+    "uploaded": "datetime64[us]",
+    "platform": "category",
+    "single_core_score": "Int32",
+    "multi_core_score": "Int32",
+}
+
+# Rows of `cpu_model_results`
+RESULT_DTYPES = {
+    "cpu_result_id": "Int32",
+    "frequency_mhz": "Int32",
+    "cores": "Int16",
+    "uploaded": "datetime64[us]",
+    "platform_id": "Int16",
+    "single_core_score": "Int32",
+    "multi_core_score": "Int32",
+    "cpu_model_id": "Int32",
+    "system_id": "Int32",
+}
+
+# Rows of `cpu_model_results` joined with the name dimensions, as exported to Parquet
+EXPORT_RESULT_DTYPES = {
+    **RESULT_DTYPES,
+    "month": "category",
+    "cpu_model": "category",
+    "system": "category",
+    "platform": "category",
+}
+
+# Rows of `cpu_model_details` (JSON columns are left as-is)
+DETAIL_DTYPES = {
+    "cpu_result_id": "Int32",
+    "views": "Int32",
+    "cpu_model_id": "Int32",
+    "cpu_codename": "category",
+    "single_core_score": "Int32",
+    "multi_core_score": "Int32",
+}
+
+# JSON columns of `cpu_model_details`
+DETAIL_JSON_COLUMN_LIST = [
+    "system_info",
+    "cpu_info",
+    "memory_info",
+    "single_core_benchmarks",
+    "multi_core_benchmarks",
+]
+
+# Rows of `cpu_model_details` replicated to BigQuery, JSON columns as text.
+# No category, so that the Arrow schema is the same for every chunk.
+REPLICATED_DETAIL_DTYPES = {
+    **DETAIL_DTYPES,
+    "detail_id": "Int64",
+    "title": "string",
+    "upload_date": "datetime64[us]",
+    "cpu_codename": "string",
+    **{column: "string" for column in DETAIL_JSON_COLUMN_LIST},
+}
+
+# Rows of the name dimensions `cpu_model_names`, `system_names` and `platform_names`
+NAME_DTYPES = {
+    "cpu_model_id": "Int32",
+    "cpu_model": "string",
+    "system_id": "Int32",
+    "system": "string",
+    "platform_id": "Int16",
+    "platform": "string",
+}
+
+# Rows of `cpu_model_detail_workload_scores`
+WORKLOAD_SCORE_DTYPES = {
+    "cpu_result_id": "Int32",
+    "cpu_model_id": "Int32",
+    "mode": "category",
+    "workload": "category",
+    "score": "Int32",
+}
+
+# Output of `mart_average_score_and_benchmark_score.sql`
+SCORE_REPORT_DTYPES = {
+    "Generation": "category",
+    "Processor name": "string",
+    "Single core (Median)": "Int32",
+    "Multi core (Median)": "Int32",
+    "Single core (Ranking)": "Int32",
+    "Multi core (Ranking)": "Int32",
+    "Single core (Mean)": "Int32",
+    "Multi core (Mean)": "Int32",
+    "Single core (Mean excl. max/min)": "Int32",
+    "Multi core (Mean excl. max/min)": "Int32",
+    "Max for single core": "Int32",
+    "Min for Multi core": "Int32",
+    "Std for Single core": "Int32",
+    "Std for Multi core": "Int32",
+    "Data count": "Int32",
+}
+
+
+def apply_dtypes(df: pd.DataFrame, dtypes: dict[str, str]) -> pd.DataFrame:
+    """Cast the columns of `df` listed in `dtypes`, other columns are kept as-is."""
+    return df.astype({column: dtype for column, dtype in dtypes.items() if column in df.columns})
@@ -0,0 +1,160 @@
+"""
+Compressed archive of raw HTML pages fetched from Geekbench.
+
+Result-list (`/search`) and detail (`/v6/cpu/{id}`) pages are buffered in memory and
+written as zstd-compressed Parquet segments with columns url/fetched_at/kind/html.
+A segment is written to a temporary file and renamed into place, so it is complete or
+absent. The index, which maps every (url, fetched_at) to its segment and row, is read
+from the url/fetched_at/kind columns of the segments, so concurrent runs never share
+a file. (`index.parquet` of earlier versions is no longer read.)
+
+Archiving is enabled by setting `GEEKBENCH_REPORT_HTML_ARCHIVE_DIR`. The archive is read
+by `app/geekbench_report/reparse_html_archive_to_pg.py` to rebuild rows offline
+whenever a parser changes.
+
+Layout:
+    {archive_dir}/segments/segment-20250616T101500123456-4242.parquet  (time, process id)
+"""
+
+import atexit
+import os
+import re
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GEEKBENCH_REPORT_HTML_ARCHIVE_DIR = os.getenv("GEEKBENCH_REPORT_HTML_ARCHIVE_DIR")
+
+# Raw HTML bytes buffered before a segment is written
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+SEARCH_URL_PATTERN = re.compile(r"^https://browser\.geekbench\.com/search\?")
+DETAIL_URL_PATTERN = re.compile(r"^https://browser\.geekbench\.com/v6/cpu/\d+$")
+
+SEGMENT_SCHEMA = pa.schema(
+    [
+        ("url", pa.string()),
+        ("fetched_at", pa.timestamp("us")),
+        ("kind", pa.string()),
+        ("html", pa.large_string()),
+    ]
+)
+
+
+def get_page_kind(url: str) -> str | None:
+    """Return "search" or "detail" for archived page kinds, otherwise None."""
+    if SEARCH_URL_PATTERN.match(url):
+        return "search"
+    if DETAIL_URL_PATTERN.match(url):
+        return "detail"
+    return None
+
+
+class HtmlArchive:
+    def __init__(self, archive_dir: str | Path, segment_max_bytes: int = SEGMENT_MAX_BYTES) -> None:
+        self.archive_dir = Path(archive_dir)
+        self.segment_dir = self.archive_dir / "segments"
+        self.segment_max_bytes = segment_max_bytes
+        self._buffer: list[tuple[str, datetime, str, str]] = []
+        self._buffer_bytes = 0
+        self._lock = threading.Lock()
+
+    def append(self, url: str, html: str, fetched_at: datetime | None = None) -> None:
+        """Buffer a page, ignoring URLs which are not an archived page kind."""
+        kind = get_page_kind(url)
+        if kind is None:
+            return
+        with self._lock:
+            self._buffer.append((url, fetched_at or datetime.now(), kind, html))
+            self._buffer_bytes += len(html)
+            if self._buffer_bytes >= self.segment_max_bytes:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._buffer:
+            return
+
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        segment_path = (
+            self.segment_dir / f"segment-{datetime.now():%Y%m%dT%H%M%S%f}-{os.getpid()}.parquet"
+        )
+        tmp_segment_path = segment_path.with_name(f"{segment_path.name}.tmp")
+        url_list, fetched_at_list, kind_list, html_list = zip(*self._buffer)
+        pq.write_table(
+            pa.table(
+                [list(url_list), list(fetched_at_list), list(kind_list), list(html_list)],
+                schema=SEGMENT_SCHEMA,
+            ),
+            tmp_segment_path,
+            compression="zstd",
+            compression_level=9,
+        )
+        os.replace(tmp_segment_path, segment_path)
+
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    def read_index(self) -> pd.DataFrame:
+        """Return (url, fetched_at, kind, segment, row) of every archived page."""
+        index_df_list = []
+        for segment_path in self.get_segment_path_list():
+            index_df = pq.read_table(
+                segment_path, columns=["url", "fetched_at", "kind"]
+            ).to_pandas()
+            index_df["segment"] = segment_path.name
+            index_df["row"] = range(len(index_df))
+            index_df_list.append(index_df)
+        if not index_df_list:
+            return pd.DataFrame(columns=["url", "fetched_at", "kind", "segment", "row"])
+        return pd.concat(index_df_list, ignore_index=True)
+
+    def get_segment_path_list(self, kind: str | None = None) -> list[Path]:
+        """Return segment paths in writing order, optionally only those containing `kind`."""
+        segment_path_list = sorted(self.segment_dir.glob("segment-*.parquet"))
+        if kind is None:
+            return segment_path_list
+        return [
+            segment_path
+            for segment_path in segment_path_list
+            if kind in pq.read_table(segment_path, columns=["kind"])["kind"].unique().to_pylist()
+        ]
+
+    @staticmethod
+    def read_segment(segment_path: str | Path, kind: str | None = None) -> pd.DataFrame:
+        return pq.read_table(
+            segment_path,
+            filters=[("kind", "=", kind)] if kind is not None else None,
+        ).to_pandas()
+
+
+_html_archive: HtmlArchive | None = None
+_html_archive_lock = threading.Lock()
+
+
+def get_html_archive() -> HtmlArchive | None:
+    """Return the process-wide archive, or None if archiving is not enabled."""
+    global _html_archive
+    if GEEKBENCH_REPORT_HTML_ARCHIVE_DIR is None:
+        return None
+    with _html_archive_lock:
+        if _html_archive is None:
+            _html_archive = HtmlArchive(GEEKBENCH_REPORT_HTML_ARCHIVE_DIR)
+            atexit.register(_html_archive.flush)
+        return _html_archive
+
+
+def archive_html(url: str, html: str) -> None:
+    html_archive = get_html_archive()
+    if html_archive is not None:
+        html_archive.append(url, html)
@@ -0,0 +1,287 @@
+"""
+In-process implementation of `sql/mart_average_score_and_benchmark_score.py`.
+
+Computes the same score report with pandas/NumPy, so the heaviest query of the day
+does not run on the shared PostgreSQL. The input is a column-pruned extract of
+`cpu_model_results` (`MART_RESULT_COLUMNS`), either streamed from PostgreSQL or read
+from the Parquet export; dimensions (names, codenames, benchmarks) are small and
+read from PostgreSQL.
+
+Values follow PostgreSQL semantics of the SQL:
+    - AVG/STDDEV_POP over integers are numerics, and ROUND(numeric) rounds half away
+      from zero, so they are computed with integer arithmetic (incl. the intermediate
+      rounding of STDDEV_POP to the scale PostgreSQL picks).
+    - PERCENTILE_CONT is a double, and ROUND(double) rounds half to even.
+    - NULL scores are ignored by aggregates but counted by COUNT(*) and the trimmed
+      mean's row numbers (NULLs sort last).
+Ties at the extremes of the trimmed mean are broken by row order; PostgreSQL's
+`row_number()` breaks them arbitrarily, so a row excluded there may differ.
+
+>>> score_report_df = get_score_report_df_in_process()
+>>> score_report_df = get_score_report_df_in_process(parquet_path="/data/cpu_model_results")
+"""
+
+from math import isqrt
+
+import numpy as np
+import pandas as pd
+
+from utils.geekbench_report.database_helper import (
+    get_cpu_codename_df,
+    get_cpu_model_benchmarks_df,
+    get_cpu_model_names_df,
+    get_mart_result_df_from_pg,
+)
+from utils.geekbench_report.dtypes import RESULT_DTYPES, SCORE_REPORT_DTYPES, apply_dtypes
+from utils.geekbench_report.parquet_export import read_exported_results
+
+MART_RESULT_COLUMNS = ["cpu_model_id", "single_core_score", "multi_core_score", "uploaded"]
+
+# Columns depending on which of the tied rows `row_number()` puts first or last
+TIE_DEPENDENT_COLUMN_LIST = [
+    "Single core (Mean excl. max/min)",
+    "Multi core (Mean excl. max/min)",
+]
+
+SCORE_REPORT_COLUMN_MAP = {
+    "cpu_codename": "Generation",
+    "cpu_model": "Processor name",
+    "median_single_core_score": "Single core (Median)",
+    "median_multi_core_score": "Multi core (Median)",
+    "benchmark_single_core_score": "Single core (Ranking)",
+    "benchmark_multi_core_score": "Multi core (Ranking)",
+    "mean_single_core_score": "Single core (Mean)",
+    "mean_multi_core_score": "Multi core (Mean)",
+    "trimmed_mean_single_core_score": "Single core (Mean excl. max/min)",
+    "trimmed_mean_multi_core_score": "Multi core (Mean excl. max/min)",
+    "max_single_core_score": "Max for single core",
+    "min_multi_core_score": "Min for Multi core",
+    "stddev_single_core_score": "Std for Single core",
+    "stddev_multi_core_score": "Std for Multi core",
+    "max_uploaded": "The lastest upload",
+    "min_uploaded": "The earliest upload",
+    "data_count": "Data count",
+}
+
+
+def _round_mean(score_sum: pd.Series, score_count: pd.Series) -> pd.Series:
+    """ROUND(AVG(score)): exact mean rounded half away from zero, NA if no score."""
+    score_sum = score_sum.astype("Int64")
+    score_count = score_count.astype("Int64").where(score_count > 0)
+    rounded = (2 * score_sum.abs() + score_count) // (2 * score_count)
+    return rounded * np.sign(score_sum)
+
+
+def _get_numeric_div_scale(numerator: int, denominator: int) -> int:
+    """Result scale PostgreSQL picks for numeric division of integers (`select_div_scale`)."""
+
+    def get_weight_and_first_digit(value: int) -> tuple[int, int]:
+        # Weight and leading digit in PostgreSQL's base-10000 numeric representation
+        weight = (len(str(value)) - 1) // 4
+        return weight, value // 10000**weight
+
+    numerator_weight, numerator_first_digit = get_weight_and_first_digit(numerator)
+    denominator_weight, denominator_first_digit = get_weight_and_first_digit(denominator)
+    quotient_weight = numerator_weight - denominator_weight
+    if numerator_first_digit <= denominator_first_digit:
+        quotient_weight -= 1
+    return min(max(16 - quotient_weight * 4, 0), 1000)
+
+
+def _round_stddev_pop(
+    score_sum: pd.Series, score_square_sum: pd.Series, score_count: pd.Series
+) -> pd.Series:
+    """
+    ROUND(STDDEV_POP(score)) with PostgreSQL numeric arithmetic: the variance
+    (n * sum(x^2) - sum(x)^2) / n^2 and its square root are each rounded half away from
+    zero to the division's scale, then rounded to an integer.
+    Computed with Python integers per group, as n * sum(x^2) overflows int64.
+    """
+    rounded_list = []
+    for s, s2, n in zip(score_sum.to_list(), score_square_sum.to_list(), score_count.to_list()):
+        if pd.isna(n) or n == 0:
+            rounded_list.append(None)
+            continue
+        n, s, s2 = int(n), int(s), int(s2)
+        numerator = n * s2 - s * s
+        if numerator <= 0:
+            rounded_list.append(0)
+            continue
+        scale = 10 ** _get_numeric_div_scale(numerator, n * n)
+        # Variance and standard deviation as integers in units of 1 / scale
+        variance = (2 * numerator * scale + n * n) // (2 * n * n)
+        stddev = (isqrt(4 * variance * scale) + 1) // 2
+        rounded_list.append((2 * stddev + scale) // (2 * scale))
+    return pd.Series(rounded_list, index=score_count.index, dtype="Int64")
+
+
+def get_score_stats_df(result_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return the per-`cpu_model_id` statistics of `with_stats` and `trimmed`, rounded
+    as in `final_table`. Results with a NULL `cpu_model_id` form a group, as in SQL.
+    """
+    df = apply_dtypes(result_df[MART_RESULT_COLUMNS], RESULT_DTYPES).reset_index(drop=True)
+    score_column_list = ["single_core_score", "multi_core_score"]
+    for column in score_column_list:
+        df[f"{column}_square"] = df[column].astype("Int64") ** 2
+
+    grouped = df.groupby("cpu_model_id", dropna=False, sort=False)
+    sum_df = grouped[score_column_list + [f"{c}_square" for c in score_column_list]].sum(
+        min_count=1
+    )
+    count_df = grouped[score_column_list].count()
+    median_df = grouped[score_column_list].median()
+
+    stats_df = pd.DataFrame(index=sum_df.index)
+    for column in score_column_list:
+        stats_df[f"mean_{column}"] = _round_mean(sum_df[column], count_df[column])
+        stats_df[f"stddev_{column}"] = _round_stddev_pop(
+            sum_df[column], sum_df[f"{column}_square"], count_df[column]
+        )
+        stats_df[f"median_{column}"] = pd.Series(
+            np.rint(median_df[column].astype("float64").to_numpy()),
+            index=median_df.index,
+        ).astype("Int64")
+    stats_df["max_single_core_score"] = grouped["single_core_score"].max()
+    stats_df["min_multi_core_score"] = grouped["multi_core_score"].min()
+    stats_df["max_uploaded"] = grouped["uploaded"].max()
+    stats_df["min_uploaded"] = grouped["uploaded"].min()
+    stats_df["data_count"] = grouped.size()
+
+    # Trimmed mean: drop rows ranked first or last by either score, NULLs ranked last
+    row_count = grouped["cpu_model_id"].transform("size")
+    is_kept = pd.Series(True, index=df.index)
+    for column in score_column_list:
+        row_number = grouped[column].rank(method="first", na_option="bottom")
+        is_kept &= (row_number > 1) & (row_number < row_count)
+    trimmed_grouped = df[is_kept].groupby("cpu_model_id", dropna=False, sort=False)
+    trimmed_sum_df = trimmed_grouped[score_column_list].sum(min_count=1)
+    trimmed_count_df = trimmed_grouped[score_column_list].count()
+    for column in score_column_list:
+        stats_df[f"trimmed_mean_{column}"] = _round_mean(
+            trimmed_sum_df[column], trimmed_count_df[column]
+        ).reindex(stats_df.index)
+        # `trimmed` is joined on cpu_model_id, which never matches the NULL group
+        stats_df.loc[stats_df.index.isna(), f"trimmed_mean_{column}"] = pd.NA
+
+    return stats_df.reset_index()
+
+
+def get_score_report_df(
+    result_df: pd.DataFrame,
+    cpu_model_names_df: pd.DataFrame,
+    cpu_codename_df: pd.DataFrame,
+    benchmark_df: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Return the same rows and columns as `get_score_report_from_df()`.
+
+    :param result_df: Columns `MART_RESULT_COLUMNS` of `cpu_model_results`.
+    :param cpu_model_names_df: Columns `cpu_model_id` and `cpu_model`.
+    :param cpu_codename_df: Columns `cpu_model_id` and `cpu_codename`, one row per model.
+    :param benchmark_df: Columns `cpu_model_id`, `single_core_score` and `multi_core_score`.
+    """
+    stats_df = get_score_stats_df(result_df)
+    benchmark_df = benchmark_df[["cpu_model_id", "single_core_score", "multi_core_score"]]
+    benchmark_df = benchmark_df[benchmark_df["cpu_model_id"].notna()].rename(
+        columns={
+            "single_core_score": "benchmark_single_core_score",
+            "multi_core_score": "benchmark_multi_core_score",
+        }
+    )
+
+    # NULL cpu_model_id never matches in the SQL joins
+    final_df = stats_df
+    for dimension_df in [
+        cpu_model_names_df[["cpu_model_id", "cpu_model"]],
+        apply_dtypes(benchmark_df, RESULT_DTYPES),
+        cpu_codename_df[["cpu_model_id", "cpu_codename"]],
+    ]:
+        dimension_df = apply_dtypes(
+            dimension_df[dimension_df["cpu_model_id"].notna()], RESULT_DTYPES
+        )
+        final_df = final_df.merge(dimension_df, on="cpu_model_id", how="left")
+
+    score_report_df = (
+        final_df.astype({"cpu_codename": "object"})
+        .sort_values("cpu_codename", na_position="last", kind="stable")[
+            list(SCORE_REPORT_COLUMN_MAP)
+        ]
+        .rename(columns=SCORE_REPORT_COLUMN_MAP)
+        .reset_index(drop=True)
+    )
+    return apply_dtypes(score_report_df, SCORE_REPORT_DTYPES)
+
+
+def read_mart_result_df_from_parquet(parquet_path: str) -> pd.DataFrame:
+    """
+    Read the extract from a Parquet file or dataset, e.g. the `cpu_model_results` export,
+    whose NULL `cpu_model_id` partitions are read back as NULL by its `PARTITIONING`.
+    """
+    return apply_dtypes(
+        read_exported_results(parquet_path, columns=MART_RESULT_COLUMNS), RESULT_DTYPES
+    )
+
+
+def get_score_report_df_in_process(parquet_path: str | None = None) -> pd.DataFrame:
+    """
+    Compute the score report in process.
+
+    :param parquet_path: Read results from this Parquet export instead of streaming
+                         them from PostgreSQL.
+    """
+    if parquet_path is None:
+        result_df = get_mart_result_df_from_pg(MART_RESULT_COLUMNS)
+    else:
+        result_df = read_mart_result_df_from_parquet(parquet_path)
+
+    return get_score_report_df(
+        result_df,
+        get_cpu_model_names_df(),
+        get_cpu_codename_df(),
+        get_cpu_model_benchmarks_df(),
+    )
+
+
+def diff_score_report(
+    score_report_df: pd.DataFrame,
+    sql_score_report_df: pd.DataFrame,
+    ignore_column_list: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Return the differing cells of two score reports, empty if they are equivalent.
+    Rows are compared in a canonical order, as the SQL orders ties arbitrarily.
+
+    :param ignore_column_list: e.g. `TIE_DEPENDENT_COLUMN_LIST` for real data, where
+                               scores tie at the trimmed extremes.
+    """
+    if len(score_report_df) != len(sql_score_report_df):
+        raise ValueError(f"Row count differs: {len(score_report_df)} != {len(sql_score_report_df)}")
+
+    def normalize(df: pd.DataFrame) -> pd.DataFrame:
+        df = apply_dtypes(df, SCORE_REPORT_DTYPES).astype({"Generation": "string"})
+        df = df.drop(columns=ignore_column_list or [])
+        return df.sort_values(list(df.columns), na_position="last", ignore_index=True)
+
+    return normalize(score_report_df).compare(normalize(sql_score_report_df))
+
+
+if __name__ == "__main__":
+    import time
+
+    from utils.geekbench_report.database_helper import get_score_report_from_df
+
+    start_time = time.perf_counter()
+    sql_score_report_df = get_score_report_from_df()
+    print(f"SQL mart: {time.perf_counter() - start_time:.1f} s")
+
+    start_time = time.perf_counter()
+    score_report_df = get_score_report_df_in_process()
+    print(f"In-process mart: {time.perf_counter() - start_time:.1f} s")
+
+    diff_df = diff_score_report(
+        score_report_df,
+        sql_score_report_df,
+        ignore_column_list=TIE_DEPENDENT_COLUMN_LIST,
+    )
+    print("Equivalent" if diff_df.empty else diff_df)
@@ -0,0 +1,203 @@
+"""
+Incremental export of `cpu_model_results` to a local Parquet dataset.
+
+Rows are joined with the name dimensions and written with the compact dtypes of
+`EXPORT_RESULT_DTYPES`, one zstd-compressed file per (month, cpu_model_id) partition
+in Hive layout. `_manifest.parquet` keeps the row count and content checksum of every
+exported partition; a partition is only streamed from PostgreSQL again when its
+checksum changes, and removed when it no longer has rows.
+
+Layout:
+    {export_dir}/_manifest.parquet
+    {export_dir}/month=2025-06/cpu_model_id=123/part-0.parquet
+    {export_dir}/month=2025-06/cpu_model_id=__HIVE_DEFAULT_PARTITION__/part-0.parquet
+
+Read it with `read_exported_results()` (memory-mapped, only the requested columns and
+partitions), or with any reader given the partitioning of `PARTITIONING`, e.g.
+>>> read_exported_results(export_dir, filters=[("cpu_model_id", "=", 123)])
+"""
+
+import os
+import shutil
+from collections.abc import Iterable
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+from utils.geekbench_report.database_helper import (
+    get_result_partition_stats_df,
+    iter_result_partition_chunks_from_pg,
+)
+from utils.geekbench_report.dtypes import EXPORT_RESULT_DTYPES, apply_dtypes
+
+load_dotenv()
+
+GEEKBENCH_REPORT_PARQUET_EXPORT_DIR = os.getenv("GEEKBENCH_REPORT_PARQUET_EXPORT_DIR")
+
+PARTITION_COLUMNS = ["month", "cpu_model_id"]
+MANIFEST_DTYPES = {
+    "month": "string",
+    "cpu_model_id": "Int32",
+    "row_count": "Int64",
+    "checksum": "string",
+    "exported_at": "datetime64[us]",
+}
+# Directory name of a NULL partition value, read back as null by pyarrow
+HIVE_DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+# Explicit key types: inferred dictionary keys cannot be read when a partition is NULL
+PARTITIONING = ds.partitioning(
+    pa.schema([("month", pa.string()), ("cpu_model_id", pa.int32())]), flavor="hive"
+)
+
+
+def get_partition_dir(export_dir: Path, month: str | None, cpu_model_id: int | None) -> Path:
+    month_value = HIVE_DEFAULT_PARTITION if pd.isna(month) else month
+    cpu_model_id_value = HIVE_DEFAULT_PARTITION if pd.isna(cpu_model_id) else int(cpu_model_id)
+    return export_dir / f"month={month_value}" / f"cpu_model_id={cpu_model_id_value}"
+
+
+def read_manifest(export_dir: Path) -> pd.DataFrame:
+    manifest_path = export_dir / "_manifest.parquet"
+    if not manifest_path.exists():
+        return apply_dtypes(pd.DataFrame(columns=list(MANIFEST_DTYPES)), MANIFEST_DTYPES)
+    return apply_dtypes(pd.read_parquet(manifest_path), MANIFEST_DTYPES)
+
+
+def read_exported_results(
+    export_dir: str | Path,
+    columns: list[str] | None = None,
+    filters: list[tuple] | None = None,
+) -> pd.DataFrame:
+    df = pq.read_table(
+        export_dir,
+        columns=columns,
+        filters=filters,
+        partitioning=PARTITIONING,
+        memory_map=True,
+    ).to_pandas()
+    return apply_dtypes(df, EXPORT_RESULT_DTYPES)
+
+
+def write_manifest(export_dir: Path, manifest_df: pd.DataFrame) -> None:
+    manifest_path = export_dir / "_manifest.parquet"
+    tmp_path = manifest_path.with_suffix(".tmp")
+    manifest_df[list(MANIFEST_DTYPES)].to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, manifest_path)
+
+
+def get_partition_diff(
+    manifest_df: pd.DataFrame, stats_df: pd.DataFrame
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Compare the exported partitions with the current ones in PostgreSQL.
+
+    Returns the partitions to (re)export (new or changed checksum) and the exported
+    partitions which no longer have rows.
+    """
+    merged_df = stats_df.merge(
+        manifest_df[[*PARTITION_COLUMNS, "checksum"]],
+        on=PARTITION_COLUMNS,
+        how="outer",
+        suffixes=("", "_exported"),
+        indicator=True,
+    )
+    changed_df = merged_df[
+        (merged_df["_merge"] == "left_only")
+        | (
+            (merged_df["_merge"] == "both")
+            & (merged_df["checksum"] != merged_df["checksum_exported"])
+        )
+    ]
+    removed_df = merged_df[merged_df["_merge"] == "right_only"]
+    return (
+        changed_df[[*PARTITION_COLUMNS, "row_count", "checksum"]].reset_index(drop=True),
+        removed_df[PARTITION_COLUMNS].reset_index(drop=True),
+    )
+
+
+def write_partition(export_dir: Path, partition_df: pd.DataFrame) -> None:
+    """Replace the file of a single partition; partition columns are kept in the path only."""
+    month, cpu_model_id = partition_df[PARTITION_COLUMNS].iloc[0]
+    partition_dir = get_partition_dir(export_dir, month, cpu_model_id)
+    partition_dir.mkdir(parents=True, exist_ok=True)
+    # Hidden while written, so readers of the dataset never pick up a partial file
+    tmp_path = partition_dir / ".part-0.parquet.tmp"
+    apply_dtypes(partition_df.drop(columns=PARTITION_COLUMNS), EXPORT_RESULT_DTYPES).to_parquet(
+        tmp_path, index=False, compression="zstd"
+    )
+    os.replace(tmp_path, partition_dir / "part-0.parquet")
+
+
+def write_partitions_from_chunks(export_dir: Path, chunks: Iterable[pd.DataFrame]) -> int:
+    """
+    Write partitions from chunks ordered by partition, holding at most one chunk and
+    the rows of the partition still being received. Return the number of rows written.
+    """
+    row_count = 0
+    pending_df = None
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        if pending_df is not None:
+            chunk = pd.concat([pending_df, chunk], ignore_index=True)
+        partition_number = chunk.groupby(
+            PARTITION_COLUMNS, sort=False, dropna=False, observed=True
+        ).ngroup()
+        # Rows of the last partition in the chunk may continue in the next chunk
+        is_last_partition = partition_number == partition_number.iloc[-1]
+        pending_df = chunk[is_last_partition]
+        for _, partition_df in chunk[~is_last_partition].groupby(partition_number, sort=False):
+            write_partition(export_dir, partition_df)
+            row_count += len(partition_df)
+    if pending_df is not None and not pending_df.empty:
+        write_partition(export_dir, pending_df)
+        row_count += len(pending_df)
+    return row_count
+
+
+def export_results_to_parquet(export_dir: str | Path, chunksize: int = 500_000) -> None:
+    export_dir = Path(export_dir)
+    export_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest_df = read_manifest(export_dir)
+    stats_df = apply_dtypes(get_result_partition_stats_df(), MANIFEST_DTYPES)
+    changed_df, removed_df = get_partition_diff(manifest_df, stats_df)
+    print(
+        f"{len(stats_df)} partitions: {len(changed_df)} to export, "
+        f"{len(removed_df)} to remove, {len(stats_df) - len(changed_df)} unchanged"
+    )
+
+    if not changed_df.empty:
+        row_count = write_partitions_from_chunks(
+            export_dir,
+            iter_result_partition_chunks_from_pg(
+                month_list=[None if pd.isna(month) else month for month in changed_df["month"]],
+                cpu_model_id_list=[
+                    None if pd.isna(cpu_model_id) else int(cpu_model_id)
+                    for cpu_model_id in changed_df["cpu_model_id"]
+                ],
+                chunksize=chunksize,
+            ),
+        )
+        print(f"Exported {row_count} rows")
+
+    for month, cpu_model_id in removed_df.itertuples(index=False):
+        shutil.rmtree(get_partition_dir(export_dir, month, cpu_model_id), ignore_errors=True)
+
+    # Written last, so partitions of an interrupted export are exported again next time
+    manifest_df = stats_df.merge(
+        manifest_df[[*PARTITION_COLUMNS, "checksum", "exported_at"]],
+        on=PARTITION_COLUMNS,
+        how="left",
+        suffixes=("", "_exported"),
+    )
+    is_unchanged = manifest_df["checksum"] == manifest_df["checksum_exported"]
+    manifest_df["exported_at"] = manifest_df["exported_at"].where(
+        is_unchanged.fillna(False), pd.Timestamp(datetime.now())
+    )
+    write_manifest(export_dir, manifest_df)
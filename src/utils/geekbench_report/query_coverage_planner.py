@@ -0,0 +1,127 @@
+"""
+Query coverage planner for https://browser.geekbench.com/search.
+
+Geekbench search is fuzzy, e.g. `q=Intel Core i7-12700` also returns results of
+i7-12700F, i7-12700K and i7-12700KF. The planner records which CPU models every
+query actually returned, and skips the query of a CPU model when a broader query
+in the same run already covers it.
+
+Scraped rows are always routed by the `cpu_model` parsed from the row itself,
+so results returned by a broader query land on their true `cpu_model_id`.
+
+Query coverage is kept in a local JSON file. If the file is lost, no query is
+skipped until the coverage is observed again.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+
+from utils.geekbench_report.crawl_scheduler import CpuModelCrawlPlan
+
+QUERY_COVERAGE_FILE_PATH = "/tmp/sync_cpu_model_result_query_coverage.json"
+
+
+@dataclass
+class CpuModelQuery:
+    query: str
+    offset_date: datetime
+    # CPU models whose results are fully returned by this query, including the query itself
+    covered_cpu_model_list: list[str]
+
+
+def read_query_coverage() -> dict[str, set[str]]:
+    """Return a dict with key as query and value as CPU models returned by the query."""
+    if not os.path.exists(QUERY_COVERAGE_FILE_PATH):
+        return {}
+    with open(QUERY_COVERAGE_FILE_PATH, "r") as f:
+        try:
+            return {query: set(cpu_model_list) for query, cpu_model_list in json.load(f).items()}
+        except Exception:
+            return {}
+
+
+def write_query_coverage(query_coverage: dict[str, set[str]]) -> None:
+    with open(QUERY_COVERAGE_FILE_PATH, "w") as f:
+        json.dump(
+            {query: sorted(cpu_model_set) for query, cpu_model_set in query_coverage.items()},
+            f,
+            ensure_ascii=False,
+        )
+
+
+def record_query_coverage(
+    query_coverage: dict[str, set[str]],
+    query: str,
+    returned_cpu_model_list: list[str],
+) -> None:
+    query_coverage.setdefault(query, set()).update(
+        cpu_model for cpu_model in returned_cpu_model_list if cpu_model
+    )
+
+
+def is_broader_query(query: str, cpu_model: str) -> bool:
+    """
+    Return True if every token of `query` is a prefix of a token of `cpu_model`.
+    >>> is_broader_query("Intel Core i7-12700", "Intel Core i7-12700KF")  # True
+    >>> is_broader_query("Intel Core i7-12700KF", "Intel Core i7-12700")  # False
+    """
+    if query == cpu_model:
+        return False
+    cpu_model_tokens = cpu_model.lower().split()
+    return all(
+        any(cpu_model_token.startswith(query_token) for cpu_model_token in cpu_model_tokens)
+        for query_token in query.lower().split()
+    )
+
+
+def covers(query_coverage: dict[str, set[str]], query: str, cpu_model: str) -> bool:
+    """A query covers a CPU model if it was observed returning it and it is broader."""
+    return cpu_model in query_coverage.get(query, set()) and is_broader_query(query, cpu_model)
+
+
+def plan_cpu_model_queries(
+    crawl_plan_list: list[CpuModelCrawlPlan],
+    query_coverage: dict[str, set[str]],
+) -> list[CpuModelQuery]:
+    """
+    Collapse crawl plans into search queries, keeping the order of `crawl_plan_list`.
+
+    A CPU model is folded into the query of a broader CPU model scheduled in the same run,
+    only if its results do not need to go further back than the broader query crawls anyway.
+    Otherwise folding would make the broader query crawl more pages than it saves.
+    """
+    plan_map = {plan.cpu_model: plan for plan in crawl_plan_list}
+
+    # Roots are the CPU models not covered by any other scheduled CPU model
+    root_set = {
+        cpu_model
+        for cpu_model in plan_map
+        if not any(covers(query_coverage, query, cpu_model) for query in plan_map)
+    }
+
+    query_map: dict[str, CpuModelQuery] = {}
+    for plan in crawl_plan_list:
+        root_cpu_model = plan.cpu_model
+        if plan.cpu_model not in root_set:
+            candidate_root_list = [
+                root
+                for root in root_set
+                if covers(query_coverage, root, plan.cpu_model)
+                and plan_map[root].last_uploaded <= plan.last_uploaded
+            ]
+            if candidate_root_list:
+                # The broadest query has the fewest characters
+                root_cpu_model = min(candidate_root_list, key=len)
+
+        if root_cpu_model not in query_map:
+            query_map[root_cpu_model] = CpuModelQuery(
+                query=root_cpu_model,
+                offset_date=plan_map[root_cpu_model].last_uploaded,
+                covered_cpu_model_list=[root_cpu_model],
+            )
+        if plan.cpu_model != root_cpu_model:
+            query_map[root_cpu_model].covered_cpu_model_list.append(plan.cpu_model)
+
+    return list(query_map.values())
@@ -84,7 +84,7 @@ final_table as (
 	left join cpu_model_names dim
 		on s.cpu_model_id = dim.cpu_model_id
 	left join cpu_model_benchmarks b
-		on dim.cpu_model = b.cpu_model
+		on s.cpu_model_id = b.cpu_model_id
 	left join cpu_codename_dim detail
 		on s.cpu_model_id = detail.cpu_model_id
 -- 	order by dim.cpu_model
@@ -0,0 +1,47 @@
+FREQUENCY_MHZ_SQL = r"""CASE
+		WHEN {column} ~* '\d\s*GHz'
+			THEN round(substring({column} from '(?i)(\d+(?:\.\d+)?)\s*GHz')::numeric * 1000)::int4
+		WHEN {column} ~* '\d\s*MHz'
+			THEN round(substring({column} from '(?i)(\d+(?:\.\d+)?)\s*MHz')::numeric)::int4
+	END"""
+
+INT_SQL = r"NULLIF(regexp_replace({column}::text, '[^0-9]', '', 'g'), '')::int4"
+
+sql = f"""-- Platform dimension, dictionary of the repeated `cpu_model_results.platform` text
+create table if not exists platform_names (
+	platform_id int2 generated always as identity primary key,
+	platform text unique
+);
+
+insert into platform_names (platform)
+select distinct platform
+from cpu_model_results
+where platform is not null
+order by platform
+on conflict (platform) do nothing;
+
+-- cpu_model_results: migrated in place, so its indexes, constraints and grants are kept
+alter table cpu_model_results
+	add column frequency_mhz int4,
+	add column platform_id int2 references platform_names (platform_id);
+
+update cpu_model_results r
+set
+	frequency_mhz = {FREQUENCY_MHZ_SQL.format(column="r.frequency")},
+	platform_id = (select p.platform_id from platform_names p where p.platform = r.platform);
+
+alter table cpu_model_results
+	drop column frequency,
+	drop column platform;
+
+-- cpu_model_benchmarks: frequency text -> integer MHz
+alter table cpu_model_benchmarks rename column frequency to frequency_mhz;
+alter table cpu_model_benchmarks
+	alter column frequency_mhz type int4 using {FREQUENCY_MHZ_SQL.format(column="frequency_mhz")};
+
+-- cpu_model_details: views and scores stored as text -> int4
+alter table cpu_model_details
+	alter column views type int4 using {INT_SQL.format(column="views")},
+	alter column single_core_score type int4 using {INT_SQL.format(column="single_core_score")},
+	alter column multi_core_score type int4 using {INT_SQL.format(column="multi_core_score")};
+"""
@@ -0,0 +1,96 @@
+"""
+Transforms shared by the loaders of scraped Geekbench rows.
+
+Scrapers keep the text shown on Geekbench; these functions turn it into the compact
+typed columns stored in PostgreSQL (integer MHz, dimension IDs, integer scores).
+"""
+
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils.geekbench_report.database_helper import (
+    get_cpu_model_map_from_pg,
+    get_platform_map_from_pg,
+    get_system_map_from_pg,
+    update_cpu_model_names,
+    update_platform_names,
+    update_system_names,
+)
+from utils.geekbench_report.dtypes import RESULT_DTYPES, apply_dtypes
+
+# e.g. "3200 MHz", "4.2 GHz", "4.20 GHz (Boost)"
+FREQUENCY_PATTERN = r"(?P<value>\d+(?:\.\d+)?)\s*(?P<unit>[GM])Hz"
+FREQUENCY_UNIT_TO_MHZ = {"G": 1000, "M": 1}
+
+
+@dataclass
+class DimensionMaps:
+    system_map: dict[str, int]
+    cpu_model_map: dict[str, int]
+    platform_map: dict[str, int]
+
+
+def get_dimension_maps() -> DimensionMaps:
+    return DimensionMaps(
+        system_map=get_system_map_from_pg(),
+        cpu_model_map=get_cpu_model_map_from_pg(),
+        platform_map=get_platform_map_from_pg(),
+    )
+
+
+def t_parse_frequency_mhz(frequency: pd.Series) -> pd.Series:
+    """Parse frequency text into integer MHz, unparseable values become NA."""
+    extracted = frequency.astype("string").str.extract(FREQUENCY_PATTERN, flags=re.IGNORECASE)
+    mhz = pd.to_numeric(extracted["value"]) * extracted["unit"].str.upper().map(
+        FREQUENCY_UNIT_TO_MHZ
+    ).astype("Float64")
+    # Round half up, same as `round()` of numeric in the migration SQL
+    return np.floor(mhz + 0.5).astype("Int32")
+
+
+def t_parse_int(value: pd.Series) -> pd.Series:
+    """Parse integers shown with thousands separators (e.g. "12,345"), others become NA."""
+    return pd.to_numeric(
+        value.astype("string").str.replace(",", "", regex=False).str.strip(),
+        errors="coerce",
+    ).astype("Int32")
+
+
+def t_compact_result_df(df: pd.DataFrame, dimension_maps: DimensionMaps) -> pd.DataFrame:
+    """
+    Turn scraped results into `cpu_model_results` rows.
+
+    `system`/`cpu_model`/`platform` are replaced with their IDs (names seen for the first
+    time are inserted, and `dimension_maps` is refreshed in place), and `frequency` with
+    `frequency_mhz`.
+    """
+    # update system_names, cpu_model_names and platform_names if new one detected
+    if df[~(df["system"].isin(dimension_maps.system_map))].shape[0] > 0:
+        update_system_names(df["system"].to_list())
+        dimension_maps.system_map = get_system_map_from_pg()
+    if df[~(df["cpu_model"].isin(dimension_maps.cpu_model_map))].shape[0] > 0:
+        update_cpu_model_names(df["cpu_model"].to_list())
+        dimension_maps.cpu_model_map = get_cpu_model_map_from_pg()
+    new_platform = df["platform"].notna() & ~(df["platform"].isin(dimension_maps.platform_map))
+    if df[new_platform].shape[0] > 0:
+        update_platform_names(df["platform"].to_list())
+        dimension_maps.platform_map = get_platform_map_from_pg()
+
+    # Rows are routed by their own cpu_model, not by the query they came from
+    compact_df = pd.DataFrame(
+        {
+            "cpu_result_id": df["cpu_result_id"],
+            "frequency_mhz": t_parse_frequency_mhz(df["frequency"]),
+            "cores": df["cores"],
+            "uploaded": df["uploaded"],
+            "platform_id": df["platform"].map(dimension_maps.platform_map),
+            "single_core_score": df["single_core_score"],
+            "multi_core_score": df["multi_core_score"],
+            "cpu_model_id": df["cpu_model"].map(dimension_maps.cpu_model_map),
+            "system_id": df["system"].map(dimension_maps.system_map),
+        }
+    )
+    return apply_dtypes(compact_df, RESULT_DTYPES)
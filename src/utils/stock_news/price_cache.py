@@ -0,0 +1,266 @@
+"""
+Local cache of daily OHLCV price history, one Arrow IPC file per symbol.
+
+An update downloads, for all symbols at once (in chunks of `DOWNLOAD_CHUNK_SIZE`), only
+the bars since the last cached bar plus a short trailing window (`REFRESH_WINDOW_DAYS`),
+which replaces the cached tail:
+the last bar of an intraday run and late corrections are overwritten. Prices are
+adjusted (`auto_adjust=True`), so a split or a dividend restates the whole history;
+when a refreshed bar before the last cached one differs from the cache, the history
+of the symbol is downloaded again from its first cached date.
+
+Files are uncompressed Arrow, so reads are memory-mapped instead of decoded.
+
+Layout:
+    {cache_dir}/0050.TW.arrow
+    {cache_dir}/2330.TW.arrow
+
+>>> update_price_cache(cache_dir, ["0050.TW", "2330.TW"])
+>>> close_df = read_close_prices(cache_dir, ["0050.TW", "2330.TW"])
+"""
+
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import yfinance as yf
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STOCK_NEWS_PRICE_CACHE_DIR = os.getenv("STOCK_NEWS_PRICE_CACHE_DIR", "/tmp/stock_news_price_cache")
+
+# Download period of a symbol not cached yet
+INITIAL_PERIOD = "1y"
+# Cached bars within this many days before the last cached bar are downloaded again
+REFRESH_WINDOW_DAYS = 7
+# Relative difference of a refreshed close from the cached one that means a restatement
+RESTATEMENT_RTOL = 1e-6
+# Symbols per `yf.download()`, which builds one wide frame of all its symbols
+DOWNLOAD_CHUNK_SIZE = 200
+# Symbols downloaded at once. Chunks run one after another: `yf.download()` keeps its
+# results in module globals, so concurrent calls would mix them up
+MAX_CONCURRENT_DOWNLOADS = 8
+
+PRICE_SCHEMA = pa.schema(
+    [
+        ("date", pa.timestamp("us")),
+        ("open", pa.float64()),
+        ("high", pa.float64()),
+        ("low", pa.float64()),
+        ("close", pa.float64()),
+        ("volume", pa.int64()),
+    ]
+)
+PRICE_COLUMN_MAP = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+}
+
+
+def get_price_path(cache_dir: Path, symbol: str) -> Path:
+    return cache_dir / f"{symbol}.arrow"
+
+
+def read_price_history(cache_dir: str | Path, symbol: str) -> pa.Table | None:
+    """Memory-mapped price history of a symbol, None if it is not cached."""
+    price_path = get_price_path(Path(cache_dir), symbol)
+    if not price_path.exists():
+        return None
+    with pa.memory_map(str(price_path)) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def read_close_prices(cache_dir: str | Path, symbol_list: list[str]) -> pd.DataFrame:
+    """
+    Cached daily close prices, one column per symbol (all NaN if not cached),
+    on the union of the dates of the symbols.
+    """
+    date_list = []
+    close_list = []
+    for symbol in symbol_list:
+        table = read_price_history(cache_dir, symbol)
+        if table is None:
+            table = PRICE_SCHEMA.empty_table()
+        date_list.append(table["date"].to_numpy())
+        close_list.append(table["close"].to_numpy())
+
+    # Filled column by column, without aligning thousands of Series
+    date_index = np.unique(np.concatenate(date_list)) if date_list else np.array([], "M8[us]")
+    close = np.full((len(date_index), len(symbol_list)), np.nan)
+    for column, (dates, closes) in enumerate(zip(date_list, close_list)):
+        close[np.searchsorted(date_index, dates), column] = closes
+    return pd.DataFrame(close, index=pd.DatetimeIndex(date_index), columns=symbol_list)
+
+
+def write_price_history(cache_dir: Path, symbol: str, table: pa.Table) -> None:
+    price_path = get_price_path(cache_dir, symbol)
+    tmp_path = price_path.with_suffix(".tmp")
+    with pa.OSFile(str(tmp_path), "wb") as sink:
+        with pa.ipc.new_file(sink, PRICE_SCHEMA) as writer:
+            writer.write_table(table)
+    # Readers never map a partial file
+    os.replace(tmp_path, price_path)
+
+
+def split_price_history(df: pd.DataFrame, symbol_list: list[str]) -> dict[str, pa.Table]:
+    """
+    Bars of every symbol (empty if missing) out of the wide frame of `yf.download()`,
+    through one NumPy array instead of a pandas selection per symbol.
+    """
+    price_column_list = list(PRICE_COLUMN_MAP)
+    # -1 for the columns of a missing symbol
+    column_index = np.full((len(symbol_list), len(price_column_list)), -1)
+    if not df.empty:
+        values = df.to_numpy(dtype="float64")
+        date_values = pd.DatetimeIndex(df.index).to_numpy(dtype="datetime64[us]")
+        column_index = df.columns.get_indexer(
+            pd.MultiIndex.from_product([symbol_list, price_column_list])
+        ).reshape(column_index.shape)
+
+    price_table_map = {}
+    for symbol, symbol_column_index in zip(symbol_list, column_index):
+        if (symbol_column_index < 0).any():
+            price_table_map[symbol] = PRICE_SCHEMA.empty_table()
+            continue
+        price = values[:, symbol_column_index]
+        is_traded = ~np.isnan(price[:, price_column_list.index("Close")])
+        price = price[is_traded]
+        price_table_map[symbol] = pa.Table.from_arrays(
+            [
+                date_values[is_traded],
+                *price[:, :-1].T,
+                np.nan_to_num(price[:, -1]).astype("int64"),
+            ],
+            schema=PRICE_SCHEMA,
+        )
+    return price_table_map
+
+
+def download_price_history(
+    symbol_list: list[str],
+    start: date | None = None,
+    period: str | None = None,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+    max_workers: int = MAX_CONCURRENT_DOWNLOADS,
+) -> dict[str, pa.Table]:
+    """
+    Download daily OHLCV of all symbols from `start` or over `period`, `chunk_size`
+    symbols per batched request with `max_workers` of them in flight. Return a dict with
+    key as symbol and value as its bars (empty if it failed).
+    """
+    price_table_map = {}
+    for chunk_start in range(0, len(symbol_list), chunk_size):
+        chunk_symbol_list = symbol_list[chunk_start : chunk_start + chunk_size]
+        df = yf.download(
+            chunk_symbol_list,
+            start=start,
+            period=period,
+            interval="1d",
+            auto_adjust=True,
+            progress=False,
+            group_by="ticker",
+            threads=max_workers,
+        )
+        price_table_map.update(split_price_history(df, chunk_symbol_list))
+        if len(symbol_list) > chunk_size:
+            print(f"Downloaded {len(price_table_map)}/{len(symbol_list)} symbols")
+    return price_table_map
+
+
+def is_restated(cached_table: pa.Table, fetched_table: pa.Table) -> bool:
+    """
+    Whether refreshed bars before the last cached bar (final, unlike the last one,
+    which may be intraday) differ from the cache.
+    """
+    cached_dates = cached_table["date"].to_numpy()
+    is_final = cached_dates < cached_dates[-1]
+    _, cached_index, fetched_index = np.intersect1d(
+        cached_dates[is_final], fetched_table["date"].to_numpy(), return_indices=True
+    )
+    return not np.allclose(
+        fetched_table["close"].to_numpy()[fetched_index],
+        cached_table["close"].to_numpy()[is_final][cached_index],
+        rtol=RESTATEMENT_RTOL,
+        atol=0,
+    )
+
+
+def merge_price_history(cached_table: pa.Table, fetched_table: pa.Table) -> pa.Table:
+    """Replace the cached bars from the first fetched date on with the fetched bars."""
+    kept_count = np.searchsorted(
+        cached_table["date"].to_numpy(), fetched_table["date"].to_numpy()[0]
+    )
+    return pa.concat_tables([cached_table.slice(0, kept_count), fetched_table])
+
+
+def group_symbols_by_start(start_map: dict[str, date | None]) -> dict[date | None, list[str]]:
+    """Symbols with the same download start, so each group is downloaded together."""
+    start_symbol_map: dict[date | None, list[str]] = {}
+    for symbol, start in start_map.items():
+        start_symbol_map.setdefault(start, []).append(symbol)
+    return start_symbol_map
+
+
+def update_price_cache(
+    cache_dir: str | Path,
+    symbol_list: list[str],
+    refresh_window_days: int = REFRESH_WINDOW_DAYS,
+) -> dict[str, int]:
+    """
+    Download the missing and trailing bars of every symbol, batched by start date,
+    and write the updated histories. Return a dict with key as symbol and value as
+    the number of bars downloaded for it.
+    """
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    cached_table_map = {}
+    # None for a symbol not cached yet, downloaded over INITIAL_PERIOD
+    start_map: dict[str, date | None] = {}
+    for symbol in symbol_list:
+        table = read_price_history(cache_dir, symbol)
+        if table is None or table.num_rows == 0:
+            start_map[symbol] = None
+            continue
+        cached_table_map[symbol] = table
+        last_date = table["date"][-1].as_py().date()
+        start_map[symbol] = last_date - timedelta(days=refresh_window_days)
+
+    fetched_table_map = {}
+    for start, start_symbol_list in group_symbols_by_start(start_map).items():
+        if start is None:
+            fetched_table_map.update(
+                download_price_history(start_symbol_list, period=INITIAL_PERIOD)
+            )
+        else:
+            fetched_table_map.update(download_price_history(start_symbol_list, start=start))
+
+    # Restated histories are downloaded again over their cached dates
+    restated_start_map = {
+        symbol: cached_table_map[symbol]["date"][0].as_py().date()
+        for symbol in cached_table_map
+        if is_restated(cached_table_map[symbol], fetched_table_map[symbol])
+    }
+    for start, start_symbol_list in group_symbols_by_start(restated_start_map).items():
+        print(f"Price history of {start_symbol_list} restated, downloading it again")
+        for symbol, fetched_table in download_price_history(start_symbol_list, start=start).items():
+            fetched_table_map[symbol] = fetched_table
+            del cached_table_map[symbol]
+
+    fetched_count_map = {}
+    for symbol, fetched_table in fetched_table_map.items():
+        fetched_count_map[symbol] = fetched_table.num_rows
+        if fetched_table.num_rows == 0:
+            print(f"No price data of {symbol}, cache kept")
+            continue
+        if symbol in cached_table_map:
+            fetched_table = merge_price_history(cached_table_map[symbol], fetched_table)
+        write_price_history(cache_dir, symbol, fetched_table)
+    return fetched_count_map
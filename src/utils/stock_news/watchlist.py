@@ -0,0 +1,119 @@
+"""
+Watchlist statistics of thousands of symbols at once, and the symbols crossing the
+alert thresholds.
+
+The closes of all symbols are one 2-D array (dates x symbols, NaN where a symbol has no
+bar), so every statistic is one NumPy reduction along the dates instead of a loop over
+symbols.
+
+Watchlist file, one symbol per line:
+    # Taiwan ETFs
+    0050.TW
+    00830.TW
+
+>>> close_df = read_close_prices(cache_dir, symbol_list)
+>>> stats_df = get_watchlist_stats_df(close_df)
+>>> alert_df = get_alert_df(stats_df, [AlertRule("relative_high_percentage_1yr", ">=", 0.0)])
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Symbols of the notification, one per line; unset for its default list
+STOCK_NEWS_WATCHLIST_FILE_PATH = os.getenv("STOCK_NEWS_WATCHLIST_FILE_PATH")
+
+# Windows of the statistics, in months up to the latest close
+WINDOW_MONTH_MAP = {"3mo": 3, "6mo": 6, "1yr": 12}
+
+OPERATOR_MAP = {"<=": np.less_equal, ">=": np.greater_equal}
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """A symbol crosses the rule when `column` of its statistics `operator` `threshold`."""
+
+    column: str
+    operator: str
+    threshold: float
+
+    def __str__(self) -> str:
+        return f"{self.column} {self.operator} {self.threshold:g}"
+
+
+def read_watchlist(watchlist_path: str | Path) -> list[str]:
+    """Symbols of a watchlist file in order, without blank lines, comments and duplicates."""
+    symbol_list = []
+    for line in Path(watchlist_path).read_text().splitlines():
+        symbol = line.split("#", 1)[0].strip().upper()
+        if symbol:
+            symbol_list.append(symbol)
+    return list(dict.fromkeys(symbol_list))
+
+
+def get_last_valid(close: np.ndarray) -> np.ndarray:
+    """Last non-NaN value of every column, NaN for a column without any."""
+    row_index = np.where(np.isnan(close), -1, np.arange(len(close))[:, None])
+    last_row = row_index.max(axis=0, initial=-1)
+    # Row -1 is a row of NaN
+    padded_close = np.vstack([close, np.full((1, close.shape[1]), np.nan)])
+    return padded_close[last_row, np.arange(close.shape[1])]
+
+
+def get_window_stats(close: np.ndarray, current_price: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    High, mean and max drawdown of the closes of a window (rows), relative to the
+    current price for the first two, in percent. NaN for a column without any close.
+    """
+    is_valid = ~np.isnan(close)
+    # fmax and fmin skip NaN, and are NaN only if the whole column is
+    high = np.fmax.reduce(close, axis=0, initial=np.nan)
+    running_high = np.fmax.accumulate(close, axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(is_valid, close, 0).sum(axis=0) / is_valid.sum(axis=0)
+        max_drawdown = np.fmin.reduce(close / running_high - 1, axis=0, initial=np.nan)
+    return {
+        "relative_high_percentage": (current_price / high - 1) * 100,
+        "relative_mean_percentage": (current_price / mean - 1) * 100,
+        "max_drawdown_percentage": max_drawdown * 100,
+    }
+
+
+def get_watchlist_stats_df(close_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Current price, and its percentage relative to the high and the mean close and the
+    max drawdown of every window of `WINDOW_MONTH_MAP`, from the daily closes (one
+    column per symbol). One row per symbol.
+    """
+    close = close_df.to_numpy(dtype=float)
+    # Latest close of each symbol, which may not have traded on the last date
+    current_price = get_last_valid(close)
+    stats_map = {"current_price": current_price}
+    for window, months in WINDOW_MONTH_MAP.items():
+        if len(close_df.index):
+            window_start = close_df.index.max() - pd.DateOffset(months=months)
+            start_row = close_df.index.searchsorted(window_start, side="right")
+        else:
+            start_row = 0
+        for name, stats in get_window_stats(close[start_row:], current_price).items():
+            stats_map[f"{name}_{window}"] = stats
+    return pd.DataFrame(stats_map, index=close_df.columns)
+
+
+def get_alert_df(stats_df: pd.DataFrame, rule_list: list[AlertRule]) -> pd.DataFrame:
+    """
+    Symbols crossing at least one rule, with one boolean column per rule (named by it)
+    telling which ones. NaN statistics cross no rule.
+    """
+    is_crossed_map = {
+        str(rule): OPERATOR_MAP[rule.operator](stats_df[rule.column].to_numpy(), rule.threshold)
+        for rule in rule_list
+    }
+    is_crossed_df = pd.DataFrame(is_crossed_map, index=stats_df.index)
+    return is_crossed_df[is_crossed_df.any(axis=1)]
@@ -0,0 +1,232 @@
+"""
+Throughput of `write_dataframes_diff_to_spreadsheet()` against a local stub of the Sheets API,
+through the real pygsheets client and googleapiclient over HTTP.
+
+The stub answers spreadsheets.get, values:batchGet (an empty worksheet, so the whole frame
+is written) and batchUpdate. It rejects payloads over 10 MB with 400, cells outside the
+grid with 400, and answers 429 above the write quota, scaled to 60 requests per 6 seconds.
+A batchUpdate takes 50 ms + 20 MB/s upload + 20 us per cell; requests are served concurrently.
+The token bucket of the writer is scaled to the same 6-second window.
+
+Frame: 40,000 rows x 12 columns (480,000 cells, ~22 MB of updateCells JSON).
+
+Output:
+              single request (previous writer): failed: 400 Request payload size exceeds the limit
+                         2 MB chunks, 1 worker: 15.3 s, 12 requests, 0 throttled
+                        2 MB chunks, 4 workers:  7.0 s, 12 requests, 0 throttled
+        200 KB chunks, 8 workers, token bucket: 15.2 s, 118 requests, 0 throttled
+     200 KB chunks, 8 workers, no token bucket:  9.5 s, 134 requests, 16 throttled
+
+Times include the diff and the split of the frame (~2 s). Without the token bucket the
+stub's short quota window recovers within the 1-2 s backoff; with the real per-minute
+window, throttled requests wait up to a minute and share the quota with other writers.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/common/benchmark_googlesheets_chunked_upload.py
+```
+"""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+import pygsheets
+from google.auth.credentials import AnonymousCredentials
+from googleapiclient import discovery
+from googleapiclient.errors import HttpError
+from pygsheets.client import Client
+
+from utils.common import googlesheets_utility
+from utils.common.googlesheets_utility import (
+    MAX_REQUEST_CELLS,
+    WRITE_REQUEST_BURST,
+    WRITE_REQUESTS_PER_MINUTE,
+    WorksheetTarget,
+    write_dataframes_diff_to_spreadsheet,
+)
+
+SPREADSHEET_ID = "stub-spreadsheet"
+WORKSHEET_TITLE = "Results"
+QUOTA_WINDOW_SECONDS = 6
+MAX_PAYLOAD_BYTES = 10_000_000
+
+
+class StubSheetsState:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.row_count = 1000
+        self.column_count = 26
+        self.window_start = time.monotonic()
+        self.window_request_count = 0
+        self.request_count = 0
+        self.throttled_count = 0
+        self.cell_count = 0
+
+
+class StubSheetsHandler(BaseHTTPRequestHandler):
+    state: StubSheetsState
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send_json(self, status: int, body: dict) -> None:
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def _send_error(self, status: int, message: str) -> None:
+        self._send_json(status, {"error": {"code": status, "message": message}})
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        if path.endswith("/values:batchGet"):
+            self._send_json(200, {"spreadsheetId": SPREADSHEET_ID, "valueRanges": [{}]})
+            return
+        with self.state.lock:
+            grid_properties = {
+                "rowCount": self.state.row_count,
+                "columnCount": self.state.column_count,
+            }
+        self._send_json(
+            200,
+            {
+                "spreadsheetId": SPREADSHEET_ID,
+                "properties": {"title": "Stub", "defaultFormat": {}},
+                "sheets": [
+                    {
+                        "properties": {
+                            "sheetId": 0,
+                            "title": WORKSHEET_TITLE,
+                            "index": 0,
+                            "sheetType": "GRID",
+                            "gridProperties": grid_properties,
+                        }
+                    }
+                ],
+            },
+        )
+
+    def do_POST(self) -> None:
+        content = self.rfile.read(int(self.headers["Content-Length"]))
+        state = self.state
+        with state.lock:
+            state.request_count += 1
+            now = time.monotonic()
+            if now - state.window_start >= QUOTA_WINDOW_SECONDS:
+                state.window_start, state.window_request_count = now, 0
+            state.window_request_count += 1
+            if state.window_request_count > WRITE_REQUESTS_PER_MINUTE:
+                state.throttled_count += 1
+                self._send_error(429, "Quota exceeded for quota metric 'Write requests'")
+                return
+        if len(content) > MAX_PAYLOAD_BYTES:
+            self._send_error(400, "Request payload size exceeds the limit")
+            return
+
+        cell_count = 0
+        for request in json.loads(content)["requests"]:
+            request_type, body = next(iter(request.items()))
+            if request_type == "appendDimension":
+                with state.lock:
+                    if body["dimension"] == "ROWS":
+                        state.row_count += body["length"]
+                    else:
+                        state.column_count += body["length"]
+                continue
+            grid_range = body["range"]
+            if (
+                grid_range["endRowIndex"] > state.row_count
+                or grid_range["endColumnIndex"] > state.column_count
+            ):
+                self._send_error(400, "Range exceeds grid limits")
+                return
+            if request_type == "updateCells":
+                cell_count += sum(len(row["values"]) for row in body["rows"])
+
+        time.sleep(0.05 + len(content) / 20_000_000 + cell_count * 0.00002)
+        with state.lock:
+            state.cell_count += cell_count
+        self._send_json(200, {"spreadsheetId": SPREADSHEET_ID, "replies": []})
+
+
+def get_stub_client(endpoint: str) -> Client:
+    client = Client(AnonymousCredentials())
+    data_path = os.path.join(os.path.dirname(pygsheets.__file__), "data")
+    with open(os.path.join(data_path, "sheets_discovery.json")) as f:
+        client.sheet.service = discovery.build_from_document(
+            json.load(f),
+            http=client.sheet.service._http,
+            client_options={"api_endpoint": endpoint},
+        )
+    return client
+
+
+def run_step(
+    name: str,
+    df: pd.DataFrame,
+    max_request_bytes: int,
+    max_request_cells: int,
+    max_workers: int,
+    rate: float,
+    capacity: float,
+) -> None:
+    state = StubSheetsState()
+    StubSheetsHandler.state = state
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSheetsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    token_bucket = googlesheets_utility.sheets_write_token_bucket
+    token_bucket.capacity = capacity
+    token_bucket.set_rate(rate)
+    # Start from a full bucket, as a fresh process does
+    token_bucket._tokens = capacity
+
+    spreadsheet = get_stub_client(f"http://127.0.0.1:{server.server_port}/").open_by_key(
+        SPREADSHEET_ID
+    )
+    start_time = time.perf_counter()
+    try:
+        write_dataframes_diff_to_spreadsheet(
+            spreadsheet,
+            [WorksheetTarget(WORKSHEET_TITLE, df, (1, 1))],
+            max_request_bytes=max_request_bytes,
+            max_request_cells=max_request_cells,
+            max_workers=max_workers,
+        )
+    except HttpError as error:
+        print(f"{name:>46}: failed: {error.resp.status} {error.reason}")
+        return
+    finally:
+        server.shutdown()
+        server.server_close()
+    elapsed = time.perf_counter() - start_time
+    assert state.cell_count == (len(df) + 1) * df.shape[1], name
+    print(
+        f"{name:>46}: {elapsed:4.1f} s, {state.request_count} requests, "
+        f"{state.throttled_count} throttled"
+    )
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        rng.integers(1000, 30000, (40_000, 12)), columns=[f"Score {i}" for i in range(12)]
+    )
+    rate = (WRITE_REQUESTS_PER_MINUTE - WRITE_REQUEST_BURST) / QUOTA_WINDOW_SECONDS
+
+    burst = WRITE_REQUEST_BURST
+    cells = MAX_REQUEST_CELLS
+    run_step("single request (previous writer)", df, 10**12, 10**12, 1, rate, burst)
+    run_step("2 MB chunks, 1 worker", df, 2_000_000, cells, 1, rate, burst)
+    run_step("2 MB chunks, 4 workers", df, 2_000_000, cells, 4, rate, burst)
+    run_step("200 KB chunks, 8 workers, token bucket", df, 200_000, cells, 8, rate, burst)
+    run_step("200 KB chunks, 8 workers, no token bucket", df, 200_000, cells, 8, 10**6, 10**6)
@@ -0,0 +1,106 @@
+"""
+Benchmark of `_guarantee_single_type()`: cell-by-cell `apply` (previous) vs vectorized,
+on a 5M-row frame with mixed-type object columns, checking that the outputs are identical
+(values, value types and dtypes).
+
+Output:
+    5,000,000 rows, object columns: ['mixed_id', 'amount', 'code', 'name']
+    apply:      11.1 s
+    vectorized:  7.2 s
+    identical output
+    arrow table with explicit schema: 0.02 s
+
+Most of the remaining time is `str()` of the 4.75M floats of "amount" (2.2 s) and the
+dtype inference of the results, which `apply()` also does. The Arrow cast of floats is
+2x faster but writes 1.0 as "1", so it is only used for integers.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/common/benchmark_guarantee_single_type.py 5000000
+```
+"""
+
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.common.bigquery_utility import _guarantee_single_type, get_arrow_schema
+
+
+def _guarantee_single_type_apply(df: pd.DataFrame) -> pd.DataFrame:
+    """Previous implementation."""
+    for column in df.columns:
+        if df[column].dtype == "object":
+            df[column] = df[column].apply(lambda x: str(x) if pd.notna(x) else x)
+
+    return df
+
+
+def get_mixed_df(row_count: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    is_null = rng.random(row_count) < 0.05
+
+    # ids read as int from some sources and as str from others
+    mixed_id = np.arange(row_count).astype(object)
+    is_str = rng.random(row_count) < 0.5
+    mixed_id[is_str] = mixed_id[is_str].astype(str)
+    mixed_id[is_null] = None
+
+    # amounts with "N/A" markers
+    amount = np.round(rng.random(row_count) * 1000, 2).astype(object)
+    amount[rng.random(row_count) < 0.01] = "N/A"
+    amount[is_null] = np.nan
+
+    # integer codes kept in an object column because of None
+    code = rng.integers(0, 10**9, row_count).astype(object)
+    code[is_null] = None
+
+    name = np.array([f"CPU {i}" for i in range(1000)], dtype=object)[
+        rng.integers(0, 1000, row_count)
+    ]
+    name[is_null] = None
+
+    return pd.DataFrame(
+        {
+            "mixed_id": mixed_id,
+            "amount": amount,
+            "code": code,
+            "name": pd.Series(name, dtype=object),
+            "score": rng.integers(1000, 30000, row_count),
+            "uploaded": pd.Timestamp("2025-01-01")
+            + pd.to_timedelta(rng.integers(0, 10**6, row_count), unit="s"),
+        }
+    )
+
+
+if __name__ == "__main__":
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    df = get_mixed_df(row_count)
+    object_column_list = [column for column in df.columns if df[column].dtype == "object"]
+    print(f"{row_count:,} rows, object columns: {object_column_list}")
+
+    start_time = time.perf_counter()
+    apply_df = _guarantee_single_type_apply(df.copy())
+    print(f"apply:      {time.perf_counter() - start_time:4.1f} s")
+
+    start_time = time.perf_counter()
+    vectorized_df = _guarantee_single_type(df.copy())
+    print(f"vectorized: {time.perf_counter() - start_time:4.1f} s")
+
+    pd.testing.assert_frame_equal(vectorized_df, apply_df, check_exact=True)
+    to_type = np.frompyfunc(type, 1, 1)
+    for column in object_column_list:
+        assert vectorized_df[column].dtype == apply_df[column].dtype, column
+        assert (
+            to_type(vectorized_df[column].to_numpy(dtype=object))
+            == to_type(apply_df[column].to_numpy(dtype=object))
+        ).all(), column
+    print("identical output")
+
+    start_time = time.perf_counter()
+    schema = get_arrow_schema(vectorized_df)
+    pa.Table.from_pandas(vectorized_df, schema=schema, preserve_index=False)
+    print(f"arrow table with explicit schema: {time.perf_counter() - start_time:.2f} s")
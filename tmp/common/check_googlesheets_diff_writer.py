@@ -0,0 +1,334 @@
+"""
+Check `write_dataframes_diff_to_spreadsheet()` against an in-memory fake of the Sheets API,
+counting the API calls and the bytes of the request bodies sent.
+
+The score frame has the shape of the geekbench score report (3,000 rows x 15 columns,
+as str), published together with the one-cell update time like `sync_pg_to_googlesheets`.
+For comparison, the previous writer authorized, opened the spreadsheet and sent the
+whole frame twice with `set_dataframe()` plus a format request, for each worksheet.
+
+Output:
+    previous writer, per refresh: 12+ calls, ~815572 bytes
+        first write (grows grid): 6 calls, 2 ranges, 2182304 bytes (split at 2 MB)
+               unchanged refresh: 2 calls, 0 ranges, 0 bytes
+              notes added beside: 2 calls, 0 ranges, 0 bytes
+                 3 cells changed: 3 calls, 3 ranges, 1262 bytes
+                 10 rows removed: 4 calls, 1 ranges, 4470 bytes
+              rows appended back: 4 calls, 1 ranges, 7953 bytes
+               2 columns removed: 4 calls, 1 ranges, 198428 bytes
+       applied, then 503 (grows): 7 calls, 1 ranges, 2548821 bytes
+
+Every write reads the extents last written from the developer metadata of the worksheets,
+and records a changed extent in a batchUpdate of its own. Notes written by hand beside the
+frames, and below the one-cell update time, are kept when the frames shrink.
+
+A batchUpdate answered with a 503 may have been applied. The growth of the grid
+(`appendDimension` adds rows) is then resent only for what the grid read again still
+lacks, here nothing; the extent record and the cells (`updateDeveloperMetadata` and
+`updateCells`, idempotent) are resent as they are.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/common/check_googlesheets_diff_writer.py
+```
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta
+
+import httplib2
+import numpy as np
+import pandas as pd
+from googleapiclient.errors import HttpError
+
+from utils.common import googlesheets_utility
+from utils.common.googlesheets_utility import WorksheetTarget, write_dataframes_diff_to_spreadsheet
+
+
+class FakeWorksheet:
+    def __init__(self, sheet_id: int, title: str, rows: int, cols: int) -> None:
+        self.id = sheet_id
+        self.title = title
+        # Grid size on the server; `jsonSheet` is the cached copy, read again by `refresh()`
+        self.grid_properties = {"rowCount": rows, "columnCount": cols}
+        self.refresh()
+        self.grid: dict[tuple[int, int], object] = {}
+        self.text_cell_set: set[tuple[int, int]] = set()
+
+    def refresh(self) -> None:
+        self.jsonSheet = {"properties": {"gridProperties": dict(self.grid_properties)}}
+
+    @property
+    def rows(self) -> int:
+        return self.jsonSheet["properties"]["gridProperties"]["rowCount"]
+
+    @property
+    def cols(self) -> int:
+        return self.jsonSheet["properties"]["gridProperties"]["columnCount"]
+
+
+class FakeSheetAPI:
+    """Worksheet grids of one spreadsheet, read and written like the Sheets API v4 does."""
+
+    def __init__(self, worksheet_list: list[FakeWorksheet]) -> None:
+        self.worksheet_map = {worksheet.id: worksheet for worksheet in worksheet_list}
+        self.metadata_list: list[dict] = []
+        self.call_count = 0
+        self.bytes_sent = 0
+        # batchUpdate calls applied but answered with a 503
+        self.applied_unavailable_count = 0
+        self._lock = threading.Lock()
+
+    def values_batch_get(self, spreadsheet_id, value_ranges, value_render_option=None) -> list:
+        self.call_count += 1
+        return [self._get_value_range(value_range) for value_range in value_ranges]
+
+    def search_developer_metadata(self, spreadsheet_id, body) -> dict:
+        self.call_count += 1
+        lookup_list = [
+            data_filter["developerMetadataLookup"] for data_filter in body["dataFilters"]
+        ]
+        matched_list = [
+            {"developerMetadata": metadata}
+            for metadata in self.metadata_list
+            if any(self._is_matched(metadata, lookup) for lookup in lookup_list)
+        ]
+        return {"matchedDeveloperMetadata": matched_list} if matched_list else {}
+
+    @staticmethod
+    def _is_matched(metadata: dict, lookup: dict) -> bool:
+        return (
+            metadata["metadataKey"] == lookup["metadataKey"]
+            and metadata["location"]["sheetId"] == lookup["metadataLocation"]["sheetId"]
+        )
+
+    def _get_value_range(self, value_range: str) -> dict:
+        title, a1_range = value_range.rsplit("!", 1)
+        worksheet = next(
+            worksheet
+            for worksheet in self.worksheet_map.values()
+            if f"'{worksheet.title}'" == title
+        )
+        start_label, end_label = a1_range.split(":")
+        start_row, start_column = label_to_index(start_label)
+        end_row, end_column = label_to_index(end_label)
+        values = []
+        for row in range(start_row, end_row + 1):
+            row_values = [
+                worksheet.grid.get((row, column), "")
+                for column in range(start_column, end_column + 1)
+            ]
+            # Trailing empty cells and rows are omitted by the API
+            while row_values and row_values[-1] == "":
+                row_values.pop()
+            values.append(row_values)
+        while values and not values[-1]:
+            values.pop()
+        return {"values": values} if values else {}
+
+    def batch_update(self, spreadsheet_id, requests, **kwargs) -> dict:
+        request_bytes = len(json.dumps({"requests": requests}))
+        with self._lock:
+            self.call_count += 1
+            self.bytes_sent += request_bytes
+        for request in requests:
+            request_type, body = next(iter(request.items()))
+            if request_type == "appendDimension":
+                grid_properties = self.worksheet_map[body["sheetId"]].grid_properties
+                key = "rowCount" if body["dimension"] == "ROWS" else "columnCount"
+                grid_properties[key] += body["length"]
+                continue
+            if request_type == "createDeveloperMetadata":
+                metadata = dict(body["developerMetadata"])
+                metadata["metadataId"] = len(self.metadata_list) + 1
+                metadata["location"] = {**metadata["location"], "locationType": "SHEET"}
+                self.metadata_list.append(metadata)
+                continue
+            if request_type == "updateDeveloperMetadata":
+                lookup = body["dataFilters"][0]["developerMetadataLookup"]
+                for metadata in self.metadata_list:
+                    if self._is_matched(metadata, lookup):
+                        metadata["metadataValue"] = body["developerMetadata"]["metadataValue"]
+                continue
+
+            grid_range = body["range"]
+            worksheet = self.worksheet_map[grid_range["sheetId"]]
+            assert grid_range["endRowIndex"] <= worksheet.grid_properties["rowCount"]
+            assert grid_range["endColumnIndex"] <= worksheet.grid_properties["columnCount"]
+            if request_type == "repeatCell":
+                for row in range(grid_range["startRowIndex"], grid_range["endRowIndex"]):
+                    for column in range(
+                        grid_range["startColumnIndex"], grid_range["endColumnIndex"]
+                    ):
+                        worksheet.text_cell_set.add((row, column))
+                continue
+            for row_offset, row in enumerate(body["rows"]):
+                for column_offset, cell in enumerate(row["values"]):
+                    key = (
+                        grid_range["startRowIndex"] + row_offset,
+                        grid_range["startColumnIndex"] + column_offset,
+                    )
+                    value = next(iter(cell["userEnteredValue"].values()), "")
+                    if isinstance(value, float) and value.is_integer():
+                        value = int(value)
+                    worksheet.grid[key] = value
+        with self._lock:
+            is_unavailable = self.applied_unavailable_count > 0
+            self.applied_unavailable_count -= is_unavailable
+        if is_unavailable:
+            raise HttpError(httplib2.Response({"status": 503}), b"Service unavailable")
+        return {"replies": []}
+
+
+class FakeSheetService:
+    """`service.spreadsheets().batchUpdate(...).execute(http=...)` routed to the fake API."""
+
+    def __init__(self, sheet_api: FakeSheetAPI) -> None:
+        self.sheet_api = sheet_api
+
+    def spreadsheets(self) -> "FakeSheetService":
+        return self
+
+    def batchUpdate(self, spreadsheetId, body, **kwargs):
+        sheet_api = self.sheet_api
+        return type(
+            "FakeRequest",
+            (),
+            {"execute": lambda self, http=None: sheet_api.batch_update(spreadsheetId, **body)},
+        )()
+
+    def developerMetadata(self) -> "FakeSheetService":
+        return self
+
+    def search(self, spreadsheetId, body):
+        sheet_api = self.sheet_api
+        return type(
+            "FakeRequest",
+            (),
+            {
+                "execute": lambda self, http=None: sheet_api.search_developer_metadata(
+                    spreadsheetId, body
+                )
+            },
+        )()
+
+
+class FakeSpreadsheet:
+    def __init__(self, worksheet_list: list[FakeWorksheet]) -> None:
+        self.id = "fake-spreadsheet"
+        self.worksheet_list = worksheet_list
+        # Cells written by hand beside the frames, by worksheet title
+        self.note_cell_map: dict[str, dict[tuple[int, int], str]] = {}
+        sheet_api = FakeSheetAPI(worksheet_list)
+        sheet_api.service = FakeSheetService(sheet_api)
+        self.client = type("FakeClient", (), {"sheet": sheet_api, "oauth": None})()
+
+    def worksheet_by_title(self, title: str) -> FakeWorksheet:
+        return next(worksheet for worksheet in self.worksheet_list if worksheet.title == title)
+
+
+def label_to_index(label: str) -> tuple[int, int]:
+    """ "B12" -> (11, 1), 0-based."""
+    letters = "".join(character for character in label if character.isalpha())
+    column = 0
+    for character in letters:
+        column = column * 26 + ord(character) - ord("A") + 1
+    return int(label[len(letters) :]) - 1, column - 1
+
+
+def get_report_df(rng: np.random.Generator, row_count: int = 3000) -> pd.DataFrame:
+    df = pd.DataFrame(
+        rng.integers(1000, 30000, (row_count, 13)), columns=[f"Score {i}" for i in range(13)]
+    )
+    df.insert(0, "Processor name", [f"CPU {i}" for i in range(row_count)])
+    df.insert(0, "Generation", rng.choice(["Zen 4", "Raptor Lake", ""], row_count))
+    return df.astype(object).fillna("").astype(str).astype(object)
+
+
+# Cells written by hand beside the frames, (row, column) 0-based -> value
+NOTE_CELL_MAP = {
+    "Score (new)": {(5, 20): "note beside the report"},
+    "Data date (new)": {(1, 2): "note beside the date", (4, 0): "note below the date"},
+}
+
+
+def add_notes(spreadsheet: FakeSpreadsheet) -> None:
+    for title, note_cell_map in NOTE_CELL_MAP.items():
+        spreadsheet.worksheet_by_title(title).grid.update(note_cell_map)
+        spreadsheet.note_cell_map[title] = note_cell_map
+
+
+def run_step(
+    spreadsheet: FakeSpreadsheet, name: str, score_df: pd.DataFrame, update_time_df: pd.DataFrame
+) -> None:
+    sheet_api = spreadsheet.client.sheet
+    call_count, bytes_sent = sheet_api.call_count, sheet_api.bytes_sent
+    target_list = [
+        WorksheetTarget("Score (new)", score_df, (2, 1), copy_head=False),
+        WorksheetTarget("Data date (new)", update_time_df, (2, 1), copy_head=False),
+    ]
+    range_count = write_dataframes_diff_to_spreadsheet(spreadsheet, target_list)
+    print(
+        f"{name:>28}: {sheet_api.call_count - call_count} calls, "
+        f"{range_count} ranges, {sheet_api.bytes_sent - bytes_sent} bytes"
+    )
+
+    # Every worksheet now holds exactly its frame and its notes, with TEXT format on
+    # object-type cells, and the frame's extent is recorded
+    for target in target_list:
+        worksheet = spreadsheet.worksheet_by_title(target.worksheet_title)
+        expected = {
+            (1 + row, column): value
+            for row, values in enumerate(target.df.astype(str).values.tolist())
+            for column, value in enumerate(values)
+            if value != ""
+        }
+        text_cell_set = {key for key in expected if target.df.dtypes.iloc[key[1]] == "object"}
+        expected.update(spreadsheet.note_cell_map.get(target.worksheet_title, {}))
+        actual = {key: value for key, value in worksheet.grid.items() if value != ""}
+        assert actual == expected, name
+        assert text_cell_set <= worksheet.text_cell_set, name
+        assert [
+            metadata["metadataValue"]
+            for metadata in sheet_api.metadata_list
+            if metadata["location"]["sheetId"] == worksheet.id
+        ] == ["{}x{}".format(*target.df.shape)], name
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    spreadsheet = FakeSpreadsheet(
+        [
+            FakeWorksheet(0, "Score (new)", rows=1000, cols=26),
+            FakeWorksheet(1, "Data date (new)", rows=1000, cols=26),
+        ]
+    )
+    score_df = get_report_df(rng)
+    update_time_df = pd.DataFrame([{"Last Update": datetime(2025, 6, 16, 10)}])
+    full_bytes = 2 * len(json.dumps({"values": score_df.values.tolist()}))
+    print(f"{'previous writer, per refresh':>28}: 12+ calls, ~{full_bytes} bytes")
+
+    run_step(spreadsheet, "first write (grows grid)", score_df, update_time_df)
+    run_step(spreadsheet, "unchanged refresh", score_df, update_time_df)
+    add_notes(spreadsheet)
+    run_step(spreadsheet, "notes added beside", score_df, update_time_df)
+
+    score_df = score_df.copy()
+    for row, column in [(5, 3), (6, 3), (1200, 10)]:
+        score_df.iat[row, column] = str(int(score_df.iat[row, column]) + 1)
+    update_time_df = update_time_df + timedelta(days=1)
+    run_step(spreadsheet, "3 cells changed", score_df, update_time_df)
+
+    run_step(spreadsheet, "10 rows removed", score_df.iloc[:-10], update_time_df)
+    run_step(spreadsheet, "rows appended back", score_df, update_time_df)
+    run_step(spreadsheet, "2 columns removed", score_df.iloc[:, :-2], update_time_df)
+
+    # The growth and the record of the larger extent are applied but answered with a 503:
+    # the grid is read again instead of growing twice, the record is resent
+    googlesheets_utility._get_backoff_seconds = lambda attempt, error: 0.0
+    spreadsheet.client.sheet.applied_unavailable_count = 2
+    run_step(spreadsheet, "applied, then 503 (grows)", get_report_df(rng, 3500), update_time_df)
+    worksheet = spreadsheet.worksheet_by_title("Score (new)")
+    assert worksheet.grid_properties == {"rowCount": 3501, "columnCount": 26}
+    assert worksheet.jsonSheet["properties"]["gridProperties"] == worksheet.grid_properties
@@ -0,0 +1,104 @@
+"""
+Micro-benchmark of detail page parsing: full parse tree (previous code) vs restricted single pass.
+
+Save some pages first, e.g.
+```bash
+mkdir -p tmp/geekbench_report/detail_pages
+curl -A "Mozilla/5.0" https://browser.geekbench.com/v6/cpu/12479005 \
+    -o tmp/geekbench_report/detail_pages/12479005.html
+```
+Then run:
+```bash
+PYTHONPATH=src python tmp/geekbench_report/benchmark_detail_page_parsing.py tmp/geekbench_report/detail_pages
+```
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from utils.geekbench_report.core.geekbench_processor_detail_scraper import (
+    GeekbenchProcessorDetail,
+    GeekbenchProcessorDetailScraper,
+)
+
+
+def parse_detail_page_full_tree(
+    scraper: GeekbenchProcessorDetailScraper, html: str
+) -> GeekbenchProcessorDetail:
+    """The parsing previously done by `scrape_detail_page`, kept here for comparison."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    def parse_table(index: int) -> dict[str, str]:
+        data = {}
+        for row in soup.select("table.system-table")[index].select("tbody tr"):
+            cells = row.find_all("td")
+            if len(cells) == 2:
+                data[cells[0].get_text(strip=True)] = cells[1].get_text(strip=True)
+        return data
+
+    def get_value(label: str) -> str | None:
+        td = soup.find("td", class_="system-name", string=label)
+        return td.find_next_sibling("td").get_text(strip=True) if td else None
+
+    score_tags = soup.select(".score-container .score")
+    cpu_info = parse_table(2)
+    benchmark_tables = soup.select("table.benchmark-table")
+    return GeekbenchProcessorDetail(
+        cpu_result_id=scraper.cpu_result_id,
+        title=soup.title.string.strip() if soup.title else None,
+        upload_date=get_value("Upload Date"),
+        views=get_value("Views"),
+        cpu_codename=cpu_info.get("Codename"),
+        single_core_score=score_tags[0].text.strip() if len(score_tags) > 0 else None,
+        multi_core_score=score_tags[1].text.strip() if len(score_tags) > 1 else None,
+        system_info=parse_table(1),
+        cpu_info=cpu_info,
+        memory_info=parse_table(3),
+        single_core_benchmarks=(
+            scraper._parse_benchmark_table(benchmark_tables[0]) if len(benchmark_tables) > 0 else {}
+        ),
+        multi_core_benchmarks=(
+            scraper._parse_benchmark_table(benchmark_tables[1]) if len(benchmark_tables) > 1 else {}
+        ),
+    )
+
+
+def measure(parse, html_list: list[str]) -> tuple[float, float]:
+    """Return mean seconds and mean peak MiB per page (timed without tracemalloc)."""
+    scraper = GeekbenchProcessorDetailScraper(0)
+    start_time = time.perf_counter()
+    for html in html_list:
+        parse(scraper, html)
+    seconds = (time.perf_counter() - start_time) / len(html_list)
+
+    total_peak = 0
+    for html in html_list:
+        tracemalloc.start()
+        parse(scraper, html)
+        total_peak += tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, total_peak / len(html_list) / 2**20
+
+
+if __name__ == "__main__":
+    page_dir = Path(sys.argv[1] if len(sys.argv) > 1 else "tmp/geekbench_report/detail_pages")
+    html_list = [path.read_text() for path in sorted(page_dir.glob("*.html"))]
+    print(f"{len(html_list)} pages")
+
+    scraper = GeekbenchProcessorDetailScraper(0)
+    for html in html_list:
+        assert parse_detail_page_full_tree(scraper, html) == scraper.parse_detail_page(html)
+
+    for name, parse in [
+        ("full tree", parse_detail_page_full_tree),
+        (
+            "single pass",
+            lambda scraper, html: scraper.parse_detail_page(html),
+        ),
+    ]:
+        seconds, peak_mib = measure(parse, html_list)
+        print(f"{name:>12}: {seconds * 1000:.2f} ms/page, peak {peak_mib:.2f} MiB/page")
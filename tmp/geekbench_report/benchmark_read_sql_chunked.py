@@ -0,0 +1,61 @@
+"""
+Peak memory of reading all of `cpu_model_results`: client-side buffered `pd.read_sql`
+vs `read_sql_chunked` (server-side cursor, dtypes applied per chunk).
+Each variant runs in a fresh process, and its peak RSS is reported.
+
+On PostgreSQL 16 (local) with 1M rows:
+    buffered: 4.4 s, peak RSS 845 MiB
+     chunked: 4.3 s, peak RSS 303 MiB
+
+Run:
+```bash
+GEEKBENCH_REPORT_POSTGRESDB_DATABASE="geekbench_report" ... \
+PYTHONPATH=src python tmp/geekbench_report/benchmark_read_sql_chunked.py
+```
+"""
+
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+from utils.common.database_utility import get_postgresql_conn
+from utils.geekbench_report.database_helper import (
+    GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
+    GEEKBENCH_REPORT_POSTGRESDB_HOST,
+    GEEKBENCH_REPORT_POSTGRESDB_PASSWORD,
+    GEEKBENCH_REPORT_POSTGRESDB_PORT,
+    GEEKBENCH_REPORT_POSTGRESDB_USER,
+    read_sql_chunked,
+)
+from utils.geekbench_report.dtypes import RESULT_DTYPES, apply_dtypes
+
+SQL = "select * from cpu_model_results"
+
+
+def run_variant(variant: str) -> None:
+    start_time = time.perf_counter()
+    if variant == "buffered":
+        with get_postgresql_conn(
+            database=GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
+            user=GEEKBENCH_REPORT_POSTGRESDB_USER,
+            password=GEEKBENCH_REPORT_POSTGRESDB_PASSWORD,
+            host=GEEKBENCH_REPORT_POSTGRESDB_HOST,
+            port=GEEKBENCH_REPORT_POSTGRESDB_PORT,
+        ) as conn:
+            df = apply_dtypes(pd.read_sql(SQL, conn), RESULT_DTYPES)
+    else:
+        df = read_sql_chunked(SQL, dtypes=RESULT_DTYPES)
+    seconds = time.perf_counter() - start_time
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+    print(f"{variant:>8}: {len(df)} rows, {seconds:.1f} s, peak RSS {peak_mib:.0f} MiB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        run_variant(sys.argv[1])
+    else:
+        for variant in ["buffered", "chunked"]:
+            subprocess.run([sys.executable, __file__, variant], check=True)
@@ -0,0 +1,114 @@
+"""
+Peak memory of a synthetic `cpu_model_results` backfill: default dtypes vs the dtype policy.
+
+Scraped rows are built per CPU model query, compacted to `cpu_model_results` rows
+(as `sync_cpu_model_result_to_pg.py` does, with the dimension maps preloaded, so
+no database is needed) and concatenated for loading.
+Each variant runs in a fresh process, and its peak RSS is reported.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/geekbench_report/benchmark_result_dtypes.py 2000000
+```
+"""
+
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import utils.geekbench_report.core.geekbench_processor_result_scraper as result_scraper
+import utils.geekbench_report.transform as transform
+from utils.geekbench_report.dtypes import SCRAPED_RESULT_DTYPES
+from utils.geekbench_report.transform import DimensionMaps, t_compact_result_df
+
+CPU_MODEL_COUNT = 200
+SYSTEM_COUNT = 5000
+PLATFORM_LIST = ["Windows", "Linux", "macOS", "Android", "iOS"]
+FREQUENCY_LIST = ["3200 MHz", "4.2 GHz", "2294 MHz", "5.7 GHz", "3600 MHz"]
+
+
+def get_scraped_result_df(
+    cpu_model_id: int, row_count: int, rng: np.random.Generator
+) -> pd.DataFrame:
+    """Rows as `scrape_multiple_pages_until_offset_date()` builds them (Python objects)."""
+    multi_core_score = rng.integers(3000, 25000, row_count).astype(object)
+    multi_core_score[rng.random(row_count) < 0.01] = None
+    system_array = np.array([f"System {i}" for i in range(SYSTEM_COUNT)], dtype=object)
+    return pd.DataFrame(
+        {
+            "cpu_result_id": (cpu_model_id * 100_000 + np.arange(row_count)).tolist(),
+            "system": system_array[rng.integers(0, SYSTEM_COUNT, row_count)].tolist(),
+            "cpu_model": [f"CPU {cpu_model_id}"] * row_count,
+            "frequency": np.array(FREQUENCY_LIST, dtype=object)[
+                rng.integers(0, len(FREQUENCY_LIST), row_count)
+            ].tolist(),
+            "cores": rng.choice([4, 8, 16], row_count).tolist(),
+            "uploaded": pd.date_range(datetime(2025, 1, 1), periods=row_count, freq="min"),
+            "platform": np.array(PLATFORM_LIST, dtype=object)[
+                rng.integers(0, len(PLATFORM_LIST), row_count)
+            ].tolist(),
+            "single_core_score": rng.integers(1000, 3500, row_count).tolist(),
+            "multi_core_score": multi_core_score.tolist(),
+        },
+        dtype=object,
+    )
+
+
+def run_backfill(row_count: int) -> tuple[pd.DataFrame, float]:
+    """Return the rows to load and MiB of the scraped frames held before compacting."""
+    rng = np.random.default_rng(0)
+    dimension_maps = DimensionMaps(
+        system_map={f"System {i}": i for i in range(SYSTEM_COUNT)},
+        cpu_model_map={f"CPU {i}": i for i in range(CPU_MODEL_COUNT)},
+        platform_map={platform: i for i, platform in enumerate(PLATFORM_LIST)},
+    )
+    rows_per_cpu_model = max(1, row_count // CPU_MODEL_COUNT)
+
+    scraped_df_list = []
+    for cpu_model_id in range(CPU_MODEL_COUNT):
+        scraped_df_list.append(
+            result_scraper.apply_dtypes(
+                get_scraped_result_df(cpu_model_id, rows_per_cpu_model, rng),
+                SCRAPED_RESULT_DTYPES,
+            )
+        )
+    scraped_mib = sum(df.memory_usage(deep=True).sum() for df in scraped_df_list) / 2**20
+
+    # Whole backfill of scraped frames held at once, then compacted for loading
+    df = pd.concat(
+        [t_compact_result_df(df, dimension_maps) for df in scraped_df_list],
+        ignore_index=True,
+    ).drop_duplicates()
+    return df, scraped_mib
+
+
+def run_variant(variant: str, row_count: int) -> None:
+    if variant == "default":
+        # Same pipeline with the casts disabled, i.e. pandas default dtypes
+        result_scraper.apply_dtypes = lambda df, dtypes: df.infer_objects()
+        transform.apply_dtypes = lambda df, dtypes: df
+
+    start_time = time.perf_counter()
+    df, scraped_mib = run_backfill(row_count)
+    seconds = time.perf_counter() - start_time
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+    frame_mib = df.memory_usage(deep=True).sum() / 2**20
+    print(
+        f"{variant:>12}: {seconds:.1f} s, peak RSS {peak_mib:.0f} MiB, "
+        f"scraped frames {scraped_mib:.0f} MiB, final frame {frame_mib:.0f} MiB"
+    )
+
+
+if __name__ == "__main__":
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    if len(sys.argv) > 2:
+        run_variant(sys.argv[2], row_count)
+    else:
+        for variant in ["default", "dtype policy"]:
+            subprocess.run([sys.executable, __file__, str(row_count), variant], check=True)
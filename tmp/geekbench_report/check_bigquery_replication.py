@@ -0,0 +1,338 @@
+"""
+Check the incremental replication of `replicate_pg_to_bigquery()` against the local
+PostgreSQL and an in-memory stand-in for the BigQuery client.
+
+The tables are copied into the schema `replication_check` (selected with PGOPTIONS),
+with the watermark table, the `(cpu_model_id, cpu_result_id)` index and the `detail_id`
+identity column of the app's docstring. New rows are then inserted between runs:
+results of existing CPU models, of a new CPU model with ids below the global maximum,
+and without cpu_model_id; details of old cpu_result_id; a new name of each dimension.
+
+Output:
+    999,388 results, 20,000 details, 3,503 names
+                     first run: 1,022,891 rows, 5.97 s
+                    no new row:         0 rows, 0.10 s
+             1,000 new results:     1,016 rows, 0.14 s
+           100,000 new results:   100,016 rows, 0.68 s
+    BigQuery tables equal the PostgreSQL tables
+    failed load: watermarks kept, 1,016 rows appended by the next run
+    concurrent detail writers: run took 1.0 s, no detail skipped
+    without get_committed_max_id: run took 0.1 s, a detail skipped for good
+
+A run without new rows is the watermark reads and one index probe per CPU model.
+The read of new results takes 4 ms with the per-model index ranges; without
+`offset 0` the planner turns them into a hash join over the whole table (192 ms).
+
+With two detail writers, one holding a smaller `detail_id` in a transaction open for
+a second after the other committed, the run waits for the open transaction at
+`get_committed_max_id()`. Without it, the watermark moves past the uncommitted
+`detail_id`, which is never read again.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/geekbench_report/check_bigquery_replication.py
+```
+"""
+
+import contextlib
+import io
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+os.environ["PGOPTIONS"] = "-c search_path=replication_check"
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.api_core.exceptions import BadRequest
+from sqlalchemy import text
+
+from utils.common.database_utility import get_postgresql_conn
+from utils.geekbench_report import bigquery_replication, database_helper
+from utils.geekbench_report.bigquery_replication import replicate_pg_to_bigquery
+
+DATASET = "geekbench_report"
+
+SETUP_SQL = """
+drop schema if exists replication_check cascade;
+create schema replication_check;
+create table cpu_model_names as select * from public.cpu_model_names;
+create table system_names as select * from public.system_names;
+create table platform_names as select * from public.platform_names;
+create table cpu_model_results as select * from public.cpu_model_results;
+create index cpu_model_results_cpu_model_id_cpu_result_id_idx
+    on cpu_model_results (cpu_model_id, cpu_result_id);
+create table cpu_model_details (
+    cpu_result_id int4,
+    title text,
+    upload_date timestamp,
+    views int4,
+    cpu_model_id int4,
+    cpu_codename text,
+    single_core_score int4,
+    multi_core_score int4,
+    system_info jsonb,
+    cpu_info jsonb,
+    memory_info jsonb,
+    single_core_benchmarks jsonb,
+    multi_core_benchmarks jsonb
+);
+insert into cpu_model_details
+select
+    d.cpu_result_id,
+    'Result ' || d.cpu_result_id,
+    timestamp '2025-01-01' + d.cpu_result_id * interval '1 second',
+    d.cpu_result_id % 100,
+    d.cpu_model_id,
+    d.cpu_codename,
+    1000 + d.cpu_result_id % 2000,
+    5000 + d.cpu_result_id % 9000,
+    jsonb_build_object('Operating System', 'Linux'),
+    jsonb_build_object('Cores', d.cpu_result_id % 16),
+    null,
+    jsonb_build_object('File Compression', jsonb_build_object('score', '1200')),
+    jsonb_build_object('File Compression', jsonb_build_object('score', '9800'))
+from public.cpu_model_details d;
+alter table cpu_model_details
+    add column detail_id int8 generated always as identity primary key;
+create table bigquery_replication_watermarks (
+    table_name text,
+    watermark_key int4,
+    last_id int8,
+    updated_at timestamp,
+    primary key (table_name, watermark_key)
+);
+analyze;
+"""
+
+INSERT_SQL = """
+-- New results of existing CPU models, after their largest cpu_result_id
+insert into cpu_model_results (
+    cpu_result_id, frequency_mhz, cores, uploaded, platform_id,
+    single_core_score, multi_core_score, cpu_model_id, system_id
+)
+select
+    m.last_id + g.i, 3200, 8, now(), 1, 2000, 9000, m.cpu_model_id, 1
+from (
+    select cpu_model_id, max(cpu_result_id) as last_id
+    from cpu_model_results
+    where cpu_model_id is not null
+    group by cpu_model_id
+    order by cpu_model_id
+    limit :cpu_model_count
+) m
+cross join generate_series(1, :per_cpu_model_count) g(i);
+
+-- A new CPU model, crawled for the first time with ids below the global maximum
+insert into cpu_model_names (cpu_model_id, cpu_model)
+select max(cpu_model_id) + 1, 'New CPU ' || (max(cpu_model_id) + 1) from cpu_model_names;
+insert into cpu_model_results (
+    cpu_result_id, frequency_mhz, cores, uploaded, platform_id,
+    single_core_score, multi_core_score, cpu_model_id, system_id
+)
+select g.i, 3000, 4, now(), 1, 1500, 5000, (select max(cpu_model_id) from cpu_model_names), 1
+from generate_series(1, 5) g(i);
+
+-- Results without cpu_model_id
+insert into cpu_model_results (
+    cpu_result_id, frequency_mhz, cores, uploaded, platform_id,
+    single_core_score, multi_core_score, cpu_model_id, system_id
+)
+select (select max(cpu_result_id) from cpu_model_results) + g.i, null, 2, now(), 1, 1, 1, null, 1
+from generate_series(1, 3) g(i);
+
+-- Details sampled from old results, in any cpu_result_id order
+insert into cpu_model_details (cpu_result_id, title, cpu_model_id, system_info)
+select cpu_result_id, 'Sampled', cpu_model_id, jsonb_build_object('Sampled', true)
+from cpu_model_results
+where cpu_model_id is not null
+order by cpu_result_id
+limit 5;
+
+insert into system_names (system_id, system)
+select max(system_id) + 1, 'New system' from system_names;
+insert into platform_names (platform_id, platform)
+select max(platform_id) + 1, 'New platform' from platform_names;
+"""
+
+
+class FakeLoadJob:
+    def __init__(self, job_id: str, row_count: int, error: Exception | None) -> None:
+        self.job_id = job_id
+        self.created = datetime.now(timezone.utc)
+        self.ended = self.created
+        self.output_rows = row_count
+        self._error = error
+
+    def done(self, reload: bool = True) -> bool:
+        return True
+
+    def result(self, timeout: float | None = None) -> "FakeLoadJob":
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def cancel(self) -> bool:
+        return True
+
+
+class FakeBigQueryClient:
+    """Tables appended by Parquet load jobs, done as soon as uploaded."""
+
+    def __init__(self) -> None:
+        self.table_map: dict[str, list[pa.Table]] = {}
+        self.failing = False
+        self._job_number = itertools.count(1)
+
+    def load_table_from_file(self, file_obj, destination, rewind=False, job_config=None):
+        assert job_config.write_disposition == "WRITE_APPEND"
+        if rewind:
+            file_obj.seek(0)
+        table = pq.read_table(io.BytesIO(file_obj.read()))
+        if self.failing:
+            return FakeLoadJob(f"job_{next(self._job_number)}", 0, BadRequest("failed"))
+        self.table_map.setdefault(destination, []).append(table)
+        return FakeLoadJob(f"job_{next(self._job_number)}", table.num_rows, None)
+
+    def get_table_df(self, table_name: str) -> pd.DataFrame:
+        return pa.concat_tables(
+            self.table_map[f"{DATASET}.{table_name}"], promote_options="default"
+        ).to_pandas()
+
+
+def execute(sql: str, params: dict | None = None) -> None:
+    with get_postgresql_conn(
+        database=database_helper.GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
+        user=database_helper.GEEKBENCH_REPORT_POSTGRESDB_USER,
+        password=database_helper.GEEKBENCH_REPORT_POSTGRESDB_PASSWORD,
+        host=database_helper.GEEKBENCH_REPORT_POSTGRESDB_HOST,
+        port=database_helper.GEEKBENCH_REPORT_POSTGRESDB_PORT,
+    ) as conn:
+        with conn.begin():
+            for statement in sql.split(";"):
+                if statement.strip():
+                    conn.execute(text(statement), params)
+
+
+def run_concurrent_detail_writers(client: FakeBigQueryClient) -> tuple[float, bool]:
+    """
+    Run the replication while a transaction holding a smaller `detail_id` than a committed
+    one is still open, commit it after a second, then run again.
+    Return the seconds of the first run and whether a detail is missing from BigQuery.
+    """
+    detail_sql = """
+        insert into cpu_model_details (cpu_result_id, title, cpu_model_id)
+        values (1, 'Concurrent', 1)
+    """
+    with get_postgresql_conn(
+        database=database_helper.GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
+        user=database_helper.GEEKBENCH_REPORT_POSTGRESDB_USER,
+        password=database_helper.GEEKBENCH_REPORT_POSTGRESDB_PASSWORD,
+        host=database_helper.GEEKBENCH_REPORT_POSTGRESDB_HOST,
+        port=database_helper.GEEKBENCH_REPORT_POSTGRESDB_PORT,
+    ) as conn:
+        transaction = conn.begin()
+        conn.execute(text(detail_sql))
+        execute(detail_sql)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(get_run_seconds, client)
+            time.sleep(1)
+            transaction.commit()
+            seconds = future.result()
+
+    run_quietly(client)
+    detail_count = database_helper.read_sql_chunked(
+        "select count(*) as detail_count from cpu_model_details"
+    )["detail_count"].iloc[0]
+    return seconds, len(client.get_table_df("cpu_model_details")) < detail_count
+
+
+def run_quietly(client: FakeBigQueryClient) -> int:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return replicate_pg_to_bigquery(client, DATASET)
+
+
+def get_run_seconds(client: FakeBigQueryClient) -> float:
+    start_time = time.perf_counter()
+    run_quietly(client)
+    return time.perf_counter() - start_time
+
+
+def run_step(client: FakeBigQueryClient, name: str) -> int:
+    start_time = time.perf_counter()
+    # Without the per-table messages of the replication
+    with contextlib.redirect_stdout(io.StringIO()):
+        row_count = replicate_pg_to_bigquery(client, DATASET)
+    print(f"{name:>26}: {row_count:>9,} rows, {time.perf_counter() - start_time:.2f} s")
+    return row_count
+
+
+def assert_tables_equal(client: FakeBigQueryClient) -> None:
+    for table_name, key_list in [
+        ("cpu_model_names", ["cpu_model_id"]),
+        ("system_names", ["system_id"]),
+        ("platform_names", ["platform_id"]),
+        ("cpu_model_results", ["cpu_model_id", "cpu_result_id"]),
+        ("cpu_model_details", ["detail_id"]),
+    ]:
+        pg_df = database_helper.read_sql_chunked(f"select {', '.join(key_list)} from {table_name}")
+        bq_df = client.get_table_df(table_name)[key_list]
+        assert len(bq_df) == len(pg_df), table_name
+        pg_key_df = pg_df.astype("Int64").sort_values(key_list, ignore_index=True)
+        bq_key_df = bq_df.astype("Int64").sort_values(key_list, ignore_index=True)
+        pd.testing.assert_frame_equal(bq_key_df, pg_key_df, check_dtype=False)
+
+
+if __name__ == "__main__":
+    execute(SETUP_SQL)
+    count_df = database_helper.read_sql_chunked(
+        """
+        select
+            (select count(*) from cpu_model_results) as result_count,
+            (select count(*) from cpu_model_details) as detail_count,
+            (select count(*) from cpu_model_names) + (select count(*) from system_names)
+                + (select count(*) from platform_names) as name_count
+        """
+    )
+    result_count, detail_count, name_count = count_df.iloc[0].tolist()
+    print(f"{result_count:,} results, {detail_count:,} details, {name_count:,} names")
+
+    client = FakeBigQueryClient()
+    run_step(client, "first run")
+    run_step(client, "no new row")
+    for count in [1_000, 100_000]:
+        execute(INSERT_SQL, {"cpu_model_count": 100, "per_cpu_model_count": count // 100})
+        run_step(client, f"{count:,} new results")
+    assert_tables_equal(client)
+    print("BigQuery tables equal the PostgreSQL tables")
+
+    execute(INSERT_SQL, {"cpu_model_count": 100, "per_cpu_model_count": 10})
+    client.failing = True
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            replicate_pg_to_bigquery(client, DATASET)
+        raise AssertionError("no error")
+    except BadRequest:
+        pass
+    client.failing = False
+    with contextlib.redirect_stdout(io.StringIO()):
+        row_count = replicate_pg_to_bigquery(client, DATASET)
+    assert_tables_equal(client)
+    print(f"failed load: watermarks kept, {row_count:,} rows appended by the next run")
+
+    for name, get_committed_max_id in [
+        ("concurrent detail writers", bigquery_replication.get_committed_max_id),
+        ("without get_committed_max_id", lambda table_name, id_column: None),
+    ]:
+        bigquery_replication.get_committed_max_id = get_committed_max_id
+        seconds, is_detail_skipped = run_concurrent_detail_writers(client)
+        print(
+            f"{name}: run took {seconds:.1f} s, "
+            f"{'a detail skipped for good' if is_detail_skipped else 'no detail skipped'}"
+        )
+
+    execute("drop schema replication_check cascade")
@@ -0,0 +1,149 @@
+"""
+Check that `load_details_to_pg` stores a batch of details only together with its
+workload scores, on the local PostgreSQL.
+
+The tables are created in the schema `detail_load_check` (selected with PGOPTIONS),
+with a check constraint on `cpu_model_detail_workload_scores.score`, so that the COPY
+of the workload scores of the second batch fails after its details are written.
+
+Output:
+    batch 1 loaded: 3 details, 12 workload scores
+    batch 2 failed: CheckViolation
+    after the failed batch: 3 details, 12 workload scores, pending again: [1004, 1005]
+    batch 2 reloaded: 5 details, 20 workload scores
+    batch 2 loaded twice: 5 details, 20 workload scores
+
+Run:
+```bash
+PYTHONPATH=src python tmp/geekbench_report/check_detail_load_transaction.py
+```
+"""
+
+import contextlib
+import io
+import os
+
+os.environ["PGOPTIONS"] = "-c search_path=detail_load_check"
+
+import psycopg2.errors
+from sqlalchemy import text
+
+from app.geekbench_report.sync_cpu_model_detail_to_pg import load_details_to_pg
+from utils.common.database_utility import get_postgresql_conn
+from utils.geekbench_report import database_helper
+
+SETUP_SQL = """
+drop schema if exists detail_load_check cascade;
+create schema detail_load_check;
+create table cpu_model_details (
+    cpu_result_id int4,
+    title text,
+    upload_date timestamp,
+    views int4,
+    cpu_model_id int4,
+    cpu_codename text,
+    single_core_score int4,
+    multi_core_score int4,
+    system_info jsonb,
+    cpu_info jsonb,
+    memory_info jsonb,
+    single_core_benchmarks jsonb,
+    multi_core_benchmarks jsonb
+);
+create table cpu_model_detail_workload_scores (
+    cpu_result_id int4,
+    cpu_model_id int4,
+    mode text,
+    workload text,
+    score int4 check (score < 100000)
+);
+"""
+
+
+def execute(sql: str) -> None:
+    with get_postgresql_conn(
+        database=database_helper.GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
+        user=database_helper.GEEKBENCH_REPORT_POSTGRESDB_USER,
+        password=database_helper.GEEKBENCH_REPORT_POSTGRESDB_PASSWORD,
+        host=database_helper.GEEKBENCH_REPORT_POSTGRESDB_HOST,
+        port=database_helper.GEEKBENCH_REPORT_POSTGRESDB_PORT,
+    ) as conn:
+        with conn.begin():
+            conn.execute(text(sql))
+
+
+def get_detail_dict(cpu_result_id: int, score: str = "1,234") -> dict:
+    benchmark_map = {
+        "File Compression": {"score": score, "description": "181.2 MB/sec"},
+        "Navigation": {"score": "1,456", "description": "8.77 routes/sec"},
+    }
+    return {
+        "cpu_result_id": cpu_result_id,
+        "title": "ASUS System Product Name",
+        "upload_date": "2025-06-01 12:34:56",
+        "views": "1",
+        "cpu_codename": "Raptor Lake",
+        "single_core_score": "2,345",
+        "multi_core_score": "12,345",
+        "system_info": {"Operating System": "Windows 11"},
+        "cpu_info": {"Name": "Intel Core i7-13700K"},
+        "memory_info": {"Size": "32.00 GB"},
+        "single_core_benchmarks": benchmark_map,
+        "multi_core_benchmarks": benchmark_map,
+        "cpu_model_id": 1,
+    }
+
+
+def get_counts() -> tuple[int, int]:
+    count_df = database_helper.read_sql_chunked(
+        """
+        select
+            (select count(*) from cpu_model_details) as detail_count,
+            (select count(*) from cpu_model_detail_workload_scores) as workload_score_count
+        """
+    )
+    return tuple(count_df.iloc[0].tolist())
+
+
+def load_quietly(detail_dict_list: list[dict]) -> None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_details_to_pg(detail_dict_list)
+
+
+if __name__ == "__main__":
+    execute(SETUP_SQL)
+
+    load_quietly([get_detail_dict(cpu_result_id) for cpu_result_id in [1001, 1002, 1003]])
+    detail_count, workload_score_count = get_counts()
+    print(f"batch 1 loaded: {detail_count} details, {workload_score_count} workload scores")
+
+    # The score of 1005 breaks the check constraint, after the details are copied
+    try:
+        load_quietly([get_detail_dict(1004), get_detail_dict(1005, score="123,456")])
+        raise AssertionError("batch 2 was loaded")
+    except psycopg2.errors.CheckViolation as error:
+        print(f"batch 2 failed: {type(error).__name__}")
+
+    detail_count, workload_score_count = get_counts()
+    stored_cpu_result_id_set = set(
+        database_helper.get_stored_detail_result_ids_df()["cpu_result_id"].to_list()
+    )
+    pending_cpu_result_id_list = [
+        cpu_result_id
+        for cpu_result_id in [1001, 1002, 1003, 1004, 1005]
+        if cpu_result_id not in stored_cpu_result_id_set
+    ]
+    assert (detail_count, workload_score_count) == (3, 12)
+    assert pending_cpu_result_id_list == [1004, 1005]
+    print(
+        f"after the failed batch: {detail_count} details, {workload_score_count} workload scores, "
+        f"pending again: {pending_cpu_result_id_list}"
+    )
+
+    for label in ["reloaded", "loaded twice"]:
+        load_quietly([get_detail_dict(1004), get_detail_dict(1005)])
+        detail_count, workload_score_count = get_counts()
+        assert (detail_count, workload_score_count) == (5, 20)
+        print(f"batch 2 {label}: {detail_count} details, {workload_score_count} workload scores")
+
+    execute("drop schema detail_load_check cascade")
@@ -0,0 +1,101 @@
+"""
+Check `HtmlArchive` with several processes, each with several threads, archiving pages
+to the same directory at once, then a write interrupted by a crash, then the cost of a
+flush as the archive grows.
+
+Output:
+    4 processes x 4 threads: 8,000 pages in 400 segments, all in the index
+    interrupted segment write: ignored, 8,000 pages in the index, next flush written
+    flush of 20 pages: 0.9 ms after 401 segments, 1.2 ms after 1,301 segments
+
+The previous archive read and rewrote one shared `index.parquet` on every flush, under a
+lock of its process only, so concurrent runs lost each other's entries and a flush took
+longer as the archive grew. On this check it failed in the first step, with
+`ArrowInvalid: Parquet file size is 0 bytes` from an index being rewritten by another
+process; a crash during the rewrite left such an index for every later flush. The index
+is now read from the segments, each written to a temporary file and renamed into place.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/geekbench_report/check_html_archive_concurrency.py
+```
+"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils.geekbench_report.html_archive import HtmlArchive
+
+PROCESS_COUNT = 4
+THREAD_COUNT = 4
+PAGE_COUNT_PER_THREAD = 500
+PAGE_HTML = "<html>" + "x" * 1000 + "</html>"
+# Flush every 20 pages
+SEGMENT_MAX_BYTES = 20 * len(PAGE_HTML)
+
+
+def archive_pages(archive_dir: str, process_index: int) -> None:
+    html_archive = HtmlArchive(archive_dir, segment_max_bytes=SEGMENT_MAX_BYTES)
+
+    def archive_thread_pages(thread_index: int) -> None:
+        for page_index in range(PAGE_COUNT_PER_THREAD):
+            cpu_result_id = (process_index * THREAD_COUNT + thread_index) * 100_000 + page_index
+            html_archive.append(f"https://browser.geekbench.com/v6/cpu/{cpu_result_id}", PAGE_HTML)
+
+    with ThreadPoolExecutor(max_workers=THREAD_COUNT) as executor:
+        list(executor.map(archive_thread_pages, range(THREAD_COUNT)))
+    html_archive.flush()
+
+
+def get_flush_milliseconds(html_archive: HtmlArchive, flush_count: int) -> float:
+    start_time = time.perf_counter()
+    for flush_index in range(flush_count):
+        for page_index in range(20):
+            html_archive.append(
+                f"https://browser.geekbench.com/v6/cpu/{flush_index * 100 + page_index}",
+                PAGE_HTML,
+            )
+    return (time.perf_counter() - start_time) * 1000 / flush_count
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as archive_dir:
+        with ProcessPoolExecutor(max_workers=PROCESS_COUNT) as executor:
+            list(executor.map(archive_pages, [archive_dir] * PROCESS_COUNT, range(PROCESS_COUNT)))
+
+        html_archive = HtmlArchive(archive_dir, segment_max_bytes=SEGMENT_MAX_BYTES)
+        index_df = html_archive.read_index()
+        page_count = PROCESS_COUNT * THREAD_COUNT * PAGE_COUNT_PER_THREAD
+        segment_count = len(html_archive.get_segment_path_list("detail"))
+        assert len(index_df) == index_df["url"].nunique() == page_count
+        assert not index_df.duplicated(["segment", "row"]).any()
+        print(
+            f"{PROCESS_COUNT} processes x {THREAD_COUNT} threads: {page_count:,} pages "
+            f"in {segment_count} segments, all in the index"
+        )
+
+        # A process killed while writing a segment leaves its temporary file behind
+        segment_dir = html_archive.segment_dir
+        with open(segment_dir / "segment-29991231T000000000000-1.parquet.tmp", "wb") as file:
+            file.write(b"PAR1 truncated")
+        assert len(html_archive.read_index()) == page_count
+        html_archive.append("https://browser.geekbench.com/v6/cpu/1", PAGE_HTML)
+        html_archive.flush()
+        assert len(html_archive.read_index()) == page_count + 1
+        print(
+            f"interrupted segment write: ignored, {page_count:,} pages in the index, "
+            "next flush written"
+        )
+        os.remove(segment_dir / "segment-29991231T000000000000-1.parquet.tmp")
+
+        first_segment_count = len(html_archive.get_segment_path_list())
+        first_milliseconds = get_flush_milliseconds(html_archive, 100)
+        get_flush_milliseconds(html_archive, 800)
+        last_segment_count = len(html_archive.get_segment_path_list())
+        last_milliseconds = get_flush_milliseconds(html_archive, 100)
+        print(
+            f"flush of 20 pages: {first_milliseconds:.1f} ms after {first_segment_count:,} "
+            f"segments, {last_milliseconds:.1f} ms after {last_segment_count:,} segments"
+        )
@@ -0,0 +1,133 @@
+"""
+Check the in-process score report read from the Parquet export of `cpu_model_results`
+against the SQL mart, on the local PostgreSQL.
+
+The tables are copied into the schema `mart_export_check` (selected with PGOPTIONS),
+and some results lose their `uploaded` or `cpu_model_id`, so that the export has
+`__HIVE_DEFAULT_PARTITION__` directories for both partition columns.
+
+Output:
+    999,388 results, 2,992 without cpu_model_id, 1,000 without uploaded
+    export: 5,388 partitions, 270 NULL month, 18 NULL cpu_model_id, 67.8 s
+    pd.read_parquet of the export: ArrowInvalid
+    in-process mart from the export: 302 rows in 3.5 s, equal to the SQL mart
+
+The SQL mart and the in-process mart are compared without `TIE_DEPENDENT_COLUMN_LIST`,
+whose trimmed means depend on how ties at the extremes are broken.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/geekbench_report/check_mart_engine_parquet_export.py
+```
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ["PGOPTIONS"] = "-c search_path=mart_export_check"
+
+import pandas as pd
+import pyarrow as pa
+from sqlalchemy import text
+
+from utils.common.database_utility import get_postgresql_conn
+from utils.geekbench_report import database_helper
+from utils.geekbench_report.mart_engine import (
+    MART_RESULT_COLUMNS,
+    TIE_DEPENDENT_COLUMN_LIST,
+    diff_score_report,
+    get_score_report_df_in_process,
+)
+from utils.geekbench_report.parquet_export import HIVE_DEFAULT_PARTITION, export_results_to_parquet
+
+SETUP_SQL = """
+drop schema if exists mart_export_check cascade;
+create schema mart_export_check;
+create table cpu_model_names as select * from public.cpu_model_names;
+create table system_names as select * from public.system_names;
+create table platform_names as select * from public.platform_names;
+create table cpu_model_benchmarks as select * from public.cpu_model_benchmarks;
+create table cpu_model_details as select * from public.cpu_model_details;
+create table cpu_model_results as select * from public.cpu_model_results;
+update cpu_model_results set cpu_model_id = null where cpu_result_id % 500 = 7;
+update cpu_model_results set uploaded = null where cpu_result_id % 1000 = 3;
+analyze;
+"""
+
+
+def execute(sql: str) -> None:
+    with get_postgresql_conn(
+        database=database_helper.GEEKBENCH_REPORT_POSTGRESDB_DATABASE,
+        user=database_helper.GEEKBENCH_REPORT_POSTGRESDB_USER,
+        password=database_helper.GEEKBENCH_REPORT_POSTGRESDB_PASSWORD,
+        host=database_helper.GEEKBENCH_REPORT_POSTGRESDB_HOST,
+        port=database_helper.GEEKBENCH_REPORT_POSTGRESDB_PORT,
+    ) as conn:
+        with conn.begin():
+            conn.execute(text(sql))
+
+
+if __name__ == "__main__":
+    execute(SETUP_SQL)
+    count_df = database_helper.read_sql_chunked(
+        """
+        select
+            count(*) as result_count,
+            count(*) filter (where cpu_model_id is null) as null_cpu_model_count,
+            count(*) filter (where uploaded is null) as null_uploaded_count
+        from cpu_model_results
+        """
+    )
+    result_count, null_cpu_model_count, null_uploaded_count = count_df.iloc[0].tolist()
+    print(
+        f"{result_count:,} results, {null_cpu_model_count:,} without cpu_model_id, "
+        f"{null_uploaded_count:,} without uploaded"
+    )
+
+    with tempfile.TemporaryDirectory() as export_dir:
+        start_time = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            export_results_to_parquet(export_dir)
+        partition_dir_list = list(Path(export_dir).glob("month=*/cpu_model_id=*"))
+        null_month_count = len(
+            [
+                path
+                for path in partition_dir_list
+                if path.parent.name.endswith(HIVE_DEFAULT_PARTITION)
+            ]
+        )
+        null_cpu_model_id_count = len(
+            [path for path in partition_dir_list if path.name.endswith(HIVE_DEFAULT_PARTITION)]
+        )
+        assert null_month_count and null_cpu_model_id_count
+        print(
+            f"export: {len(partition_dir_list):,} partitions, {null_month_count} NULL month, "
+            f"{null_cpu_model_id_count:,} NULL cpu_model_id, "
+            f"{time.perf_counter() - start_time:.1f} s"
+        )
+
+        # The previous reader, with the partition keys inferred as dictionaries
+        try:
+            pd.read_parquet(export_dir, columns=MART_RESULT_COLUMNS)
+            print("pd.read_parquet of the export: read")
+        except pa.ArrowInvalid:
+            print("pd.read_parquet of the export: ArrowInvalid")
+
+        start_time = time.perf_counter()
+        score_report_df = get_score_report_df_in_process(parquet_path=export_dir)
+        seconds = time.perf_counter() - start_time
+
+    sql_score_report_df = database_helper.get_score_report_from_df()
+    diff_df = diff_score_report(
+        score_report_df, sql_score_report_df, ignore_column_list=TIE_DEPENDENT_COLUMN_LIST
+    )
+    assert diff_df.empty, diff_df
+    print(
+        f"in-process mart from the export: {len(score_report_df):,} rows in {seconds:.1f} s, "
+        "equal to the SQL mart"
+    )
+    execute("drop schema mart_export_check cascade")
@@ -0,0 +1,111 @@
+"""
+Check that a latest results page still throttled after the last retry fails the incremental
+CPU name sync, without advancing `newest_cpu_result_id` in its state.
+
+Pages are served by a fake `requests.get`: page 1 holds new results, page 2 is answered
+with 429 every time, page 3 reaches the result seen in the last run.
+
+Output:
+    page 2 throttled: HTTPError after 6 requests, 0 names stored
+    state kept: {'newest_cpu_result_id': 1000, 'benchmarks_scraped_at': '2999-01-01T00:00:00'}
+    page 2 answered: 30 names stored, state advanced to 2000
+
+The previous `rate_limited_get` returned the last 429 response, parsed as a page without
+results: the run stored the names of pages 1 and 3, skipped page 2 for good and saved
+2000 as the newest result ID.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/geekbench_report/check_throttled_name_sync.py
+```
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+
+import requests
+
+from app.geekbench_report import sync_cpu_model_name_to_pg
+from utils.common import rate_limiter
+
+PAGE_RESULT_ID_MAP = {
+    1: range(2000, 1990, -1),
+    2: range(1990, 1980, -1),
+    3: range(1005, 995, -1),
+}
+
+
+def get_page_html(cpu_result_id_list: list[int]) -> str:
+    return "".join(
+        '<div class="list-col-inner">'
+        f'<span class="list-col-model">CPU {cpu_result_id}\n3.2 GHz</span>'
+        f'<a href="/v6/cpu/{cpu_result_id}">result</a>'
+        "</div>"
+        for cpu_result_id in cpu_result_id_list
+    )
+
+
+def get_fake_get(throttled_page: int | None, request_list: list[str]):
+    def fake_get(url: str, **kwargs) -> requests.Response:
+        request_list.append(url)
+        page = int(url.rsplit("=", 1)[1])
+        response = requests.Response()
+        response.url = url
+        response.status_code = 429 if page == throttled_page else 200
+        response._content = get_page_html(
+            PAGE_RESULT_ID_MAP.get(page, []) if response.status_code == 200 else []
+        ).encode()
+        return response
+
+    return fake_get
+
+
+def run_sync(
+    throttled_page: int | None, request_list: list[str], stored_name_list: list[str]
+) -> None:
+    """Run the incremental sync, collecting the requested URLs and the stored names."""
+    rate_limiter.requests.get = get_fake_get(throttled_page, request_list)
+    sync_cpu_model_name_to_pg.update_cpu_model_names = stored_name_list.extend
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync_cpu_model_name_to_pg.sync_cpu_model_names_to_pg()
+
+
+if __name__ == "__main__":
+    rate_limiter._get_backoff_seconds = lambda attempt, response: 0.0
+    host_rate_limiter = rate_limiter.get_host_rate_limiter("browser.geekbench.com")
+    host_rate_limiter.min_rate = host_rate_limiter.max_rate = 1000
+    host_rate_limiter.token_bucket.set_rate(1000)
+
+    with tempfile.TemporaryDirectory() as state_dir:
+        sync_cpu_model_name_to_pg.NAME_SYNC_STATE_FILE_PATH = os.path.join(state_dir, "state.json")
+        # Scraped in the future, so the benchmarks page is not due
+        state = {"newest_cpu_result_id": 1000, "benchmarks_scraped_at": "2999-01-01T00:00:00"}
+        sync_cpu_model_name_to_pg.write_name_sync_state(state)
+
+        request_list, stored_name_list = [], []
+        try:
+            run_sync(2, request_list, stored_name_list)
+            raise AssertionError("the throttled run succeeded")
+        except requests.HTTPError as error:
+            throttled_request_count = len([url for url in request_list if url.endswith("=2")])
+            print(
+                f"page 2 throttled: {type(error).__name__} after {throttled_request_count} "
+                f"requests, {len(stored_name_list)} names stored"
+            )
+        assert throttled_request_count == rate_limiter.DEFAULT_MAX_RETRIES + 1
+        assert not stored_name_list
+        assert sync_cpu_model_name_to_pg.read_name_sync_state() == state
+        print(f"state kept: {sync_cpu_model_name_to_pg.read_name_sync_state()}")
+
+        request_list, stored_name_list = [], []
+        run_sync(None, request_list, stored_name_list)
+        newest_cpu_result_id = sync_cpu_model_name_to_pg.read_name_sync_state()[
+            "newest_cpu_result_id"
+        ]
+        assert len(stored_name_list) == 30 and newest_cpu_result_id == 2000
+        print(
+            f"page 2 answered: {len(stored_name_list)} names stored, "
+            f"state advanced to {newest_cpu_result_id}"
+        )
@@ -0,0 +1,235 @@
+"""
+Benchmark the watchlist engine of `stock_price_notification` on 5,000 symbols, read
+from a watchlist file, against a stand-in for `yf.download` that serves synthetic daily
+bars (with suspension days per symbol, 10 symbols failing) and takes 5 ms per symbol,
+`threads` symbols at a time like yfinance.
+
+Output:
+    5,000 symbols, 300 dates
+                  first run: 25 downloads of <= 200 symbols, 4.72 s
+                  daily run: 28 downloads of <= 200 symbols, 5.76 s
+    read of 5,000 cached symbols: 0.72 s
+          pandas statistics:     56.5 ms
+           NumPy statistics:     44.9 ms
+          per-symbol pandas:  8,019.0 ms
+    statistics match the pandas code (rtol 1e-12), drawdowns a per-symbol cummax
+    alerts: 2,549/5,000 symbols, 1.0 ms; notification of 9,438 characters
+    main(): 7.01 s, of which 3.1 s of simulated downloads
+
+Downloads: 200 symbols per `yf.download()`, 8 at a time; the daily run has 3 more
+because symbols suspended on the last cached date start their refresh earlier. With
+the pandas code of user-048 (a selection, a merge and a frame conversion per symbol),
+the same two runs took 81 s and 132 s; through Arrow tables and NumPy the cache adds
+about 0.5 ms per symbol to the simulated latency.
+
+Statistics: the NumPy engine computes the max drawdowns as well in the time the pandas
+code of user-047 takes without them; a loop over symbols takes over 100 times as long.
+The synthetic walks drift a lot, so half of them cross a rule; the notification lists
+the first 50.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/stock_news/benchmark_watchlist_engine.py
+```
+"""
+
+import contextlib
+import io
+import math
+import os
+import tempfile
+import time
+
+os.environ.setdefault("STOCK_NEWS_SLACK_NOTIFY_WEBHOOK", "http://127.0.0.1/unused")
+
+import numpy as np
+import pandas as pd
+
+from app.stock_news import stock_price_notification
+from utils.stock_news import price_cache
+from utils.stock_news.price_cache import read_close_prices, update_price_cache
+from utils.stock_news.watchlist import (
+    WINDOW_MONTH_MAP,
+    get_alert_df,
+    get_watchlist_stats_df,
+    read_watchlist,
+)
+
+SYMBOL_COUNT = 5_000
+DATE_COUNT = 300
+FAILED_SYMBOL_COUNT = 10
+# Simulated time of the request of one symbol
+SYMBOL_LATENCY_SECONDS = 0.005
+
+
+class FakeYahoo:
+    def __init__(self, symbol_list: list[str], today: pd.Timestamp) -> None:
+        rng = np.random.default_rng(0)
+        date_index = pd.bdate_range(end=today + pd.offsets.BDay(5), periods=DATE_COUNT + 5)
+        close = 100 * np.exp(
+            np.cumsum(rng.normal(0.0003, 0.02, (len(date_index), len(symbol_list))), 0)
+        )
+        # Suspension days of each symbol
+        close[rng.random(close.shape) < 0.03] = np.nan
+        self.close_df = pd.DataFrame(close, index=date_index, columns=symbol_list)
+        self.today = today
+        self.failed_symbol_set = set(symbol_list[-FAILED_SYMBOL_COUNT:])
+        self.download_count = 0
+        self.max_chunk_size = 0
+        self.sleep_seconds = 0.0
+
+    def download(self, symbol_list, start=None, period=None, threads=True, **kwargs):
+        self.download_count += 1
+        self.max_chunk_size = max(self.max_chunk_size, len(symbol_list))
+        sleep_seconds = math.ceil(len(symbol_list) / threads) * SYMBOL_LATENCY_SECONDS
+        time.sleep(sleep_seconds)
+        self.sleep_seconds += sleep_seconds
+
+        close_df = self.close_df.loc[: self.today]
+        if period is not None:
+            close_df = close_df[close_df.index > self.today - pd.DateOffset(years=1)]
+        else:
+            close_df = close_df[close_df.index >= pd.Timestamp(start)]
+        symbol_list = [symbol for symbol in symbol_list if symbol not in self.failed_symbol_set]
+        if not symbol_list:
+            return pd.DataFrame()
+        close_df = close_df[symbol_list]
+        df = pd.concat(
+            {price: close_df for price in ["Open", "High", "Low", "Close"]}
+            | {"Volume": close_df * 0 + 1000},
+            axis=1,
+            names=["Price", "Ticker"],
+        )
+        return df.swaplevel(axis=1).sort_index(axis=1).dropna(how="all")
+
+
+def get_stock_info_df_previous(close_df: pd.DataFrame) -> pd.DataFrame:
+    """pandas statistics of user-047."""
+    current_price = close_df.ffill().tail(1).max()
+    stock_info_df = pd.DataFrame({"current_price": current_price})
+    for window, months in WINDOW_MONTH_MAP.items():
+        window_df = close_df[close_df.index > close_df.index.max() - pd.DateOffset(months=months)]
+        stock_info_df[f"relative_high_percentage_{window}"] = (
+            current_price / window_df.max() - 1
+        ) * 100
+        stock_info_df[f"relative_mean_percentage_{window}"] = (
+            current_price / window_df.mean() - 1
+        ) * 100
+    return stock_info_df
+
+
+def get_stock_info_per_symbol(close: pd.Series) -> dict[str, float]:
+    """One symbol at a time, with its max drawdowns from a cummax."""
+    latest_date = close.index.max()
+    close = close.dropna()
+    current_price = close.iloc[-1]
+    stock_info = {"current_price": current_price}
+    for window, months in WINDOW_MONTH_MAP.items():
+        window_close = close[close.index > latest_date - pd.DateOffset(months=months)]
+        stock_info[f"relative_high_percentage_{window}"] = (
+            current_price / window_close.max() - 1
+        ) * 100
+        stock_info[f"relative_mean_percentage_{window}"] = (
+            current_price / window_close.mean() - 1
+        ) * 100
+        stock_info[f"max_drawdown_percentage_{window}"] = (
+            window_close / window_close.cummax() - 1
+        ).min() * 100
+    return stock_info
+
+
+def run_step(fake_yahoo: FakeYahoo, cache_dir: str, name: str) -> None:
+    download_count = fake_yahoo.download_count
+    fake_yahoo.max_chunk_size = 0
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        update_price_cache(cache_dir, symbol_list)
+    print(
+        f"{name:>23}: {fake_yahoo.download_count - download_count} downloads of "
+        f"<= {fake_yahoo.max_chunk_size} symbols, {time.perf_counter() - start_time:.2f} s"
+    )
+
+
+def print_time(name: str, function, *args):
+    start_time = time.perf_counter()
+    result = function(*args)
+    print(f"{name:>23}: {(time.perf_counter() - start_time) * 1000:>8,.1f} ms")
+    return result
+
+
+if __name__ == "__main__":
+    cache_dir = tempfile.mkdtemp()
+    watchlist_path = os.path.join(cache_dir, "watchlist.txt")
+    with open(watchlist_path, "w") as f:
+        f.write("# Synthetic watchlist\n\n")
+        f.write("\n".join(f"S{number:04d}.TW" for number in range(SYMBOL_COUNT)))
+        f.write("\nS0000.TW  # duplicated\n")
+    symbol_list = read_watchlist(watchlist_path)
+    assert len(symbol_list) == SYMBOL_COUNT
+    print(f"{len(symbol_list):,} symbols, {DATE_COUNT} dates")
+
+    today = pd.Timestamp("2026-10-16")
+    fake_yahoo = FakeYahoo(symbol_list, today)
+    price_cache.yf.download = fake_yahoo.download
+    run_step(fake_yahoo, cache_dir, "first run")
+    fake_yahoo.today += pd.offsets.BDay(1)
+    run_step(fake_yahoo, cache_dir, "daily run")
+
+    start_time = time.perf_counter()
+    close_df = read_close_prices(cache_dir, symbol_list)
+    print(f"read of {SYMBOL_COUNT:,} cached symbols: {time.perf_counter() - start_time:.2f} s")
+
+    previous_df = print_time("pandas statistics", get_stock_info_df_previous, close_df)
+    stats_df = print_time("NumPy statistics", get_watchlist_stats_df, close_df)
+    sample_list = [
+        symbol
+        for symbol in symbol_list[:: SYMBOL_COUNT // 500]
+        if symbol not in fake_yahoo.failed_symbol_set
+    ]
+    start_time = time.perf_counter()
+    per_symbol_map = {symbol: get_stock_info_per_symbol(close_df[symbol]) for symbol in sample_list}
+    elapsed = (time.perf_counter() - start_time) * len(symbol_list) / len(sample_list)
+    print(f"{'per-symbol pandas':>23}: {elapsed * 1000:>8,.1f} ms")
+
+    pd.testing.assert_frame_equal(
+        stats_df[previous_df.columns], previous_df, check_names=False, rtol=1e-12, atol=0
+    )
+    for symbol, stock_info in per_symbol_map.items():
+        for key, value in stock_info.items():
+            assert np.isclose(stats_df.at[symbol, key], value, rtol=1e-12, atol=1e-10), (
+                symbol,
+                key,
+            )
+    failed_symbol_list = list(fake_yahoo.failed_symbol_set)
+    assert stats_df.loc[failed_symbol_list].isna().all().all()
+    print("statistics match the pandas code (rtol 1e-12), drawdowns a per-symbol cummax")
+
+    start_time = time.perf_counter()
+    alert_df = get_alert_df(stats_df, stock_price_notification.ALERT_RULE_LIST)
+    elapsed = time.perf_counter() - start_time
+    # Every symbol crossing a rule, and only them, is alerted, with the rules it crossed
+    for rule in stock_price_notification.ALERT_RULE_LIST:
+        crossed_index = stats_df.query(str(rule)).index
+        assert crossed_index.isin(alert_df.index).all()
+        assert alert_df.index[alert_df[str(rule)]].equals(crossed_index)
+    assert alert_df.any(axis=1).all()
+    assert not set(failed_symbol_list) & set(alert_df.index)
+
+    msg_list = []
+    stock_price_notification.send_slack_notify = msg_list.append
+    stock_price_notification.STOCK_NEWS_PRICE_CACHE_DIR = cache_dir
+    stock_price_notification.STOCK_NEWS_WATCHLIST_FILE_PATH = watchlist_path
+    fake_yahoo.today += pd.offsets.BDay(1)
+    sleep_seconds = fake_yahoo.sleep_seconds
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stock_price_notification.main()
+    main_seconds = time.perf_counter() - start_time
+    print(
+        f"alerts: {len(alert_df):,}/{len(stats_df):,} symbols, {elapsed * 1000:.1f} ms; "
+        f"notification of {len(msg_list[0]):,} characters"
+    )
+    print(
+        f"main(): {main_seconds:.2f} s, of which "
+        f"{fake_yahoo.sleep_seconds - sleep_seconds:.1f} s of simulated downloads"
+    )
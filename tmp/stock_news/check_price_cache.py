@@ -0,0 +1,172 @@
+"""
+Check `update_price_cache()` against a stand-in for `yf.download` serving synthetic
+daily bars of 7 symbols, counting the bars downloaded, through simulated trading days:
+twice a day on weekdays, the first run intraday (last bar still moving).
+
+Output:
+     previous (1y per run):   3,654 bars per run
+                 first run:  1,827 bars, 1 download
+         same day, 2nd run:     42 bars, 1 download
+                  next day:     49 bars, 1 download
+    Price history of ['2330.TW'] restated, downloading it again
+       dividend on 2330.TW:    312 bars, 2 downloads
+       a week of runs (10):    455 bars, 10 downloads
+    No price data of FAILED.TW, cache kept
+            FAILED.TW down: cache of FAILED.TW kept
+    cache equals a full download of every symbol
+    read of 7 symbols, memory-mapped: 0 bytes allocated, 0.6 ms
+
+A run downloads the 6-7 bars of the trailing window per symbol. The intraday last bar
+is overwritten by the next run without being taken for a restatement.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/stock_news/check_price_cache.py
+```
+"""
+
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from utils.stock_news import price_cache
+from utils.stock_news.price_cache import read_close_prices, read_price_history, update_price_cache
+
+SYMBOL_LIST = ["0050.TW", "00830.TW", "00662.TW", "00757.TW", "2330.TW", "00631L.TW", "FAILED.TW"]
+
+
+class FakeYahoo:
+    """Daily bars up to `today`; the bar of today moves until the market closes."""
+
+    def __init__(self, symbol_list: list[str], today: date) -> None:
+        rng = np.random.default_rng(0)
+        date_index = pd.bdate_range(end=today + timedelta(days=60), periods=360)
+        self.close_df = pd.DataFrame(
+            100 * np.exp(np.cumsum(rng.normal(0, 0.02, (len(date_index), len(symbol_list))), 0)),
+            index=date_index,
+            columns=symbol_list,
+        )
+        self.today = pd.Timestamp(today)
+        self.intraday_factor = 1.0
+        self.failed_symbol_set: set[str] = set()
+        self.download_count = 0
+        self.bar_count = 0
+
+    def get_bar_df(self, symbol: str, start=None, period=None) -> pd.DataFrame:
+        close = self.close_df.loc[: self.today, symbol].copy()
+        close.iloc[-1] *= self.intraday_factor
+        if period is not None:
+            close = close[close.index > self.today - pd.DateOffset(years=1)]
+        else:
+            close = close[close.index >= pd.Timestamp(start)]
+        return pd.DataFrame(
+            {
+                "Open": close * 0.99,
+                "High": close * 1.01,
+                "Low": close * 0.98,
+                "Close": close,
+                "Volume": 1000.0,
+            }
+        )
+
+    def download(self, symbol_list, start=None, period=None, **kwargs) -> pd.DataFrame:
+        self.download_count += 1
+        bar_df_map = {
+            symbol: self.get_bar_df(symbol, start, period)
+            for symbol in symbol_list
+            if symbol not in self.failed_symbol_set
+        }
+        self.bar_count += sum(len(bar_df) for bar_df in bar_df_map.values())
+        if not bar_df_map:
+            return pd.DataFrame()
+        return pd.concat(bar_df_map, axis=1, names=["Ticker", "Price"])
+
+    def pay_dividend(self, symbol: str, ratio: float) -> None:
+        """Adjusted closes before today are scaled down, as Yahoo restates them."""
+        self.close_df.loc[self.close_df.index < self.today, symbol] *= ratio
+
+
+def run_step(fake_yahoo: FakeYahoo, cache_dir: str, name: str) -> None:
+    download_count, bar_count = fake_yahoo.download_count, fake_yahoo.bar_count
+    update_price_cache(cache_dir, SYMBOL_LIST)
+    print(
+        f"{name:>26}: {fake_yahoo.bar_count - bar_count:>6,} bars, "
+        f"{fake_yahoo.download_count - download_count} download"
+        + ("s" if fake_yahoo.download_count - download_count > 1 else "")
+    )
+
+
+def assert_cache_equal_full_download(fake_yahoo: FakeYahoo, cache_dir: str) -> None:
+    for symbol in SYMBOL_LIST:
+        if symbol in fake_yahoo.failed_symbol_set:
+            continue
+        cached_df = read_price_history(cache_dir, symbol).to_pandas()
+        first_date = cached_df["date"].iloc[0]
+        expected_df = fake_yahoo.get_bar_df(symbol, start=first_date)
+        assert cached_df["date"].tolist() == expected_df.index.tolist(), symbol
+        assert np.allclose(cached_df["close"], expected_df["Close"], rtol=1e-12), symbol
+        assert np.allclose(cached_df["open"], expected_df["Open"], rtol=1e-12), symbol
+
+
+if __name__ == "__main__":
+    cache_dir = tempfile.mkdtemp()
+    today = date(2026, 10, 19)
+    fake_yahoo = FakeYahoo(SYMBOL_LIST, today)
+    price_cache.yf.download = fake_yahoo.download
+
+    previous_bar_count = (
+        sum(len(fake_yahoo.get_bar_df(symbol, period="1y")) for symbol in SYMBOL_LIST) * 2
+    )
+    # The previous notification downloaded 1y twice (get_stock_info and the notification)
+    print(f"{'previous (1y per run)':>26}: {previous_bar_count:>7,} bars per run")
+
+    fake_yahoo.intraday_factor = 1.01
+    run_step(fake_yahoo, cache_dir, "first run")
+    fake_yahoo.intraday_factor = 1.0
+    run_step(fake_yahoo, cache_dir, "same day, 2nd run")
+    assert_cache_equal_full_download(fake_yahoo, cache_dir)
+
+    fake_yahoo.today += pd.offsets.BDay(1)
+    run_step(fake_yahoo, cache_dir, "next day")
+
+    fake_yahoo.today += pd.offsets.BDay(1)
+    fake_yahoo.pay_dividend("2330.TW", 0.98)
+    run_step(fake_yahoo, cache_dir, "dividend on 2330.TW")
+    assert_cache_equal_full_download(fake_yahoo, cache_dir)
+
+    download_count, bar_count = fake_yahoo.download_count, fake_yahoo.bar_count
+    for _ in range(5):
+        fake_yahoo.today += pd.offsets.BDay(1)
+        for intraday_factor in [0.995, 1.0]:
+            fake_yahoo.intraday_factor = intraday_factor
+            update_price_cache(cache_dir, SYMBOL_LIST)
+    print(
+        f"{'a week of runs (10)':>26}: {fake_yahoo.bar_count - bar_count:>6,} bars, "
+        f"{fake_yahoo.download_count - download_count} downloads"
+    )
+    assert_cache_equal_full_download(fake_yahoo, cache_dir)
+
+    last_date = read_price_history(cache_dir, "FAILED.TW").to_pandas()["date"].iloc[-1]
+    fake_yahoo.failed_symbol_set.add("FAILED.TW")
+    fake_yahoo.today += pd.offsets.BDay(1)
+    fetched_count_map = update_price_cache(cache_dir, SYMBOL_LIST)
+    assert fetched_count_map["FAILED.TW"] == 0
+    assert read_price_history(cache_dir, "FAILED.TW").to_pandas()["date"].iloc[-1] == last_date
+    assert_cache_equal_full_download(fake_yahoo, cache_dir)
+    print(f"{'FAILED.TW down':>26}: cache of FAILED.TW kept")
+    print("cache equals a full download of every symbol")
+
+    allocated_bytes = pa.total_allocated_bytes()
+    start_time = time.perf_counter()
+    table_list = [read_price_history(cache_dir, symbol) for symbol in SYMBOL_LIST]
+    elapsed = time.perf_counter() - start_time
+    print(
+        f"read of {len(table_list)} symbols, memory-mapped: "
+        f"{pa.total_allocated_bytes() - allocated_bytes} bytes allocated, {elapsed * 1000:.1f} ms"
+    )
+    close_df = read_close_prices(cache_dir, SYMBOL_LIST)
+    assert list(close_df.columns) == SYMBOL_LIST
@@ -0,0 +1,178 @@
+"""
+Check the concurrent `generate_notification_content()` of `stock_news_crawler` against
+its previous sequential code, with a stand-in for `requests.get` serving the Yahoo
+chart API, the two news pages (5 news each) and tinyurl, each URL with its latency.
+Like `requests`, the stand-in raises `requests.Timeout` once `timeout` has passed.
+
+Output:
+                          latency: previous 3.61 s, concurrent 0.71 s, same content
+             tinyurl hangs (60 s): 5.51 s, the long link kept
+        TW news page hangs (60 s): 10.00 s, "Failed to retrieve Taiwan stock news"
+     US news page trickles (17 s): 15.01 s to the fallback, 15.01 s to return
+            TAIEX API returns 500: "TAIEX (Taiwan Weighted Index): Unable to retrieve data"
+
+With the latencies of the first line (0.3 s per chart, 0.5 s per news page, 0.2 s per
+tinyurl link), the 14 requests take the sum of their latencies one after another, and
+the longest chain (news page, then its links) at once. A hanging tinyurl link costs
+its SHORTEN_URL_TIMEOUT_SECONDS after the page; the previous code had no timeout, so a
+hanging request blocked the run for good.
+
+A page trickling bytes never hits the `requests` timeout (it is between bytes), so the
+source falls back at SOURCE_TIMEOUT_SECONDS; the run returns then, without waiting for
+the worker thread, which is not of the default executor of the loop.
+
+Run:
+```bash
+PYTHONPATH=src python tmp/stock_news/check_stock_news_crawler.py
+```
+"""
+
+import contextlib
+import io
+import subprocess
+import time
+import types
+
+import requests
+
+from app.stock_news import stock_news_crawler
+
+TW_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/%5ETWII"
+US_CHART_URL = "https://query1.finance.yahoo.com/v8/finance/chart/%5EGSPC"
+TW_NEWS_URL = "https://tw.stock.yahoo.com/tw-market/"
+US_NEWS_URL = "https://finance.yahoo.com/topic/stock-market-news/"
+TINYURL_PREFIX = "http://tinyurl.com/api-create.php?url="
+# Parent of the commit making the sources concurrent
+PREVIOUS_REVISION = "e205157~1"
+
+
+def get_news_html(name: str, link_prefix: str) -> str:
+    return "".join(
+        f'<div class="Py(14px)"><h3>{name} news {i}</h3>'
+        f'<a href="{link_prefix}/news-{i}"></a></div>'
+        for i in range(5)
+    )
+
+
+class FakeInternet:
+    def __init__(self) -> None:
+        self.latency_map = {
+            TW_CHART_URL: 0.3,
+            US_CHART_URL: 0.3,
+            TW_NEWS_URL: 0.5,
+            US_NEWS_URL: 0.5,
+            TINYURL_PREFIX: 0.2,
+        }
+        # URLs that send bytes slowly enough to never hit the timeout
+        self.trickling_url_set: set[str] = set()
+        self.status_code_map: dict[str, int] = {}
+
+    def get_body(self, url: str) -> str:
+        if url.startswith(TINYURL_PREFIX):
+            return "https://tinyurl.com/" + url.removeprefix(TINYURL_PREFIX).rsplit("/", 1)[-1]
+        if url == TW_NEWS_URL:
+            return get_news_html("TW", "https://tw.stock.yahoo.com")
+        if url == US_NEWS_URL:
+            return get_news_html("US", "")
+        price, previous_close = (22000.0, 21800.0) if url == TW_CHART_URL else (5800.0, 5850.0)
+        return (
+            '{"chart": {"result": [{"meta": '
+            f'{{"regularMarketPrice": {price}, "chartPreviousClose": {previous_close}}}'
+            "}]}}"
+        )
+
+    def get(self, url: str, headers=None, timeout=None) -> requests.Response:
+        key = TINYURL_PREFIX if url.startswith(TINYURL_PREFIX) else url
+        latency = self.latency_map[key]
+        if timeout is not None and latency > timeout and url not in self.trickling_url_set:
+            time.sleep(timeout)
+            raise requests.Timeout(f"Read timed out: {url}")
+        time.sleep(latency)
+        response = requests.Response()
+        response.status_code = self.status_code_map.get(key, 200)
+        response.url = url
+        response.encoding = "utf-8"
+        response._content = self.get_body(url).encode()
+        return response
+
+
+def load_previous_crawler() -> types.ModuleType:
+    """Sequential `stock_news_crawler` of the commit before the concurrent fetch."""
+    source = subprocess.run(
+        ["git", "show", f"{PREVIOUS_REVISION}:src/app/stock_news/stock_news_crawler.py"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    module = types.ModuleType("previous_stock_news_crawler")
+    exec(source, module.__dict__)
+    return module
+
+
+def run(module: types.ModuleType) -> tuple[str, float]:
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        content = module.generate_notification_content()
+    return content, time.perf_counter() - start_time
+
+
+if __name__ == "__main__":
+    fake_internet = FakeInternet()
+    requests.get = fake_internet.get
+    previous_crawler = load_previous_crawler()
+
+    previous_content, previous_seconds = run(previous_crawler)
+    content, seconds = run(stock_news_crawler)
+    assert content == previous_content
+    assert "https://tinyurl.com/news-4" in content and "US news 4" in content
+    print(
+        f"{'latency':>29}: previous {previous_seconds:.2f} s, concurrent {seconds:.2f} s, "
+        "same content"
+    )
+
+    fake_internet.latency_map[TINYURL_PREFIX] = 60
+    content, seconds = run(stock_news_crawler)
+    assert "https://tw.stock.yahoo.com/news-0" in content
+    assert "https://finance.yahoo.com/news-0" in content
+    print(f"{'tinyurl hangs (60 s)':>29}: {seconds:.2f} s, the long link kept")
+    fake_internet.latency_map[TINYURL_PREFIX] = 0.2
+
+    fake_internet.latency_map[TW_NEWS_URL] = 60
+    content, seconds = run(stock_news_crawler)
+    assert "<p>Failed to retrieve Taiwan stock news</p>" in content and "US news 4" in content
+    print(
+        f'{"TW news page hangs (60 s)":>29}: {seconds:.2f} s, '
+        '"Failed to retrieve Taiwan stock news"'
+    )
+    fake_internet.latency_map[TW_NEWS_URL] = 0.5
+
+    fake_internet.latency_map[US_NEWS_URL] = 17
+    fake_internet.trickling_url_set.add(US_NEWS_URL)
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        task_seconds = []
+        original_gather_sources = stock_news_crawler.gather_sources
+
+        async def timed_gather_sources():
+            result = await original_gather_sources()
+            task_seconds.append(time.perf_counter() - start_time)
+            return result
+
+        stock_news_crawler.gather_sources = timed_gather_sources
+        content = stock_news_crawler.generate_notification_content()
+        stock_news_crawler.gather_sources = original_gather_sources
+    seconds = time.perf_counter() - start_time
+    assert "<p>Failed to retrieve US stock news</p>" in content and "TW news 4" in content
+    print(
+        f"{'US news page trickles (17 s)':>29}: {task_seconds[0]:.2f} s to the fallback, "
+        f"{seconds:.2f} s to return"
+    )
+    fake_internet.latency_map[US_NEWS_URL] = 0.5
+    fake_internet.trickling_url_set.clear()
+
+    fake_internet.status_code_map[TW_CHART_URL] = 500
+    content, seconds = run(stock_news_crawler)
+    fallback = "<strong>TAIEX (Taiwan Weighted Index)</strong>: Unable to retrieve data"
+    assert f"<p>{fallback}</p>" in content
+    fallback_text = fallback.replace("<strong>", "").replace("</strong>", "")
+    print(f'{"TAIEX API returns 500":>29}: "{fallback_text}"')
@@ -0,0 +1,171 @@
+"""
+Check the batched statistics of `stock_price_notification` against the previous
+per-ticker code, on synthetic daily closes served by a stand-in for Yahoo Finance.
+
+`Ticker.history(period=...)` returns the closes after the same day `period` before the
+latest close ("1d": the latest close), `download()` returns the bars of the past year
+of all symbols, aligned on the union of their dates like yfinance does. The new code
+reads them through an empty price cache, so the first run downloads the whole year.
+Symbols have their own suspension days; "FAILED.TW" returns no data.
+
+Output:
+    previous: 56 downloads, batched: 1 download
+    7 symbols: all 7 statistics match (rtol 1e-12), notification lines identical
+    FAILED.TW: previous main() raised IndexError, now "FAILED.TW: Unable to fetch data"
+
+Run:
+```bash
+PYTHONPATH=src python tmp/stock_news/check_stock_price_notification.py
+```
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("STOCK_NEWS_SLACK_NOTIFY_WEBHOOK", "http://127.0.0.1/unused")
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from app.stock_news import stock_price_notification
+from app.stock_news.stock_price_notification import (
+    STOCK_LIST,
+    generate_notification_content,
+    get_stock_info_map,
+)
+from utils.stock_news import price_cache
+
+FAILED_SYMBOL = "FAILED.TW"
+PERIOD_MONTH_MAP = {"3mo": 3, "6mo": 6, "1y": 12}
+
+
+class FakeYahoo:
+    def __init__(self, symbol_list: list[str]) -> None:
+        rng = np.random.default_rng(0)
+        date_index = pd.bdate_range(end="2026-10-16", periods=300)
+        self.close_map = {}
+        for symbol in symbol_list:
+            close = pd.Series(
+                100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(date_index)))), index=date_index
+            )
+            # Suspension days of this symbol only
+            self.close_map[symbol] = close[rng.random(len(date_index)) > 0.03]
+        self.download_count = 0
+
+    def get_close(self, symbol: str, period: str) -> pd.Series:
+        self.download_count += 1
+        close = self.close_map.get(symbol, pd.Series(dtype=float, index=pd.DatetimeIndex([])))
+        if period == "1d":
+            return close.tail(1)
+        start = close.index.max() - pd.DateOffset(months=PERIOD_MONTH_MAP[period])
+        return close[close.index > start]
+
+    def ticker(self, symbol: str):
+        fake_yahoo = self
+
+        class FakeTicker:
+            def history(self, period: str) -> pd.DataFrame:
+                return pd.DataFrame({"Close": fake_yahoo.get_close(symbol, period)})
+
+        return FakeTicker()
+
+    def download(self, symbol_list, period=None, group_by="column", **kwargs) -> pd.DataFrame:
+        self.download_count += 1
+        close_map = {symbol: self.get_close(symbol, period) for symbol in symbol_list}
+        self.download_count -= len(symbol_list)
+        close_df = pd.DataFrame(close_map)
+        df = pd.concat(
+            {
+                symbol: pd.DataFrame(
+                    {
+                        "Open": close_df[symbol],
+                        "High": close_df[symbol],
+                        "Low": close_df[symbol],
+                        "Close": close_df[symbol],
+                        "Volume": 1000.0,
+                    }
+                )
+                for symbol in symbol_list
+            },
+            axis=1,
+            names=["Ticker", "Price"],
+        )
+        return df.dropna(how="all")
+
+
+def get_stock_info_previous(symbol):
+    """Previous implementation, 4 downloads per ticker."""
+    stock = yf.Ticker(symbol)
+
+    hist = stock.history(period="1d")
+    current_price = hist["Close"].iloc[-1]
+
+    hist_3mo = stock.history(period="3mo")
+    high_price_3mo = hist_3mo["Close"].max()
+    mean_price_3mo = hist_3mo["Close"].mean()
+
+    hist_6mo = stock.history(period="6mo")
+    high_price_6mo = hist_6mo["Close"].max()
+    mean_price_6mo = hist_6mo["Close"].mean()
+
+    hist_1yr = stock.history(period="1y")
+    high_price_1yr = hist_1yr["Close"].max()
+    mean_price_1yr = hist_1yr["Close"].mean()
+
+    return {
+        "current_price": current_price,
+        "relative_high_percentage_3mo": (current_price / high_price_3mo - 1) * 100,
+        "relative_high_percentage_6mo": (current_price / high_price_6mo - 1) * 100,
+        "relative_high_percentage_1yr": (current_price / high_price_1yr - 1) * 100,
+        "relative_mean_percentage_3mo": (current_price / mean_price_3mo - 1) * 100,
+        "relative_mean_percentage_6mo": (current_price / mean_price_6mo - 1) * 100,
+        "relative_mean_percentage_1yr": (current_price / mean_price_1yr - 1) * 100,
+    }
+
+
+def generate_notification_content_previous(stock) -> str:
+    """Previous implementation, which fetched the stock info again."""
+    stock_info = get_stock_info_previous(stock)
+    msg = f"{stock}: Now {stock_info['current_price']:.2f}\n"
+    for window in ["3mo", "6mo", "1yr"]:
+        msg += (
+            f"  [{window}] high {stock_info[f'relative_high_percentage_{window}']:.1f}%, "
+            f"mean {stock_info[f'relative_mean_percentage_{window}']:.1f}%\n"
+        )
+    return msg
+
+
+if __name__ == "__main__":
+    fake_yahoo = FakeYahoo(STOCK_LIST)
+    yf.Ticker = fake_yahoo.ticker
+    price_cache.yf.download = fake_yahoo.download
+    stock_price_notification.STOCK_NEWS_PRICE_CACHE_DIR = tempfile.mkdtemp()
+
+    previous_map = {stock: get_stock_info_previous(stock) for stock in STOCK_LIST}
+    previous_msg_map = {
+        stock: generate_notification_content_previous(stock) for stock in STOCK_LIST
+    }
+    previous_count, fake_yahoo.download_count = fake_yahoo.download_count, 0
+
+    stock_info_map = get_stock_info_map(STOCK_LIST + [FAILED_SYMBOL])
+    print(f"previous: {previous_count} downloads, batched: {fake_yahoo.download_count} download")
+
+    for stock in STOCK_LIST:
+        assert previous_map[stock].keys() <= stock_info_map[stock].keys()
+        for key, value in previous_map[stock].items():
+            assert np.isclose(stock_info_map[stock][key], value, rtol=1e-12, atol=0), (stock, key)
+        msg = generate_notification_content(stock, stock_info_map[stock])
+        assert msg == previous_msg_map[stock], stock
+    print(
+        f"{len(STOCK_LIST)} symbols: all {len(previous_map[STOCK_LIST[0]])} statistics match "
+        "(rtol 1e-12), notification lines identical"
+    )
+
+    try:
+        get_stock_info_previous(FAILED_SYMBOL)
+        raise AssertionError("no error")
+    except IndexError:
+        pass
+    msg = generate_notification_content(FAILED_SYMBOL, stock_info_map[FAILED_SYMBOL])
+    print(f'{FAILED_SYMBOL}: previous main() raised IndexError, now "{msg.strip()}"')